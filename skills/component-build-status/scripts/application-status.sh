@@ -0,0 +1,171 @@
+#!/bin/bash
+# application-status.sh - Status of all components of a Konflux application
+#
+# Usage: application-status.sh [-n namespace] [--json] <application>
+#
+# Arguments:
+#   application - Konflux application name (e.g., "otel-main")
+#
+# Options:
+#   -n namespace - Kubernetes namespace (default: the current context's)
+#   --json       - Print the joined status as JSON instead of tables
+#
+# Examples:
+#   # Component table plus a Snapshot/Release table per component
+#   application-status.sh otel-main
+#
+#   # Components whose latest release failed
+#   application-status.sh --json otel-main \
+#     | jq -r '.components[] | select(.snapshots[-1].releases[0].status | startswith("Failed")) | .name'
+#
+# Instead of one `kubectl get component`, `get snapshot -l` and `get release -l`
+# per component, this lists each kind once (3 cluster calls, run concurrently,
+# whatever the number of components) and joins them in memory on the labels
+# pac.test.appstudio.openshift.io/sha and appstudio.openshift.io/component,
+# matching Releases to Snapshots by .spec.snapshot. Commit messages and
+# branches come from the Git repository in the current directory, if any.
+#
+# Environment:
+#   KUBECTL - kubectl-compatible CLI to use (default: kubectl)
+#
+# Security: Read-only access to Components, Snapshots and Releases.
+
+set -euo pipefail
+
+kubectl="${KUBECTL:-kubectl}"
+namespace_args=()
+output=table
+
+usage() {
+    echo "Usage: $0 [-n namespace] [--json] <application>" >&2
+    exit 1
+}
+
+while [ "$#" -gt 0 ] && [[ "$1" == -* ]]; do
+    case "$1" in
+        -n)
+            if [ "$#" -lt 2 ]; then
+                usage
+            fi
+            namespace_args=(-n "$2"); shift ;;
+        --json) output=json ;;
+        *) echo "Unknown option: $1" >&2; exit 1 ;;
+    esac
+    shift
+done
+
+if [ "$#" -ne 1 ]; then
+    usage
+fi
+application="$1"
+
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+
+# One list call per kind, all three at once
+"$kubectl" get components ${namespace_args[@]+"${namespace_args[@]}"} -o json > "$tmp/components.json" &
+components_pid=$!
+"$kubectl" get snapshots ${namespace_args[@]+"${namespace_args[@]}"} -l "appstudio.openshift.io/application=$application" \
+    -o json > "$tmp/snapshots.json" &
+snapshots_pid=$!
+"$kubectl" get releases ${namespace_args[@]+"${namespace_args[@]}"} -l "appstudio.openshift.io/application=$application" \
+    -o json > "$tmp/releases.json" &
+releases_pid=$!
+for pid in "$components_pid" "$snapshots_pid" "$releases_pid"; do
+    if ! wait "$pid"; then
+        echo "Failed to list Konflux resources of application '$application'" >&2
+        exit 1
+    fi
+done
+
+# Commit message and branches of every built commit known to the local repository
+: > "$tmp/git.ndjson"
+if git rev-parse --git-dir > /dev/null 2>&1; then
+    jq -r --arg app "$application" \
+        '.items[] | select(.spec.application == $app) | .status.lastBuiltCommit // empty' \
+        "$tmp/components.json" | sort -u \
+        | git cat-file --batch-check='%(objectname) %(objecttype)' \
+        | while read -r sha type; do
+            if [ "$type" != commit ]; then
+                continue
+            fi
+            jq -n -c --arg sha "$sha" \
+                --arg message "$(git log -1 --format=%s "$sha")" \
+                --arg branch "$(git branch -a --contains "$sha" --format='%(refname:short)' | paste -sd, -)" \
+                '{($sha): {message: $message, branch: $branch}}'
+        done > "$tmp/git.ndjson"
+fi
+
+# Join on "{sha}/{component}" label indexes
+join='
+    def key: "\(.metadata.labels["pac.test.appstudio.openshift.io/sha"] // "")/\(.metadata.labels["appstudio.openshift.io/component"] // "")";
+    def index: reduce .[] as $item ({}; .[$item | key] += [$item]);
+    def release_status:
+        (.status.conditions // [] | map(select(.type == "Released")) | .[0]) as $c
+        | if $c == null then "Pending"
+          elif $c.status == "True" then "Succeeded"
+          elif $c.reason == "Progressing" then "Progressing"
+          else "Failed (\(if ($c.message // "") != "" then $c.message else $c.reason end))"
+          end;
+
+    ($snapshots[0].items | sort_by(.metadata.creationTimestamp) | index) as $snapshots_by_key
+    | ($releases[0].items | index) as $releases_by_key
+    | (reduce $git[] as $g ({}; . + $g)) as $commits
+    | {
+        application: $app,
+        components: [
+            $components[0].items[]
+            | select(.spec.application == $app)
+            | (.status.lastBuiltCommit // "") as $sha
+            | "\($sha)/\(.metadata.name)" as $key
+            | ($releases_by_key[$key] // []) as $releases
+            | {
+                name: .metadata.name,
+                sha: (if $sha == "" then null else $sha end),
+                git_url: .spec.source.git.url,
+                last_promoted_image: .status.lastPromotedImage,
+                commit_message: $commits[$sha].message,
+                branch: $commits[$sha].branch,
+                snapshots: [
+                    ($snapshots_by_key[$key] // [])[]
+                    | .metadata.name as $snapshot
+                    | {
+                        name: $snapshot,
+                        releases: [
+                            $releases[] | select(.spec.snapshot == $snapshot)
+                            | {name: .metadata.name, status: release_status}
+                        ]
+                    }
+                ]
+            }
+        ] | sort_by(.name)
+    }'
+
+render='
+    def cell: if . == null or . == "" then "" else tostring | gsub("\\|"; "\\|") end;
+    "| Component | Built SHA | lastPromotedImage | Commit Message | Git Branch | Snapshots (oldest first) |",
+    "|-----------|-----------|-------------------|----------------|------------|--------------------------|",
+    (.components[]
+     | "| \(.name) | \(.sha // "" | .[0:7]) | \(.last_promoted_image | cell) | \(.commit_message | cell) | \(.branch | cell) | \([.snapshots[].name] | join(", ")) |"),
+    (.components[] | select(.snapshots != [])
+     | "",
+       "Component: \(.name)",
+       "| Snapshot | Release | Release status |",
+       "|----------|---------|----------------|",
+       (.snapshots[]
+        | .name as $snapshot
+        | if .releases == [] then "| \($snapshot) | | |"
+          else .releases[] | "| \($snapshot) | \(.name) | \(.status | cell) |"
+          end))'
+
+if [ "$output" = json ]; then
+    filter="$join"
+else
+    filter="$join | $render"
+fi
+jq -n -r --arg app "$application" \
+    --slurpfile components "$tmp/components.json" \
+    --slurpfile snapshots "$tmp/snapshots.json" \
+    --slurpfile releases "$tmp/releases.json" \
+    --slurpfile git "$tmp/git.ndjson" \
+    "$filter"
@@ -0,0 +1,150 @@
+#!/bin/bash
+# build-components.sh - Trigger, wait for and nudge the builds of many components
+#
+# Usage: build-components.sh [-n namespace] [--wait duration] [--wait-release] [--nudge] <component>...
+#
+# Arguments:
+#   component - Konflux component name(s) (e.g., "otel-collector-main")
+#
+# Options:
+#   -n namespace     - Kubernetes namespace (default: the current context's)
+#   --wait dur       - Wait for the builds to finish; suffix s, m or h
+#   --wait-release   - Also wait for the releases (requires --wait)
+#   --nudge          - Update the nudge files of the Git repository in the current
+#                      directory with the built images (requires --wait)
+#
+# Examples:
+#   # Build three components and nudge the bundle files
+#   build-components.sh --wait 1h --nudge otel-collector-main otel-target-allocator-main otel-operator-main
+#
+#   # Build the bundle and wait for its release
+#   build-components.sh --wait 2h --wait-release otel-bundle-main
+#
+# All components are triggered with one `kubectl annotate` and waited for
+# together (see wait-builds.sh, whose progress events are printed as they
+# come). Nudging then rewrites every file once: each file matching the
+# build-nudge-files patterns of any built component gets all of its
+# image references replaced in one pass and one atomic write. A
+# {"nudged": file, "components": [...]} event is printed per changed file.
+#
+# Exits 1 if any build (or release) did not succeed; nudges are applied for
+# the builds that did.
+#
+# Environment:
+#   KUBECTL - kubectl-compatible CLI to use (default: kubectl)
+
+set -euo pipefail
+
+kubectl="${KUBECTL:-kubectl}"
+scripts=$(cd "$(dirname "$0")" && pwd)
+namespace_args=()
+wait=""
+wait_release=false
+nudge=false
+while [ "$#" -gt 0 ] && [[ "$1" == -* ]]; do
+    case "$1" in
+        -n) namespace_args=(-n "$2"); shift ;;
+        --wait) wait="$2"; shift ;;
+        --wait-release) wait_release=true ;;
+        --nudge) nudge=true ;;
+        *) echo "Unknown option: $1" >&2; exit 1 ;;
+    esac
+    shift
+done
+
+if [ "$#" -lt 1 ]; then
+    echo "Usage: $0 [-n namespace] [--wait duration] [--wait-release] [--nudge] <component>..." >&2
+    exit 1
+fi
+if [ -z "$wait" ] && { [ "$wait_release" = true ] || [ "$nudge" = true ]; }; then
+    echo "--wait-release and --nudge require --wait" >&2
+    exit 1
+fi
+if [ "$nudge" = true ] && ! repo_root=$(git rev-parse --show-toplevel 2>/dev/null); then
+    echo "--nudge must be run from the Git repository holding the nudge files" >&2
+    exit 1
+fi
+
+since=$(date -u +%Y-%m-%dT%H:%M:%SZ)
+"$kubectl" annotate components "$@" ${namespace_args[@]+"${namespace_args[@]}"} --overwrite \
+    build.appstudio.openshift.io/request=trigger-pac-build >&2
+
+if [ -z "$wait" ]; then
+    exit 0
+fi
+
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+
+wait_args=(--since "$since" --timeout "$wait")
+if [ "$wait_release" = true ]; then
+    wait_args+=(--wait-release)
+fi
+status=0
+"$scripts/wait-builds.sh" ${namespace_args[@]+"${namespace_args[@]}"} "${wait_args[@]}" "$@" \
+    | tee "$tmp/events" || status=1
+
+if [ "$nudge" = false ]; then
+    exit $status
+fi
+
+# Final event of every component that built an image
+jq -s -c 'group_by(.component) | map(last) | .[]
+    | select(.phase | IN("snapshot-created", "releasing", "released", "release-failed"))' \
+    "$tmp/events" > "$tmp/built"
+if [ ! -s "$tmp/built" ]; then
+    exit $status
+fi
+
+# Nudge file patterns of the built PipelineRuns, in one call
+"$kubectl" get pipelineruns $(jq -r .pipelinerun "$tmp/built") ${namespace_args[@]+"${namespace_args[@]}"} \
+    -o json > "$tmp/pipelineruns.json"
+
+# "component<TAB>image<TAB>pattern" lines; Konflux's default patterns apply
+# when the annotation is missing
+jq -r --slurpfile runs "$tmp/pipelineruns.json" '
+    ($runs[0] | (.items // [.]) | map({(.metadata.name):
+        (.metadata.annotations["build.appstudio.openshift.io/build-nudge-files"]
+         // ".*Dockerfile.*, .*.yaml, .*Containerfile.*")}) | add) as $patterns
+    | . as $build
+    | $patterns[$build.pipelinerun] | split(",")[] | gsub("^\\s+|\\s+$"; "") | select(. != "")
+    | [$build.component, $build.image, .] | join("\t")' "$tmp/built" > "$tmp/patterns"
+
+# "file<TAB>component<TAB>image" for every tracked file a component nudges
+cd "$repo_root"
+git ls-files > "$tmp/files"
+while IFS=$'\t' read -r component image pattern; do
+    { grep -E -x -e "$pattern" "$tmp/files" || true; } | while read -r file; do
+        printf '%s\t%s\t%s\n' "$file" "$component" "$image"
+    done
+done < "$tmp/patterns" | sort -u > "$tmp/nudges"
+
+# One sed pass and one atomic write per file, with the replacements of all
+# components nudging it: any pinned reference to the image repository
+# (repo@sha256:..., repo:tag@sha256:...) becomes the new image
+awk -F '\t' '{ print $1 }' "$tmp/nudges" | uniq | while read -r file; do
+    expressions=()
+    components=()
+    while IFS=$'\t' read -r _ component image; do
+        repository=$(printf '%s' "${image%@*}" | sed 's/[.[\*^$|+?(){}\\]/\\&/g')
+        expressions+=(-e "s|$repository(:[A-Za-z0-9_][A-Za-z0-9_.-]*)?@sha256:[0-9a-f]{64}|$image|g")
+        components+=("$component")
+    done < <(awk -F '\t' -v file="$file" '$1 == file' "$tmp/nudges")
+
+    sed -E "${expressions[@]}" "$file" > "$file.nudge.$$"
+    if cmp -s "$file" "$file.nudge.$$"; then
+        rm -f "$file.nudge.$$"
+        continue
+    fi
+    # Keep the file's mode (GNU stat, then BSD stat)
+    if ! mode=$(stat -c %a "$file" 2>/dev/null || stat -f %Lp "$file") \
+        || ! chmod "$mode" "$file.nudge.$$"; then
+        rm -f "$file.nudge.$$"
+        echo "Cannot keep the mode of $file, not nudged" >&2
+        exit 1
+    fi
+    mv "$file.nudge.$$" "$file"
+    jq -n -c --arg file "$file" '{nudged: $file, components: $ARGS.positional}' --args "${components[@]}"
+done
+
+exit $status
@@ -0,0 +1,281 @@
+#!/bin/bash
+# wait-builds.sh - Wait for the builds (and releases) of many components at once
+#
+# Usage: wait-builds.sh [-n namespace] [--since time] [--timeout duration] [--wait-release] <component>...
+#
+# Arguments:
+#   component - Konflux component name(s) (e.g., "otel-collector-main")
+#
+# Options:
+#   -n namespace     - Kubernetes namespace (default: the current context's)
+#   --since time     - Only consider PipelineRuns created at or after this time
+#                      (default: when the script starts), e.g. the time the
+#                      builds were triggered: 2025-11-13T11:20:00Z,
+#                      2025-11-13T12:20:00+01:00 or anything GNU `date -d`
+#                      reads (UTC times only where date has no -d)
+#   --timeout dur    - Give up after this long; suffix s, m or h (default: 1h)
+#   --wait-release   - Also wait for the Release created from each build's Snapshot
+#
+# Examples:
+#   # Wait for two builds triggered a moment ago
+#   wait-builds.sh --since 2025-11-13T11:20:00Z otel-collector-main otel-operator-main
+#
+#   # Wait for a build and its release, at most 2 hours
+#   wait-builds.sh --timeout 2h --wait-release otel-bundle-main
+#
+# Follows each component's on-push build PipelineRun -> Snapshot -> Release
+# chain and prints one JSON progress event per state change:
+#
+#   {"component", "phase", "pipelinerun", "snapshot", "image", "release",
+#    "message", "time"}
+#
+# Phases: waiting, building, build-succeeded, build-failed, snapshot-created,
+# releasing, released, release-failed, timed-out, error. The script exits when
+# every component reached a final phase (snapshot-created, or released with
+# --wait-release): 0 if all succeeded, 1 otherwise.
+#
+# Instead of polling, it opens one watch per resource kind (PipelineRuns,
+# Snapshots, Releases) for all components together. Each watch starts from a
+# list and resumes from the last seen resourceVersion when the API server
+# closes it (watch bookmarks keep that version fresh); after "410 Gone" it
+# lists again.
+#
+# Environment:
+#   KUBECTL - kubectl-compatible CLI to use (default: kubectl)
+#
+# Security: Read-only access to PipelineRuns, Snapshots and Releases.
+
+set -euo pipefail
+
+kubectl="${KUBECTL:-kubectl}"
+namespace=""
+since=$(date -u +%Y-%m-%dT%H:%M:%SZ)
+timeout=1h
+wait_release=false
+
+usage() {
+    echo "Usage: $0 [-n namespace] [--since time] [--timeout duration] [--wait-release] <component>..." >&2
+    exit 1
+}
+
+while [ "$#" -gt 0 ] && [[ "$1" == -* ]]; do
+    case "$1" in
+        -n|--since|--timeout)
+            if [ "$#" -lt 2 ]; then
+                usage
+            fi
+            case "$1" in
+                -n) namespace="$2" ;;
+                --since) since="$2" ;;
+                --timeout) timeout="$2" ;;
+            esac
+            shift ;;
+        --wait-release) wait_release=true ;;
+        *) echo "Unknown option: $1" >&2; exit 1 ;;
+    esac
+    shift
+done
+
+if [ "$#" -lt 1 ]; then
+    usage
+fi
+
+# Creation timestamps are compared as strings, so normalize to the UTC form Kubernetes uses
+since_utc=$(date -u -d "$since" +%Y-%m-%dT%H:%M:%SZ 2>/dev/null) \
+    || since_utc=$(jq -n -r --arg t "$since" '$t | fromdate | todate' 2>/dev/null) \
+    || {
+        echo "Invalid time '$since', expected e.g. 2025-11-13T11:20:00Z" >&2
+        exit 1
+    }
+since="$since_utc"
+
+case "$timeout" in
+    *[0-9]s) timeout_seconds=${timeout%s} ;;
+    *[0-9]m) timeout_seconds=$((${timeout%m} * 60)) ;;
+    *[0-9]h) timeout_seconds=$((${timeout%h} * 3600)) ;;
+    *) echo "Invalid duration '$timeout', expected a number with suffix s, m or h" >&2; exit 1 ;;
+esac
+
+if [ -z "$namespace" ]; then
+    namespace=$("$kubectl" config view --minify -o 'jsonpath={..namespace}')
+    namespace="${namespace:-default}"
+fi
+
+components_json=$(printf '%s\n' "$@" | jq -R . | jq -s -c .)
+selector="appstudio.openshift.io%2Fcomponent%20in%20%28$(IFS=,; echo "$*" | sed 's/,/%2C/g')%29"
+
+tmp=$(mktemp -d)
+mkfifo "$tmp/events"
+
+kill_tree() {
+    local child
+    for child in $(pgrep -P "$1" || true); do
+        kill_tree "$child"
+    done
+    kill "$1" 2>/dev/null || true
+}
+cleanup() {
+    local child
+    for child in $(pgrep -P $$ || true); do
+        kill_tree "$child"
+    done
+    rm -rf "$tmp"
+}
+trap cleanup EXIT
+
+# Reduce list items and watch events to the few fields the waiter needs,
+# printed as "resourceVersion|event". Keeping events small keeps every
+# line written to the shared FIFO below PIPE_BUF, so lines from the three
+# watches never interleave.
+project='
+    def condition($type):
+        (.status.conditions // [] | map(select(.type == $type)) | .[0])
+        | if . == null then null else {status, reason, message} end;
+    (.object.metadata.labels // {}) as $labels
+    | [
+        (.object.metadata.resourceVersion // ""),
+        ({
+            kind: $kind,
+            type,
+            name: .object.metadata.name,
+            created: .object.metadata.creationTimestamp,
+            component: $labels["appstudio.openshift.io/component"],
+            build_pipelinerun: $labels["appstudio.openshift.io/build-pipelinerun"],
+            build: ($labels["pipelines.appstudio.openshift.io/type"] == "build"
+                    and ((.object.metadata.name + " " + ($labels["pipelinesascode.tekton.dev/original-prname"] // ""))
+                         | contains("-on-push"))),
+            succeeded: (.object | condition("Succeeded")),
+            released: (.object | condition("Released")),
+            image: ($labels["appstudio.openshift.io/component"] as $c
+                    | .object.spec.components // [] | map(select(.name == $c)) | .[0].containerImage)
+        } | tojson)
+    ] | join("|")'
+
+# watch KIND API_PATH: list, then watch from the list's resourceVersion,
+# resuming from the last seen one whenever the watch ends
+watch() {
+    local kind="$1"
+    local path="$2"
+    local rv="" listed=false received line version event
+    while true; do
+        if [ -z "$rv" ]; then
+            if ! line=$("$kubectl" get --raw "$path?labelSelector=$selector" 2>"$tmp/$kind.err" \
+                | jq -r --arg kind "$kind" \
+                    '(.items[] | {type: "ADDED", object: .}), {type: "LISTED", object: {metadata: .metadata}}
+                     | '"$project"); then
+                if [ "$listed" = false ]; then
+                    jq -n -c --arg message "Failed to list $kind: $(tail -n 1 "$tmp/$kind.err")" \
+                        '{kind: "error", message: $message}'
+                    return
+                fi
+                echo "Failed to list $kind, retrying: $(tail -n 1 "$tmp/$kind.err")" >&2
+                sleep 1
+                continue
+            fi
+            listed=true
+            while IFS='|' read -r version event; do
+                rv="$version"
+                echo "$event"
+            done <<< "$line"
+        fi
+
+        received=false
+        while IFS='|' read -r version event; do
+            received=true
+            case "$event" in
+                *'"type":"BOOKMARK"'*) rv="$version" ;;
+                *'"type":"ERROR"'*)
+                    # 410 Gone: the resourceVersion is too old, list again
+                    rv=""
+                    break
+                    ;;
+                *) rv="$version"; echo "$event" ;;
+            esac
+        done < <("$kubectl" get --raw \
+            "$path?labelSelector=$selector&watch=1&allowWatchBookmarks=true&timeoutSeconds=300&resourceVersion=$rv" \
+            | jq -r --unbuffered --arg kind "$kind" "$project" || true)
+        if [ "$received" = false ]; then
+            # Nothing came back (API server unreachable?), back off before resuming
+            sleep 1
+        fi
+    done
+}
+
+# Every component's phase derived from the objects seen so far; a progress
+# event is printed whenever it changes
+waiter='
+    def final:
+        .phase | IN("build-failed", "release-failed", "released", "timed-out", "error")
+            or (. == "snapshot-created" and ($wait_release | not));
+    def newest($items): $items | sort_by(.created) | last;
+    def derive($component):
+        . as $state
+        | newest([.objects.pipelineruns[] | select(.component == $component and .build and .created >= $since)]) as $pr
+        | if $pr == null then {phase: "waiting"}
+          else
+            newest([.objects.snapshots[] | select(.build_pipelinerun == $pr.name)]) as $snapshot
+            | newest([.objects.releases[] | select(.build_pipelinerun == $pr.name)]) as $release
+            | {pipelinerun: $pr.name}
+            + if $pr.succeeded.status == "False" then
+                {phase: "build-failed", message: ($pr.succeeded.message // $pr.succeeded.reason)}
+              elif $pr.succeeded.status != "True" then {phase: "building"}
+              elif $snapshot == null then {phase: "build-succeeded"}
+              else
+                {snapshot: $snapshot.name, image: $snapshot.image}
+                + if ($wait_release | not) or $release == null then {phase: "snapshot-created"}
+                  elif $release.released.status == "True" then {phase: "released", release: $release.name}
+                  elif $release.released.status == "False" and $release.released.reason != "Progressing" then
+                    {phase: "release-failed", release: $release.name,
+                     message: ($release.released.message // $release.released.reason)}
+                  else {phase: "releasing", release: $release.name}
+                  end
+              end
+          end
+        | {component: $component} + .
+        | if final then .
+          elif $state.error then {component, phase: "error", message: $state.error}
+          elif $state.timed_out then . + {phase: "timed-out", message: "still \(.phase) after \($timeout)"}
+          else .
+          end;
+
+    foreach inputs as $event (
+        {objects: {pipelineruns: {}, snapshots: {}, releases: {}}, phases: {}, emit: []};
+        if $event.kind == "timeout" then .timed_out = true
+        elif $event.kind == "error" then .error = $event.message
+        elif $event.type == "LISTED" then .
+        elif $event.type == "DELETED" then del(.objects[$event.kind][$event.name])
+        else .objects[$event.kind][$event.name] = $event
+        end
+        | . as $state
+        | .emit = [$components[] | . as $c | $state | derive($c) | select(. != $state.phases[$c])]
+        | reduce .emit[] as $status (.; .phases[$status.component] = $status);
+
+        (.emit[] | . + {time: (now | todate)}),
+        (if [.phases[$components[]] | select(. != null and final)] | length == ($components | length) then
+            {done: true, failed: [.phases[] | select(.phase | IN("snapshot-created", "released") | not)] | length}
+         else empty end)
+    )'
+
+api_ns="namespaces/$namespace"
+watch pipelineruns "/apis/tekton.dev/v1/$api_ns/pipelineruns" > "$tmp/events" &
+watch snapshots "/apis/appstudio.redhat.com/v1alpha1/$api_ns/snapshots" > "$tmp/events" &
+watch releases "/apis/appstudio.redhat.com/v1alpha1/$api_ns/releases" > "$tmp/events" &
+{ sleep "$timeout_seconds"; echo '{"kind":"timeout"}'; } > "$tmp/events" &
+
+status=1
+while read -r line; do
+    if [[ "$line" == '{"done":true'* ]]; then
+        if [ "$(jq .failed <<< "$line")" -eq 0 ]; then
+            status=0
+        fi
+        break
+    fi
+    echo "$line"
+done < <(jq -n -c --unbuffered \
+    --argjson components "$components_json" \
+    --arg since "$since" \
+    --arg timeout "$timeout" \
+    --argjson wait_release "$wait_release" \
+    "$waiter" < "$tmp/events")
+
+exit $status
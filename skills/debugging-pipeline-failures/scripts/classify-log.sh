@@ -0,0 +1,267 @@
+#!/bin/bash
+# classify-log.sh - Find the root cause of a failed step in its log, in one pass
+#
+# Usage: classify-log.sh [-C lines] [--signatures file] [--json] [log-file]
+#        kubectl logs <pod> -c step-<name> | classify-log.sh [options]
+#
+# Arguments:
+#   log-file - Step log to classify (default: standard input)
+#
+# Options:
+#   -C lines          - Context lines kept before and after each match (default: 3)
+#   --signatures file - Failure signature catalogue (default: log-signatures.tsv
+#                       next to this script)
+#   --json            - Print the report as JSON instead of Markdown
+#
+# Examples:
+#   # Why did the build step fail?
+#   kubectl logs <pod> -c step-build -n <namespace> | classify-log.sh
+#
+#   # Root cause of a saved log, as JSON
+#   classify-log.sh --json build.log | jq '.root_cause | {id, line, text}'
+#
+# Reads the log once, as a stream, and matches every line against the
+# catalogue of Konflux/Tekton failure signatures (OOM, registry auth, missing
+# images, network, dependency resolution, compiler and test errors, ... and
+# the symptoms they end in: non-zero exits, timeouts). grep tests each line
+# against all signatures combined; only matching lines and their context
+# reach the classifier, which attributes each match to its first signature.
+# Memory stays bounded whatever the log size: only the context lines around
+# the current line are buffered, plus the first match of each signature.
+#
+# The root cause is the earliest match of a "cause" signature; exit codes,
+# timeouts and generic errors are reported as symptoms, since they usually
+# follow the cause. Matches carry their 1-based line number and the byte
+# offset of the line's start (e.g. for `tail -c +OFFSET+1`).
+#
+# JSON output:
+#   {"lines", "bytes", "root_cause": match|null, "causes": [match...],
+#    "symptoms": [match...]}
+#   match: {"id", "kind", "hint", "count", "line", "offset", "last_line",
+#           "text", "before": [...], "after": [...]}
+
+set -euo pipefail
+
+context=3
+signatures="$(dirname "$0")/log-signatures.tsv"
+output=markdown
+while [ "$#" -gt 0 ] && [[ "$1" == -?* ]]; do
+    case "$1" in
+        -C) context="$2"; shift ;;
+        --signatures) signatures="$2"; shift ;;
+        --json) output=json ;;
+        *) echo "Unknown option: $1" >&2; exit 1 ;;
+    esac
+    shift
+done
+
+if ! [[ "$context" =~ ^[0-9]+$ ]]; then
+    echo "Invalid context '$context', expected a number of lines" >&2
+    exit 1
+fi
+if [ ! -r "$signatures" ]; then
+    echo "Cannot read signature catalogue: $signatures" >&2
+    exit 1
+fi
+
+input="${1:-/dev/stdin}"
+if [ "$input" = "-" ]; then
+    input=/dev/stdin
+elif [ ! -r "$input" ]; then
+    echo "Cannot read log: $input" >&2
+    exit 1
+fi
+
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+
+# Combined alternation of all signatures, for the one pass over the log
+any=$(awk -F '\t' '!/^#/ && NF >= 3 { printf "%s%s", (n++ ? "|" : ""), $3 }' "$signatures")
+if [ -z "$any" ]; then
+    echo "$signatures: no signatures" >&2
+    exit 1
+fi
+
+# Attribute grep's matches ("LINE:OFFSET:text") to the first signature they
+# match, keeping the first match of each with its context lines
+# ("LINE-OFFSET-text"). LC_ALL=C makes offsets count bytes and keeps invalid
+# UTF-8 in logs from tripping the regex engines.
+classify='
+    function json(s,    out, i, c, n) {
+        if (s !~ /[\\"[:cntrl:]]/) {
+            return "\"" s "\""
+        }
+        out = ""
+        n = length(s)
+        for (i = 1; i <= n; i++) {
+            c = substr(s, i, 1)
+            if (c == "\\") out = out "\\\\"
+            else if (c == "\"") out = out "\\\""
+            else if (c in escape) out = out escape[c]
+            else out = out c
+        }
+        return "\"" out "\""
+    }
+
+    BEGIN {
+        for (i = 1; i < 32; i++) {
+            escape[sprintf("%c", i)] = sprintf("\\u%04x", i)
+        }
+        escape["\t"] = "\\t"
+        escape["\r"] = "\\r"
+
+        n = 0
+        while ((getline row < signatures) > 0) {
+            if (row !~ /^#/ && split(row, field, "\t") >= 3) {
+                n++
+                id[n] = field[1]
+                kind[n] = field[2]
+                pattern[n] = field[3]
+                hint[n] = field[4]
+            }
+        }
+        close(signatures)
+        pending = 0
+    }
+
+    /^--$/ {
+        next
+    }
+
+    {
+        # LINE, OFFSET and text of the line, split on the first two
+        # separators (":" for matches, "-" for context)
+        match($0, /^[0-9]+/)
+        number = substr($0, 1, RLENGTH) + 0
+        separator = substr($0, RLENGTH + 1, 1)
+        rest = substr($0, RLENGTH + 2)
+        match(rest, /^[0-9]+/)
+        offset = substr(rest, 1, RLENGTH)
+        text = substr(rest, RLENGTH + 2)
+        shown = substr(text, 1, width)
+
+        # After-context of earlier matches
+        if (pending > 0) {
+            for (i in until) {
+                if (number > until[i]) {
+                    delete until[i]
+                    pending--
+                    continue
+                }
+                after[i] = after[i] (after[i] == "" ? "" : ",") json(shown)
+                if (number == until[i]) {
+                    delete until[i]
+                    pending--
+                }
+            }
+        }
+
+        if (separator == ":") {
+            for (i = 1; i <= n; i++) {
+                if (text ~ pattern[i]) {
+                    break
+                }
+            }
+            if (i <= n && count[i]++ == 0) {
+                line[i] = number
+                start[i] = offset
+                matched[i] = json(shown)
+                before[i] = ""
+                for (j = (number > lines ? number - lines : 1); j < number; j++) {
+                    if ((j % lines) in ring && ring_line[j % lines] == j) {
+                        before[i] = before[i] (before[i] == "" ? "" : ",") json(ring[j % lines])
+                    }
+                }
+                if (lines > 0) {
+                    until[i] = number + lines
+                    pending++
+                }
+            }
+            if (i <= n) {
+                last[i] = number
+            }
+        }
+
+        if (lines > 0) {
+            ring[number % lines] = shown
+            ring_line[number % lines] = number
+        }
+    }
+
+    END {
+        printf "{\"matches\":["
+        sep = ""
+        for (i = 1; i <= n; i++) {
+            if (count[i] == 0) {
+                continue
+            }
+            printf "%s{\"id\":%s,\"kind\":%s,\"hint\":%s,\"count\":%d,\"line\":%d,\"offset\":%s,\"last_line\":%d,\"text\":%s,\"before\":[%s],\"after\":[%s]}", \
+                sep, json(id[i]), json(kind[i]), json(hint[i]), count[i], line[i], start[i], last[i], \
+                matched[i], before[i], after[i]
+            sep = ","
+        }
+        print "]}"
+    }'
+
+# One read of the log: tee feeds the line and byte count and grep, which
+# passes on only matching lines and their context
+mkfifo "$tmp/count"
+wc -l -c < "$tmp/count" > "$tmp/size" &
+counter=$!
+tee "$tmp/count" < "$input" \
+    | { LC_ALL=C grep -a -n -b -E -B "$context" -A "$context" -e "$any" || [ "$?" -eq 1 ]; } \
+    | LC_ALL=C awk -v signatures="$signatures" -v lines="$context" -v width=500 "$classify" > "$tmp/matches.json"
+wait "$counter"
+read -r total_lines total_bytes < "$tmp/size"
+
+report='
+    (.matches | sort_by(.line)) as $matches
+    | ($matches | map(select(.kind == "cause"))) as $causes
+    | {
+        lines: $lines,
+        bytes: $bytes,
+        root_cause: $causes[0],
+        causes: $causes[1:],
+        symptoms: ($matches | map(select(.kind != "cause")))
+    }'
+
+render='
+    def where: "line \(.line), byte \(.offset)\(if .count > 1 then ", \(.count) matches, last on line \(.last_line)" else "" end)";
+    def excerpt: "```", (.before[] | "  " + .), "> " + .text, (.after[] | "  " + .), "```";
+    "# Log classification: \(.lines) lines, \(.bytes) bytes",
+    "",
+    if .root_cause then
+        (.root_cause
+         | "## Root cause: \(.id) (\(where))",
+           "",
+           .hint,
+           "",
+           excerpt)
+    else
+        "## Root cause: not found",
+        "",
+        "No known failure signature matched\(if .symptoms != [] then "; read the log before the first symptom below" else "" end)."
+    end,
+    (if .causes != [] then
+        "", "## Other causes", "",
+        "| Signature | Line | Byte offset | Count | Text |",
+        "|-----------|------|-------------|-------|------|",
+        (.causes[] | "| \(.id) | \(.line) | \(.offset) | \(.count) | `\(.text | .[:120] | gsub("[|`]"; " "))` |")
+     else empty end),
+    (if .symptoms != [] then
+        "", "## Symptoms", "",
+        "| Signature | Line | Byte offset | Count | Text |",
+        "|-----------|------|-------------|-------|------|",
+        (.symptoms[] | "| \(.id) | \(.line) | \(.offset) | \(.count) | `\(.text | .[:120] | gsub("[|`]"; " "))` |")
+     else empty end),
+    (if .root_cause == null and .symptoms != [] then
+        "", (.symptoms[0] | "First symptom (\(where)):", "", excerpt)
+     else empty end)'
+
+if [ "$output" = json ]; then
+    filter="$report"
+else
+    filter="$report | $render"
+fi
+
+jq -r --argjson lines "$total_lines" --argjson bytes "$total_bytes" "$filter" "$tmp/matches.json"
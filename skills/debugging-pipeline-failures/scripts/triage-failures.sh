@@ -0,0 +1,256 @@
+#!/bin/bash
+# triage-failures.sh - Group the failed PipelineRuns of a namespace by failure reason
+#
+# Usage: triage-failures.sh [-n namespace] [--since window] [--tail lines] [-j N] [--json]
+#
+# Options:
+#   -n namespace   - Kubernetes namespace (default: the current context's)
+#   --since window - Only PipelineRuns that finished in this window: a duration
+#                    with suffix m, h or d, or a time such as 2025-11-13,
+#                    2025-11-13T10:00:00+01:00 or 2025-11-13T09:00:00Z
+#                    (anything GNU `date -d` reads; UTC times only where
+#                    date has no -d) (default: 24h)
+#   --tail lines   - Log lines to keep per failed step (default: 20)
+#   -j N           - Fetch up to N step logs at a time (default: 8)
+#   --json         - Print the report as JSON instead of Markdown
+#
+# Examples:
+#   # What broke in the tenant namespace today?
+#   triage-failures.sh -n rhtap-integration-tenant
+#
+#   # PipelineRuns that ran out of memory in the last week
+#   triage-failures.sh --since 7d --json | jq -r '.groups[] | select(.reason == "OOMKilled") | .runs[].pipelinerun'
+#
+# Lists PipelineRuns, TaskRuns, pods and Warning events once each (4 list
+# calls, run concurrently) and joins them in memory: TaskRuns by the
+# tekton.dev/pipelineRun label, pods by .status.podName, events by their
+# involved object. Each failed PipelineRun gets one reason, the most
+# specific signal found across its failed TaskRuns, pods and events:
+#
+#   OOMKilled, ImagePullBackOff, FailedMount, CreateContainerError,
+#   FailedScheduling, Evicted, Timeout, StepFailed (exit code N),
+#   Cancelled, or the PipelineRun's own condition reason
+#
+# Only the logs of failed steps are fetched (`kubectl logs --tail`),
+# concurrently. PipelineRuns whose pods are gone are still reported, without
+# log tails.
+#
+# Environment:
+#   KUBECTL - kubectl-compatible CLI to use (default: kubectl)
+#
+# Security: Read-only access to PipelineRuns, TaskRuns, pods, events and logs.
+
+set -euo pipefail
+
+kubectl="${KUBECTL:-kubectl}"
+namespace_args=()
+since=24h
+tail_lines=20
+jobs=8
+output=markdown
+
+usage() {
+    echo "Usage: $0 [-n namespace] [--since window] [--tail lines] [-j N] [--json]" >&2
+    exit 1
+}
+
+while [ "$#" -gt 0 ] && [[ "$1" == -* ]]; do
+    case "$1" in
+        -n|--since|--tail|-j)
+            if [ "$#" -lt 2 ]; then
+                usage
+            fi
+            case "$1" in
+                -n) namespace_args=(-n "$2") ;;
+                --since) since="$2" ;;
+                --tail) tail_lines="$2" ;;
+                -j) jobs="$2" ;;
+            esac
+            shift ;;
+        --json) output=json ;;
+        *) echo "Unknown option: $1" >&2; exit 1 ;;
+    esac
+    shift
+done
+
+if [ "$#" -gt 0 ]; then
+    usage
+fi
+if ! [[ "$tail_lines" =~ ^[0-9]+$ ]]; then
+    echo "Invalid --tail '$tail_lines', expected a number of lines (0 or more)" >&2
+    exit 1
+fi
+if ! [[ "$jobs" =~ ^[1-9][0-9]*$ ]]; then
+    echo "Invalid -j '$jobs', expected a positive number" >&2
+    exit 1
+fi
+
+case "$since" in
+    *[0-9]m) cutoff=$(jq -n -r --argjson s "${since%m}" 'now - $s * 60 | todate') ;;
+    *[0-9]h) cutoff=$(jq -n -r --argjson s "${since%h}" 'now - $s * 3600 | todate') ;;
+    *[0-9]d) cutoff=$(jq -n -r --argjson s "${since%d}" 'now - $s * 86400 | todate') ;;
+    *)
+        # Timestamps are compared as strings, so normalize to the UTC form Kubernetes uses
+        cutoff=$(date -u -d "$since" +%Y-%m-%dT%H:%M:%SZ 2>/dev/null) \
+            || cutoff=$(jq -n -r --arg t "$since" '$t | fromdate | todate' 2>/dev/null) \
+            || {
+                echo "Invalid window '$since', expected a duration (30m, 24h, 7d) or a time (2025-11-13T10:00:00Z)" >&2
+                exit 1
+            }
+        ;;
+esac
+
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+
+# One list call per kind, all four at once
+list() {
+    "$kubectl" get "$@" ${namespace_args[@]+"${namespace_args[@]}"} -o json
+}
+list pipelineruns > "$tmp/pipelineruns.json" &
+pids=($!)
+list taskruns -l tekton.dev/pipelineRun > "$tmp/taskruns.json" &
+pids+=($!)
+list pods -l tekton.dev/taskRun > "$tmp/pods.json" &
+pids+=($!)
+list events --field-selector type=Warning > "$tmp/events.json" &
+pids+=($!)
+for pid in "${pids[@]}"; do
+    if ! wait "$pid"; then
+        echo "Failed to list pipeline resources" >&2
+        exit 1
+    fi
+done
+
+# Join and classify; every failed step is listed with its pod and container
+triage='
+    def condition: (.status.conditions // [] | map(select(.type == "Succeeded")) | .[0]) // {};
+    def failed: condition.status == "False";
+    def index_by(f): reduce .[] as $item ({}; .[$item | f // ""] += [$item]);
+    def reasons: ["OOMKilled", "ImagePullBackOff", "FailedMount", "CreateContainerError",
+                  "FailedScheduling", "Evicted", "Timeout", "StepFailed", "Cancelled"];
+    def rank: (.reason | split(" ")[0]) as $r | (reasons | index($r)) // (reasons | length);
+
+    # Signals of one TaskRun, its pod and their events, most specific first
+    def classify($pod; $events):
+        . as $tr
+        | ([$tr | condition | .reason // empty]
+           + [$pod.status.reason // empty]
+           + [$pod.status.containerStatuses[]?
+              | (.state.waiting.reason, .state.terminated.reason, .lastState.terminated.reason) // empty]
+           + [$tr.status.steps[]? | .terminated.reason // empty]
+           + [$events[] | .reason, .message | strings]) as $signals
+        | ($signals | join("\n")) as $text
+        | ([$tr.status.steps[]? | select((.terminated.exitCode // 0) != 0)] | first) as $step
+        | if $text | test("OOMKilled|OOMKilling") then {reason: "OOMKilled"}
+          elif $text | test("ImagePullBackOff|ErrImagePull|TaskRunImagePullFailed|Back-off pulling image") then
+            {reason: "ImagePullBackOff"}
+          elif $text | test("FailedMount|FailedAttachVolume") then {reason: "FailedMount"}
+          elif $text | test("CreateContainerConfigError|CreateContainerError") then {reason: "CreateContainerError"}
+          elif $text | test("FailedScheduling|ExceededResourceQuota|ExceededNodeResources|exceeded quota") then
+            {reason: "FailedScheduling"}
+          elif $text | test("Evicted") then {reason: "Evicted"}
+          elif $text | test("TaskRunTimeout") then {reason: "Timeout"}
+          elif $step != null then {reason: "StepFailed (exit code \($step.terminated.exitCode))"}
+          elif $text | test("TaskRunCancelled") then {reason: "Cancelled"}
+          else {reason: ($tr | condition | .reason // "Unknown")}
+          end
+        + {message: ($tr | condition | .message)};
+
+    ($taskruns[0].items | index_by(.metadata.labels["tekton.dev/pipelineRun"])) as $taskruns_by_pr
+    | ($pods[0].items | map({(.metadata.name): .}) | add // {}) as $pods_by_name
+    | ($events[0].items | index_by("\(.involvedObject.kind)/\(.involvedObject.name)")) as $events_by_object
+    | [
+        $pipelineruns[0].items[]
+        | select(failed and ((.status.completionTime // .metadata.creationTimestamp) >= $cutoff))
+        | . as $pr
+        | [
+            ($taskruns_by_pr[$pr.metadata.name] // [])[] | select(failed)
+            | $pods_by_name[.status.podName // ""] as $pod
+            | (($events_by_object["Pod/\(.status.podName)"] // []) + ($events_by_object["TaskRun/\(.metadata.name)"] // [])) as $events
+            | classify($pod; $events)
+              + {
+                taskrun: .metadata.name,
+                task: .metadata.labels["tekton.dev/pipelineTask"],
+                pod: (if $pod == null then null else .status.podName end),
+                steps: [.status.steps[]? | select((.terminated.exitCode // 0) != 0)
+                        | {name, container: (.container // "step-\(.name)"), exit_code: .terminated.exitCode}]
+              }
+          ] as $failed
+        | ($pr | condition) as $condition
+        | ($failed | sort_by(rank) | first) as $cause
+        | {
+            pipelinerun: $pr.metadata.name,
+            component: $pr.metadata.labels["appstudio.openshift.io/component"],
+            finished: ($pr.status.completionTime // $pr.metadata.creationTimestamp),
+            reason: (
+                if ($cause == null or $cause.reason == "Cancelled") and $condition.reason == "PipelineRunTimeout" then "Timeout"
+                elif $cause != null then $cause.reason
+                else $condition.reason // "Unknown"
+                end),
+            message: $condition.message,
+            taskruns: $failed
+        }
+    ]'
+
+jq -n -c --arg cutoff "$cutoff" \
+    --slurpfile pipelineruns "$tmp/pipelineruns.json" \
+    --slurpfile taskruns "$tmp/taskruns.json" \
+    --slurpfile pods "$tmp/pods.json" \
+    --slurpfile events "$tmp/events.json" \
+    "$triage" > "$tmp/runs.json"
+
+# Log tails of the failed steps whose pods still exist, concurrently
+fetch_tail() {
+    local n="$1" pod="$2" container="$3"
+    shift 3
+    "$kubectl" logs "$pod" -c "$container" --tail "$tail_lines" "$@" > "$tmp/logs/$n.log" 2>&1 \
+        || echo "(logs unavailable)" >> "$tmp/logs/$n.log"
+    jq -R -s -c --arg pod "$pod" --arg container "$container" \
+        '{pod: $pod, container: $container, tail: (rtrimstr("\n") | split("\n"))}' \
+        "$tmp/logs/$n.log" > "$tmp/logs/$n.json"
+}
+export -f fetch_tail
+export kubectl tmp tail_lines
+mkdir -p "$tmp/logs"
+jq -r '.[].taskruns[] | select(.pod != null) | .pod as $pod | .steps[] | "\($pod) \(.container)"' "$tmp/runs.json" \
+    | awk '{ print NR, $0 }' \
+    | xargs -r -L 1 -P "$jobs" bash -c 'fetch_tail "$@" '"${namespace_args[*]:-}" _
+cat /dev/null "$tmp"/logs/*.json 2>/dev/null | jq -s -c . > "$tmp/tails.json"
+
+report='
+    ($tails[0] | map({("\(.pod)/\(.container)"): .tail}) | add // {}) as $tails
+    | map(.taskruns |= map(.pod as $pod | .steps |= map(. + {log_tail: $tails["\($pod)/\(.container)"]})))
+    | {
+        namespace: $namespace,
+        since: $cutoff,
+        failed: length,
+        groups: (group_by(.reason) | map({reason: .[0].reason, count: length, runs: .})
+                 | sort_by(-.count, .reason))
+    }'
+
+render='
+    "# Failed PipelineRuns since \(.since)\(if .namespace != "" then " in \(.namespace)" else "" end): \(.failed)",
+    "",
+    "| Reason | Count | PipelineRuns |",
+    "|--------|-------|--------------|",
+    (.groups[] | "| \(.reason) | \(.count) | \([.runs[].pipelinerun] | join(", ")) |"),
+    (.groups[]
+     | "",
+       "## \(.reason) (\(.count))",
+       (.runs[]
+        | "",
+          "- **\(.pipelinerun)**\(if .component then " (\(.component))" else "" end), finished \(.finished): \(.message // "")",
+          (.taskruns[]
+           | "  - TaskRun \(.taskrun)\(if .task then " (task \(.task))" else "" end): \(.reason)\(if .pod == null then ", pod gone" else "" end)",
+             (.steps[]
+              | "    - step \(.name), exit code \(.exit_code)",
+                (.log_tail // [] | if length > 0 then "      ```", (.[] | "      " + .), "      ```" else empty end)))))'
+
+if [ "$output" = json ]; then
+    filter="$report"
+else
+    filter="$report | $render"
+fi
+jq -r --arg namespace "${namespace_args[1]:-}" --arg cutoff "$cutoff" --slurpfile tails "$tmp/tails.json" \
+    "$filter" "$tmp/runs.json"
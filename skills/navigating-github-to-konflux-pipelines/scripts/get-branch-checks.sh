@@ -1,7 +1,7 @@
 #!/bin/bash
 # get-branch-checks.sh - Get GitHub check runs for a branch/commit
 #
-# Usage: get-branch-checks.sh <owner> <repo> <ref> [jq-filter]
+# Usage: get-branch-checks.sh [--konflux] [--no-cache] <owner> <repo> <ref> [jq-filter]
 #
 # Arguments:
 #   owner      - Repository owner (e.g., "konflux-ci")
@@ -9,26 +9,47 @@
 #   ref        - Branch name or commit SHA (e.g., "main", "abc123")
 #   jq-filter  - Optional jq filter to apply (e.g., '.check_runs[]')
 #
+# Options:
+#   --konflux  - Keep only Konflux checks (name or details URL contains
+#                "konflux", case-insensitive) before applying jq-filter
+#   --no-cache - Do not use or update the local response cache
+#
 # Examples:
 #   # Get all check runs for main branch
 #   get-branch-checks.sh konflux-ci yq-container main
 #
-#   # Filter for Konflux checks only
-#   get-branch-checks.sh konflux-ci yq-container main '.check_runs[] | select(.name | ascii_downcase | contains("konflux"))'
+#   # Konflux checks only, as name/conclusion/url
+#   get-branch-checks.sh --konflux konflux-ci yq-container main '.check_runs[] | {name, conclusion, url: .details_url}'
 #
 # This script uses the read-only GitHub API endpoint:
 #   GET /repos/{owner}/{repo}/commits/{ref}/check-runs
 #
+# All pages are fetched (per_page=100, following the Link header) and merged
+# into one {"total_count", "check_runs"} object. Responses are cached with
+# their ETags and revalidated with conditional requests; see
+# lib/github-api.sh for the cache and the environment variables it reads.
+#
 # Security: Read-only access to public check run information.
 
 set -euo pipefail
 
+konflux_only=false
+use_cache=true
+while [ "$#" -gt 0 ] && [[ "$1" == --* ]]; do
+    case "$1" in
+        --konflux) konflux_only=true ;;
+        --no-cache) use_cache=false ;;
+        *) echo "Unknown option: $1" >&2; exit 1 ;;
+    esac
+    shift
+done
+
 if [ "$#" -lt 3 ]; then
-    echo "Usage: $0 <owner> <repo> <ref> [jq-filter]" >&2
+    echo "Usage: $0 [--konflux] [--no-cache] <owner> <repo> <ref> [jq-filter]" >&2
     echo "" >&2
     echo "Examples:" >&2
     echo "  $0 konflux-ci yq-container main" >&2
-    echo "  $0 konflux-ci yq-container main '.check_runs[] | select(.name | contains(\"konflux\"))'" >&2
+    echo "  $0 --konflux konflux-ci yq-container main '.check_runs[] | {name, conclusion}'" >&2
     exit 1
 fi
 
@@ -37,12 +58,34 @@ repo="$2"
 ref="$3"
 jq_filter="${4:-}"
 
-# Construct API endpoint
-endpoint="repos/$owner/$repo/commits/$ref/check-runs"
+# shellcheck source=lib/github-api.sh
+source "$(dirname "$0")/lib/github-api.sh"
+if [ "$use_cache" = false ]; then
+    gh_use_cache=false
+fi
+
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+
+echo "checks $gh_api_url/repos/$owner/$repo/commits/$ref/check-runs?per_page=100" \
+    | fetch_pages "$tmp" true
+if [ -s "$tmp/failed" ]; then
+    exit 1
+fi
+
+pages=()
+while read -r page; do
+    pages+=("$page")
+done < <(pages_of "$tmp" checks)
+
+# Merge all pages, filter and apply the user's filter in one jq pass
+filter="$CHECK_RUNS_MERGE"
+if [ "$konflux_only" = true ]; then
+    filter+=" | $KONFLUX_CHECKS"
+fi
 
-# Call gh api with optional jq filter
 if [ -n "$jq_filter" ]; then
-    gh api "$endpoint" --jq "$jq_filter"
+    jq -r -s "$filter | $jq_filter" "${pages[@]}"
 else
-    gh api "$endpoint"
+    jq -s "$filter" "${pages[@]}"
 fi
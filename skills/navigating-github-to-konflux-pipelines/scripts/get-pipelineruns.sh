@@ -0,0 +1,167 @@
+#!/bin/bash
+# get-pipelineruns.sh - Index Konflux PipelineRuns of many branches/PRs at once
+#
+# Usage: get-pipelineruns.sh [-j N] [--no-cache] <target>...
+#        get-pipelineruns.sh [-j N] [--no-cache] < targets.txt
+#
+# Targets:
+#   owner/repo@ref  - Branch name or commit SHA (e.g., "konflux-ci/yq-container@main")
+#   owner/repo#N    - Pull request number (e.g., "konflux-ci/oras-container#249")
+#
+# Options:
+#   -j N        - Run up to N requests at a time (default: 8)
+#   --no-cache  - Do not use or update the local response cache
+#
+# Examples:
+#   # Morning triage sweep: all main branches and open PRs of interest
+#   get-pipelineruns.sh konflux-ci/yq-container@main konflux-ci/oras-container#249
+#
+#   # Only failed PipelineRuns, one per line
+#   get-pipelineruns.sh < components.txt \
+#     | jq -r 'to_entries[] | .key as $t | (.value.builds + .value.integration_tests)[]
+#              | select(.conclusion == "failure") | "\($t) \(.namespace)/\(.name)"'
+#
+# Prints one JSON object indexing each target to its Konflux PipelineRuns:
+#
+#   {"konflux-ci/yq-container@main": {
+#      "repo": "konflux-ci/yq-container", "ref": "main", "sha": "...",
+#      "builds": [{"check", "status", "conclusion", "url",
+#                  "cluster", "namespace", "name"}, ...],
+#      "integration_tests": [...]}}
+#
+# Build checks (*-on-pull-request, *-on-push) take the PipelineRun URL from
+# details_url; integration tests from details_url or their output text.
+# Targets that could not be fetched get {"error": "..."} and the script
+# exits 1.
+#
+# All check runs are fetched concurrently over shared connections (see
+# lib/github-api.sh), with pagination and conditional requests. It uses the
+# read-only GitHub API endpoints:
+#   GET /repos/{owner}/{repo}/pulls/{number}
+#   GET /repos/{owner}/{repo}/commits/{ref}/check-runs
+#
+# Security: Read-only access to public pull request and check run information.
+
+set -euo pipefail
+
+usage() {
+    echo "Usage: $0 [-j N] [--no-cache] <target>..." >&2
+    echo "       $0 [-j N] [--no-cache] < targets.txt" >&2
+    exit 1
+}
+
+jobs=8
+use_cache=true
+while [ "$#" -gt 0 ] && [[ "$1" == -* ]]; do
+    case "$1" in
+        -j)
+            # Positive integers only, curl --parallel-max would misread anything else
+            if [ "$#" -lt 2 ] || [[ ! "$2" =~ ^[1-9][0-9]*$ ]]; then
+                usage
+            fi
+            jobs="$2"; shift ;;
+        --no-cache) use_cache=false ;;
+        *) echo "Unknown option: $1" >&2; exit 1 ;;
+    esac
+    shift
+done
+
+# shellcheck source=lib/github-api.sh
+source "$(dirname "$0")/lib/github-api.sh"
+gh_jobs="$jobs"
+if [ "$use_cache" = false ]; then
+    gh_use_cache=false
+fi
+
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+
+if [ "$#" -gt 0 ]; then
+    printf '%s\n' "$@" > "$tmp/targets"
+else
+    grep -v -e '^[[:space:]]*$' -e '^[[:space:]]*#' > "$tmp/targets" || true
+fi
+
+# Parse targets into "index target repo ref pr" lines
+: > "$tmp/parsed"
+n=0
+while read -r target; do
+    n=$((n + 1))
+    if [[ "$target" =~ ^([^/@#]+/[^/@#]+)@(.+)$ ]]; then
+        echo "$n $target ${BASH_REMATCH[1]} ${BASH_REMATCH[2]} -" >> "$tmp/parsed"
+    elif [[ "$target" =~ ^([^/@#]+/[^/@#]+)#([0-9]+)$ ]]; then
+        echo "$n $target ${BASH_REMATCH[1]} - ${BASH_REMATCH[2]}" >> "$tmp/parsed"
+    else
+        echo "Invalid target '$target', expected owner/repo@ref or owner/repo#N" >&2
+        exit 1
+    fi
+done < "$tmp/targets"
+
+if [ ! -s "$tmp/parsed" ]; then
+    echo "Usage: $0 [-j N] [--no-cache] <owner/repo@ref | owner/repo#N>..." >&2
+    exit 1
+fi
+
+# Round 1: resolve pull requests to their head commit
+mkdir -p "$tmp/pulls"
+awk -v api="$gh_api_url" '$5 != "-" { print $1, api "/repos/" $3 "/pulls/" $5 }' "$tmp/parsed" \
+    | fetch_pages "$tmp/pulls" false
+
+# Round 2: check runs of every ref, all pages
+mkdir -p "$tmp/checks"
+: > "$tmp/shas"
+while read -r i target repo ref pr; do
+    if [ "$pr" != "-" ]; then
+        page=$(pages_of "$tmp/pulls" "$i")
+        if [ -z "$page" ]; then
+            continue
+        fi
+        ref=$(jq -r '.head.sha' "$page")
+        echo "$i $ref" >> "$tmp/shas"
+    fi
+    echo "$i $gh_api_url/repos/$repo/commits/$ref/check-runs?per_page=100"
+done < "$tmp/parsed" | fetch_pages "$tmp/checks" true
+
+# PipelineRun URL and its parts; Konflux UI URLs look like
+# https://{cluster}/ns/{namespace}/pipelinerun/{name} (or .../pipelineruns/{name})
+index='
+    def pipelinerun:
+        capture("(?<url>https://(?<cluster>[^/\"<>\\s]+)/ns/(?<namespace>[^/\"<>\\s]+)/(?:[^\"<>\\s]*/)?pipelineruns?/(?<name>[^/?#\"<>\\s]+))");
+    def entry:
+        {check: .name, status, conclusion}
+        + ([(.details_url // ""), (.output.text // "")] | map(select(test("/pipelineruns?/")))
+           | if length > 0 then (.[0] | pipelinerun) else {url: null, cluster: null, namespace: null, name: null} end);
+    '"$CHECK_RUNS_MERGE | $KONFLUX_CHECKS"'
+    | {
+        repo: $repo,
+        ref: $ref,
+        sha: (if $sha == "" then null else $sha end),
+        builds: [.check_runs[] | select(.name | test("-on-(pull-request|push)$")) | entry],
+        integration_tests: [.check_runs[] | select(.name | test("-on-(pull-request|push)$") | not) | entry]
+    }'
+
+status=0
+while read -r i target repo ref pr; do
+    sha=$(awk -v i="$i" '$1 == i { print $2 }' "$tmp/shas")
+    pages=()
+    if [ "$pr" = "-" ] || [ -n "$sha" ]; then
+        while read -r page; do
+            pages+=("$page")
+        done < <(pages_of "$tmp/checks" "$i")
+    fi
+
+    if [ "${#pages[@]}" -eq 0 ]; then
+        status=1
+        jq -n -c --arg target "$target" '{($target): {error: "request failed, see stderr"}}'
+        continue
+    fi
+    if [ "$pr" != "-" ]; then
+        ref="#$pr"
+    fi
+    jq -s -c --arg target "$target" --arg repo "$repo" --arg ref "$ref" --arg sha "$sha" \
+        "{(\$target): ($index)}" "${pages[@]}"
+done < "$tmp/parsed" > "$tmp/index"
+
+jq -s 'add' "$tmp/index"
+
+exit $status
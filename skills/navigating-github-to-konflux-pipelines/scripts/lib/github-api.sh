@@ -0,0 +1,184 @@
+# github-api.sh - Shared GitHub API fetching for the skill's scripts
+#
+# Source this file, then call fetch_pages. All requests of a round run in
+# one curl process (--parallel), which opens up to gh_jobs connections to
+# the API right away and reuses them for the remaining requests (HTTP/2
+# multiplexing where available), so fanning out over many repositories
+# does not pay a TLS handshake per request.
+#
+# Responses are cached per URL with their ETag, and later requests send
+# If-None-Match, so unchanged pages come back as 304 Not Modified (which
+# GitHub does not count against the rate limit). A cache entry is a single
+# file (ETag line, next page line, body) replaced atomically, so concurrent
+# runs never pair a body with another response's ETag.
+#
+# The token is only ever written to curl's stdin, never to the request
+# files in the work directory.
+#
+# Environment:
+#   GH_HOST                 - GitHub host, as for gh (default: github.com);
+#                             GitHub Enterprise Server is served at
+#                             https://HOST/api/v3
+#   GH_TOKEN / GITHUB_TOKEN - API token for github.com, and
+#   GH_ENTERPRISE_TOKEN / GITHUB_ENTERPRISE_TOKEN for other hosts
+#                             (default: `gh auth token --hostname HOST`)
+#   GITHUB_API_URL          - API base URL, overriding the one of GH_HOST
+#   GH_CHECKS_CACHE_DIR     - Response cache directory
+#                             (default: ~/.cache/konflux-gh-checks)
+
+gh_host="${GH_HOST:-github.com}"
+case "$gh_host" in
+    github.com)
+        gh_default_api_url="https://api.github.com"
+        gh_token="${GH_TOKEN:-${GITHUB_TOKEN:-}}"
+        ;;
+    *.ghe.com)
+        gh_default_api_url="https://api.$gh_host"
+        gh_token="${GH_ENTERPRISE_TOKEN:-${GITHUB_ENTERPRISE_TOKEN:-}}"
+        ;;
+    *)
+        gh_default_api_url="https://$gh_host/api/v3"
+        gh_token="${GH_ENTERPRISE_TOKEN:-${GITHUB_ENTERPRISE_TOKEN:-}}"
+        ;;
+esac
+gh_api_url="${GITHUB_API_URL:-$gh_default_api_url}"
+gh_cache_dir="${GH_CHECKS_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/konflux-gh-checks}"
+gh_use_cache=true
+gh_jobs=8
+if [ -z "$gh_token" ]; then
+    gh_token=$(gh auth token --hostname "$gh_host" 2>/dev/null || true)
+fi
+
+# Placeholder for the Authorization header in request files
+gh_auth_marker="# authorization"
+
+gh_cache_key() {
+    if command -v sha256sum >/dev/null; then
+        printf '%s' "$1" | sha256sum | cut -d' ' -f1
+    else
+        printf '%s' "$1" | shasum -a 256 | cut -d' ' -f1
+    fi
+}
+
+# Print a request file for curl -K, with the token filled in
+gh_curl_config() {
+    local line
+    while IFS= read -r line; do
+        if [ "$line" = "$gh_auth_marker" ]; then
+            printf 'header = "Authorization: Bearer %s"\n' "$gh_token"
+        else
+            printf '%s\n' "$line"
+        fi
+    done < "$1"
+}
+
+# fetch_pages WORK_DIR PAGINATE < requests
+#
+# Fetch every "ID URL" line of stdin. With PAGINATE=true, Link rel="next"
+# pages are fetched too, in further rounds. For each ID, WORK_DIR/ID.pages
+# lists the files (in WORK_DIR) holding its response bodies, in page order. IDs whose
+# requests failed are listed in WORK_DIR/failed, with the error on stderr.
+fetch_pages() {
+    local work="$1"
+    local paginate="$2"
+    local cache="$gh_cache_dir"
+    if [ "$gh_use_cache" != true ]; then
+        cache="$work/cache"
+    fi
+    mkdir -p "$cache"
+
+    cat > "$work/queue"
+    : > "$work/failed"
+    local round=0
+    while [ -s "$work/queue" ]; do
+        round=$((round + 1))
+        local dir="$work/round-$round"
+        mkdir -p "$dir"
+        : > "$dir/requests"
+
+        local n=0 id url key etag
+        while read -r id url; do
+            n=$((n + 1))
+            key="$cache/$(gh_cache_key "$url")"
+            echo "$n $id $key $url" >> "$dir/requests"
+            {
+                if [ "$n" -gt 1 ]; then
+                    echo "next"
+                fi
+                echo "url = \"$url\""
+                echo "output = \"$dir/$n.body\""
+                echo "dump-header = \"$dir/$n.headers\""
+                echo "write-out = \"$n %{http_code}\\n\""
+                echo "silent"
+                echo "show-error"
+                echo "header = \"Accept: application/vnd.github+json\""
+                echo "header = \"X-GitHub-Api-Version: 2022-11-28\""
+                if [ -n "$gh_token" ]; then
+                    echo "$gh_auth_marker"
+                fi
+                # Revalidate a snapshot of the entry, whatever other runs write meanwhile
+                if [ "$gh_use_cache" = true ] && cp "$key.entry" "$dir/$n.cached" 2>/dev/null; then
+                    etag=$(head -n 1 "$dir/$n.cached")
+                    if [ -n "$etag" ]; then
+                        echo "header = \"If-None-Match: ${etag//\"/\\\"}\""
+                    fi
+                fi
+            } >> "$dir/config"
+        done < "$work/queue"
+
+        # Transfers that fail to connect report status 000
+        gh_curl_config "$dir/config" \
+            | curl --parallel --parallel-immediate --parallel-max "$gh_jobs" -K - > "$dir/status" || true
+
+        : > "$work/queue"
+        local status
+        while read -r n id key url; do
+            status=$(awk -v n="$n" '$1 == n { print $2 }' "$dir/status")
+            case "$status" in
+                200)
+                    etag=$(tr -d '\r' < "$dir/$n.headers" | sed -n 's/^[Ee][Tt][Aa][Gg]: *//p' | head -n 1)
+                    tr -d '\r' < "$dir/$n.headers" | sed -n 's/^[Ll][Ii][Nn][Kk]: *//p' \
+                        | tr ',' '\n' | sed -n 's/.*<\(.*\)>; *rel="next".*/\1/p' | head -n 1 > "$dir/$n.next"
+                    {
+                        echo "$etag"
+                        echo "$(cat "$dir/$n.next")"
+                        cat "$dir/$n.body"
+                    } > "$key.entry.$$" && mv "$key.entry.$$" "$key.entry"
+                    ;;
+                304)
+                    sed -n '2{/./p;}' "$dir/$n.cached" > "$dir/$n.next"
+                    tail -n +3 "$dir/$n.cached" > "$dir/$n.body"
+                    ;;
+                *)
+                    echo "GitHub API request failed with HTTP ${status:-000}: $url" >&2
+                    if [ -f "$dir/$n.body" ]; then
+                        cat "$dir/$n.body" >&2
+                        echo "" >&2
+                    fi
+                    echo "$id" >> "$work/failed"
+                    continue
+                    ;;
+            esac
+            echo "$dir/$n.body" >> "$work/$id.pages"
+            if [ "$paginate" = true ] && [ -s "$dir/$n.next" ]; then
+                echo "$id $(cat "$dir/$n.next")" >> "$work/queue"
+            fi
+        done < "$dir/requests"
+    done
+}
+
+# Print the page files of ID, one per line (empty if its requests failed)
+pages_of() {
+    local work="$1"
+    local id="$2"
+    if ! grep -qx "$id" "$work/failed" && [ -f "$work/$id.pages" ]; then
+        cat "$work/$id.pages"
+    fi
+}
+
+# jq filter merging check-run pages into one {total_count, check_runs} object
+CHECK_RUNS_MERGE='{total_count: (.[0].total_count // 0), check_runs: (map(.check_runs) | add // [])}'
+
+# jq filter keeping only Konflux checks (name or details URL contains "konflux")
+KONFLUX_CHECKS='.check_runs |= map(select((.name // "") + " " + (.details_url // "") | ascii_downcase | contains("konflux")))
+    | .total_count = (.check_runs | length)'
@@ -2,11 +2,10 @@
 
 IMAGE=${1}
 
-expression='.payload | @base64d | fromjson | .predicate.buildConfig.tasks[0].invocation.environment.annotations | ."pipelinesascode.tekton.dev/repo-url" + "/-/commit/" + ."pipelinesascode.tekton.dev/sha"'
-output=$(cosign download attestation $IMAGE | jq -r "$expression")
+output=$("$(dirname "$0")/provenance.sh" "$IMAGE" | jq -r '.commit_link')
 
 if [[ "$output" == *github.com/* ]] ; then
-	echo "🐙 $output" | sed 's|/-/|/|'
+	echo "🐙 $output"
 else
 	echo "🦊 $output"
 fi
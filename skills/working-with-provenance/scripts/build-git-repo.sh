@@ -2,5 +2,4 @@
 
 IMAGE=${1}
 
-expression='.payload | @base64d | fromjson | .predicate.buildConfig.tasks[0].invocation.environment.annotations."pipelinesascode.tekton.dev/repo-url"'
-cosign download attestation $IMAGE | jq -r "$expression"
+"$(dirname "$0")/provenance.sh" "$IMAGE" | jq -r '.repo_url'
@@ -2,7 +2,4 @@
 
 IMAGE=${1}
 
-expression='.payload | @base64d | fromjson | .subject[0].name + ":" + .predicate.buildConfig.tasks[0].invocation.environment.annotations."pipelinesascode.tekton.dev/sha"'
-output=$(cosign download attestation $IMAGE | jq -r "$expression")
-
-echo $output
+"$(dirname "$0")/provenance.sh" "$IMAGE" | jq -r '.origin_pullspec'
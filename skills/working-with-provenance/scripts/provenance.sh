@@ -0,0 +1,188 @@
+#!/bin/bash -u
+#
+# Extract all provenance fields of a Konflux-built image in one pass.
+#
+# Usage: provenance.sh [--offline] IMAGE
+#        provenance.sh [--offline] --resolve IMAGE
+#        provenance.sh --attestation FILE [IMAGE]
+#
+# Downloads the image's attestation once (or reads a saved
+# `cosign download attestation` output from FILE), decodes the SLSA
+# provenance payload once and prints a single JSON object:
+#
+#   {"image", "subject", "digest", "repo_url", "sha", "log_url",
+#    "origin_pullspec", "commit_link"}
+#
+# The build-*.sh scripts are views over this output. --resolve only prints
+# the image's manifest digest. Set COSIGN to use a different cosign binary
+# (e.g. a stand-in for testing).
+#
+# Cache: the attestation of a manifest digest never changes, so decoded
+# provenance statements are cached on disk by repository and digest (every
+# repository has its own attestation, even for a shared digest). Tags are
+# resolved to a digest first (`cosign triangulate`, no attestation
+# download) and the last resolution of each tag is remembered. The least recently used
+# statements are evicted once the cache exceeds its size limit.
+#
+#   PROVENANCE_CACHE_DIR        cache directory
+#                               (default: ~/.cache/konflux-provenance)
+#   PROVENANCE_CACHE_MAX_KB     cache size limit in KiB (default: 51200)
+#   PROVENANCE_CACHE=0          bypass the cache
+#   PROVENANCE_OFFLINE=1        same as --offline: never contact the
+#                               registry, serve from the cache or fail
+
+set -o pipefail
+
+COSIGN=${COSIGN:-cosign}
+CACHE_DIR=${PROVENANCE_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/konflux-provenance}
+CACHE_MAX_KB=${PROVENANCE_CACHE_MAX_KB:-51200}
+USE_CACHE=${PROVENANCE_CACHE:-1}
+OFFLINE=${PROVENANCE_OFFLINE:-0}
+
+ATTESTATION_FILE=""
+RESOLVE_ONLY=0
+while [[ "${1:-}" == --* ]] ; do
+	case "$1" in
+		--attestation) ATTESTATION_FILE=${2}; shift 2 ;;
+		--offline) OFFLINE=1; shift ;;
+		--resolve) RESOLVE_ONLY=1; shift ;;
+		*) echo "Unknown option: $1" >&2; exit 2 ;;
+	esac
+done
+IMAGE=${1:-}
+
+if [[ -z "$ATTESTATION_FILE" && -z "$IMAGE" ]] ; then
+	echo "Usage: $0 [--offline] [--resolve] IMAGE | --attestation FILE [IMAGE]" >&2
+	exit 2
+fi
+
+# Decode every DSSE envelope (one per line) and keep the first SLSA provenance
+decode='
+	map(select(.payload) | .payload | @base64d | fromjson | select(.predicate.buildConfig != null))
+	| first
+	| if . == null then error("no build provenance in attestation") else . end'
+
+fields='
+	.predicate.buildConfig.tasks[0].invocation.environment.annotations as $annotations
+	| $annotations."pipelinesascode.tekton.dev/repo-url" as $repo
+	| $annotations."pipelinesascode.tekton.dev/sha" as $sha
+	| {
+		image: $image,
+		subject: .subject[0].name,
+		digest: (if $digest == "" then null else $digest end),
+		repo_url: $repo,
+		sha: $sha,
+		log_url: ($annotations."pipelinesascode.tekton.dev/log-url"
+			| if . then sub("console.redhat.com/application-pipeline"; "konflux-ui.apps.stone-prd-rh01.pg1f.p1.openshiftapps.com") else . end),
+		origin_pullspec: (.subject[0].name + ":" + $sha),
+		commit_link: (if $repo and $sha then
+			$repo + (if ($repo | test("github.com/")) then "/commit/" else "/-/commit/" end) + $sha
+		else null end)
+	}'
+
+# Repository part of a pullspec: drop "@digest" or a ":tag" in the last path component
+image_repo() {
+	local image=${1%@*}
+	local name=${image##*/}
+	if [[ "$name" == *:* ]] ; then
+		image=${image%:*}
+	fi
+	echo "$image"
+}
+
+# Resolve IMAGE to its manifest digest (sha256:...), using the tag map offline
+resolve_digest() {
+	if [[ "$IMAGE" == *@* ]] ; then
+		if [[ ! "${IMAGE##*@}" =~ ^sha256:[0-9a-f]{64}$ ]] ; then
+			echo "Unsupported digest in $IMAGE, expected @sha256:<64 hex digits>" >&2
+			return 1
+		fi
+		echo "${IMAGE##*@}"
+		return
+	fi
+
+	local tag_file="$CACHE_DIR/tags/${IMAGE//\//%}"
+	if [[ "$OFFLINE" == 1 ]] ; then
+		cat "$tag_file" 2>/dev/null || {
+			echo "Offline: tag $IMAGE was never resolved, use IMAGE@sha256:... or go online" >&2
+			return 1
+		}
+		return
+	fi
+
+	# The attestation's pullspec is <repo>:sha256-<hex>.att
+	local ref
+	ref=$($COSIGN triangulate --type attestation "$IMAGE") || return 1
+	local hex=${ref##*:sha256-}
+	hex=${hex%.att}
+	if [[ ! "$hex" =~ ^[0-9a-f]{64}$ ]] ; then
+		echo "Cannot resolve digest of $IMAGE from '$ref'" >&2
+		return 1
+	fi
+
+	if [[ "$USE_CACHE" == 1 ]] ; then
+		mkdir -p "$CACHE_DIR/tags"
+		echo "sha256:$hex" > "$tag_file.$$" && mv "$tag_file.$$" "$tag_file"
+	fi
+	echo "sha256:$hex"
+}
+
+# Print "<mtime> <KiB> <path>" for every cached statement
+cache_entries() {
+	find "$CACHE_DIR" -maxdepth 1 -name '*.json' -printf '%T@ %k %p\n' 2>/dev/null && return
+	# BSD find has no -printf, and BSD stat counts 512-byte blocks
+	local mtime blocks entry
+	find "$CACHE_DIR" -maxdepth 1 -name '*.json' -exec stat -f '%m %b %N' {} + |
+		while read -r mtime blocks entry ; do
+			echo "$mtime $(((blocks + 1) / 2)) $entry"
+		done
+}
+
+# Delete least recently used statements until the cache fits its size limit.
+# Only called after adding a statement, so hits never pay for it.
+evict() {
+	local used
+	used=$(du -sk "$CACHE_DIR" | cut -f1)
+	[[ "$used" -le "$CACHE_MAX_KB" ]] && return
+
+	local mtime size entry
+	# Oldest access (see the touch on every hit) first
+	while read -r mtime size entry ; do
+		rm -f "$entry"
+		used=$((used - size))
+		[[ "$used" -le "$CACHE_MAX_KB" ]] && break
+	done < <(cache_entries | sort -n)
+}
+
+if [[ "$RESOLVE_ONLY" == 1 ]] ; then
+	resolve_digest
+	exit
+fi
+
+digest=""
+if [[ -n "$ATTESTATION_FILE" ]] ; then
+	statement=$(jq -s -c "$decode" "$ATTESTATION_FILE") || exit 1
+elif [[ "$USE_CACHE" != 1 && "$OFFLINE" != 1 ]] ; then
+	statement=$($COSIGN download attestation "$IMAGE" | jq -s -c "$decode") || exit 1
+else
+	digest=$(resolve_digest) || exit 1
+	repo=$(image_repo "$IMAGE")
+	entry="$CACHE_DIR/${repo//\//%}@${digest/:/-}.json"
+
+	if [[ -f "$entry" ]] ; then
+		touch "$entry"
+		statement=$(cat "$entry")
+	elif [[ "$OFFLINE" == 1 ]] ; then
+		echo "Offline: no cached attestation for $IMAGE ($digest)" >&2
+		exit 1
+	else
+		statement=$($COSIGN download attestation "$repo@$digest" | jq -s -c "$decode") || exit 1
+		if [[ "$USE_CACHE" == 1 ]] ; then
+			mkdir -p "$CACHE_DIR"
+			echo "$statement" > "$entry.$$" && mv "$entry.$$" "$entry"
+			evict
+		fi
+	fi
+fi
+
+echo "$statement" | jq -c --arg image "$IMAGE" --arg digest "$digest" "$fields"
@@ -0,0 +1,121 @@
+#!/bin/bash -u
+#
+# Trace the provenance of many images concurrently.
+#
+# Usage: trace-images.sh [-j N] [--offline] IMAGE...
+#        trace-images.sh [-j N] [--offline] --snapshot FILE
+#        trace-images.sh [-j N] [--offline] < images.txt
+#
+# Prints one JSON object per image as soon as it is traced, so the output
+# is NDJSON in completion order. Objects carry the provenance.sh fields,
+# or {"image", "error"} when an image could not be traced. Tags are first
+# resolved to manifest digests, and the attestation of each repository's
+# digest is fetched and decoded once, however many pullspecs share it.
+#
+#   -j N           trace up to N images at a time (default: 8)
+#   --snapshot F   trace every .spec.components[].containerImage of a
+#                  Snapshot (or a list of Snapshots) in F, "-" for stdin
+#   --offline      serve from the provenance cache only (see provenance.sh)
+#
+# Exits 1 if any image could not be traced.
+
+set -o pipefail
+
+SCRIPTS=$(cd "$(dirname "$0")" && pwd)
+JOBS=8
+SNAPSHOT=""
+
+usage() {
+	echo "Usage: $0 [-j N] [--offline] IMAGE... | --snapshot FILE | < images.txt" >&2
+	exit 2
+}
+
+while [[ "${1:-}" == -* ]] ; do
+	case "$1" in
+		-j) [[ $# -ge 2 ]] || usage; JOBS=$2; shift 2 ;;
+		--snapshot) [[ $# -ge 2 ]] || usage; SNAPSHOT=$2; shift 2 ;;
+		--offline) export PROVENANCE_OFFLINE=1; shift ;;
+		*) usage ;;
+	esac
+done
+[[ "$JOBS" =~ ^[1-9][0-9]*$ ]] || usage
+
+if [[ -n "$SNAPSHOT" ]] ; then
+	expression='(.items // [.])[] | .spec.components[]?.containerImage // empty'
+	if [[ "$SNAPSHOT" == "-" ]] ; then
+		images=$(jq -r "$expression") || exit 1
+	else
+		images=$(jq -r "$expression" "$SNAPSHOT") || exit 1
+	fi
+elif [[ "$#" -gt 0 ]] ; then
+	images=$(printf '%s\n' "$@")
+else
+	images=$(grep -v -e '^[[:space:]]*$' -e '^[[:space:]]*#')
+fi
+# Identical pullspecs are traced once
+images=$(echo "$images" | awk 'NF && !seen[$1]++ { print $1 }')
+
+tmp=$(mktemp -d)
+trap 'rm -rf "$tmp"' EXIT
+export SCRIPTS tmp
+
+# Results and errors go straight to the real stdout (fd 3) from every job
+exec 3>&1
+
+emit_error() {
+	jq -n -c --arg image "$1" --arg error "$2" '{image: $image, error: $error}' >&3
+}
+
+# Print "DIGEST IMAGE" for a tagged image
+resolve_one() {
+	local err="$tmp/resolve.$$.err"
+	local digest
+	if digest=$("$SCRIPTS/provenance.sh" --resolve "$1" 2>"$err") ; then
+		echo "$digest $1"
+	else
+		emit_error "$1" "$(tail -n 1 "$err")"
+		return 1
+	fi
+}
+
+# Trace DIGEST once and print a result for every IMAGE (all of one
+# repository) sharing it
+trace_digest() {
+	local digest=$1
+	shift
+	local image=${1%@*}
+	local name=${image##*/}
+	if [[ "$name" == *:* ]] ; then
+		image=${image%:*}
+	fi
+
+	local err="$tmp/trace.$$.err"
+	local result
+	if result=$("$SCRIPTS/provenance.sh" "$image@$digest" 2>"$err") ; then
+		for image in "$@" ; do
+			echo "$result" | jq -c --arg image "$image" '.image = $image' >&3
+		done
+	else
+		for image in "$@" ; do
+			emit_error "$image" "$(tail -n 1 "$err")"
+		done
+		return 1
+	fi
+}
+export -f emit_error resolve_one trace_digest
+
+status=0
+
+# Digest pullspecs need no resolution; tags are resolved concurrently
+echo "$images" | sed -n 's/^.*@\(.*\)$/\1 &/p' > "$tmp/resolved"
+echo "$images" | { grep -v '@' || true; } \
+	| xargs -r -n 1 -P "$JOBS" bash -c 'resolve_one "$1"' _ >> "$tmp/resolved" || status=1
+
+# One job per repository@digest, listing the images that share it in input
+# order: each repository has its own attestation of a digest
+awk '{ repo = $2; sub(/@.*/, "", repo); sub(/:[^\/]*$/, "", repo); key = repo "@" $1 }
+	!(key in images) { order[n++] = key; digests[key] = $1 } { images[key] = images[key] " " $2 }
+	END { for (i = 0; i < n; i++) print digests[order[i]] images[order[i]] }' "$tmp/resolved" \
+	| xargs -r -L 1 -P "$JOBS" bash -c 'trace_digest "$@"' _ || status=1
+
+exit $status
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark classify-log.sh on a multi-gigabyte synthetic step log.
+
+Streams a build log of --size MB through a pipe into classify-log.sh, the
+way `kubectl logs ... | classify-log.sh` feeds it: compiler noise with the
+occasional warning, a network failure near the end and the exit status
+that follows it. Reports the throughput and the peak resident memory of
+the classifier's processes, which must stay flat as the log grows.
+Requires jq.
+
+Usage:
+  python test/benchmarks/bench_classify_log.py [--size MB] [--context N]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from test_skill_scripts import PIPELINE_DEBUGGING  # noqa: E402
+
+SCRIPT = PIPELINE_DEBUGGING / "scripts" / "classify-log.sh"
+
+FAILURE = (
+    b"[build] go: github.com/spf13/cobra@v1.8.0: Get \"https://proxy.golang.org/github.com/spf13/cobra/@v/v1.8.0.mod\": "
+    b"dial tcp: lookup proxy.golang.org: no such host\n"
+    b"[build] Error: building at STEP \"RUN go build ./...\": while running runtime: exit status 1\n"
+)
+
+
+def chunk() -> bytes:
+    lines = []
+    for n in range(4096):
+        if n % 1024 == 0:
+            lines.append(f"[build] WARNING: pkg/sub{n}/file.go:{n}: deprecated call, see docs")
+        else:
+            lines.append(f"[build] 2025-11-13T11:20:{n % 60:02d}Z compiling pkg/sub{n}/file{n}.go "
+                         f"for linux/amd64 with -trimpath -buildvcs=false ({n} of 4096)")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=2048, help="log size in MB")
+    parser.add_argument("--context", type=int, default=3, help="context lines per match")
+    args = parser.parse_args()
+
+    data = chunk()
+    repeats = max(1, args.size * 1024 * 1024 // len(data))
+    size = repeats * len(data) + len(FAILURE)
+
+    process = subprocess.Popen(
+        [str(SCRIPT), "--json", "-C", str(args.context)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+
+    def feed():
+        for _ in range(repeats):
+            process.stdin.write(data)
+        process.stdin.write(FAILURE)
+        process.stdin.close()
+
+    start = time.perf_counter()
+    writer = threading.Thread(target=feed)
+    writer.start()
+    stdout = process.stdout.read()
+    stderr = process.stderr.read()
+    process.wait()
+    writer.join()
+    elapsed = time.perf_counter() - start
+
+    assert process.returncode == 0, stderr.decode()
+    report = json.loads(stdout)
+    assert report["bytes"] == size
+    assert report["root_cause"]["id"] == "network"
+    assert report["root_cause"]["offset"] == repeats * len(data)
+    assert report["symptoms"][0]["id"] == "step-failed"
+
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"{size / 1024 ** 2:.0f} MB, {report['lines']} lines, {args.context} context lines")
+    print(f"classify-log.sh: {elapsed:6.2f} s  {size / 1024 ** 2 / elapsed:6.0f} MB/s  "
+          f"peak RSS {peak:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
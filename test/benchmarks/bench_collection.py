@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark collection start-up as the skill catalogue grows.
+
+Builds a synthetic catalogue of N skills, each with a copy of a real
+scenarios.yaml, and measures:
+- parsing every scenarios.yaml with PyYAML's pure-Python SafeLoader
+  (previous behaviour), with libyaml's CSafeLoader (index rebuilds) and
+  loading the compiled scenario index instead (warm collections)
+- `pytest --collect-only` of the skill tests with a cold and a warm
+  .pytest_cache, and with --skill selecting a single skill
+
+Usage:
+  python test/benchmarks/bench_collection.py [--skills N]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+TEST_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(TEST_DIR))
+
+from conftest import DigestCache, find_skills  # noqa: E402
+from scenarioindex import ScenarioIndex, parse_yaml  # noqa: E402
+
+TEMPLATE = TEST_DIR.parent / "skills" / "debugging-pipeline-failures" / "tests" / "scenarios.yaml"
+
+
+def build_tree(base: Path, num_skills: int):
+    shutil.copytree(TEST_DIR, base / "test", ignore=shutil.ignore_patterns("__pycache__", "benchmarks"))
+    template = TEMPLATE.read_text()
+    for i in range(num_skills):
+        name = f"skill-{i:04d}"
+        skill_dir = base / "skills" / name
+        (skill_dir / "tests" / "results").mkdir(parents=True)
+        (skill_dir / "SKILL.md").write_text(f"---\nname: {name}\n---\n\n# {name}\n")
+        (skill_dir / "tests" / "scenarios.yaml").write_text(template.replace("debugging-pipeline-failures", name))
+
+    # Age every file out of the digest cache's racy window
+    past = time.time_ns() - 60 * 1_000_000_000
+    for root, dirs, files in os.walk(base):
+        for name in files:
+            os.utime(Path(root) / name, ns=(past, past))
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def collect(base: Path, *options) -> float:
+    return timed(lambda: subprocess.run(
+        [sys.executable, "-m", "pytest", "test/test_skills.py", "--collect-only", "-q", *options],
+        cwd=base, check=True, stdout=subprocess.DEVNULL,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--skills", type=int, default=300, help="number of synthetic skills")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        build_tree(base, args.skills)
+        skills = find_skills(base / "skills")
+        files = [skill_dir / "tests" / "scenarios.yaml" for skill_dir in skills]
+
+        def pure_python():
+            for path in files:
+                with open(path) as f:
+                    yaml.load(f, Loader=yaml.SafeLoader)
+
+        def libyaml():
+            for path in files:
+                parse_yaml(path)
+
+        index_file = base / "index.json"
+        digest_file = base / "digests.json"
+        digests = DigestCache(digest_file)
+        index = ScenarioIndex(index_file, digests.file_digest)
+        rebuild = timed(lambda: [index.scenarios(skill_dir) for skill_dir in skills])
+        index.save()
+        digests.save()
+
+        def warm():
+            warm_index = ScenarioIndex(index_file, DigestCache(digest_file).file_digest)
+            for skill_dir in skills:
+                warm_index.scenarios(skill_dir)
+
+        print(f"{args.skills} skills, {sum(path.stat().st_size for path in files) / 1024:.0f} KiB of scenarios.yaml")
+        print(f"SafeLoader:     {timed(pure_python):7.3f} s")
+        print(f"CSafeLoader:    {timed(libyaml):7.3f} s  (libyaml: {yaml.__with_libyaml__})")
+        print(f"index rebuild:  {rebuild:7.3f} s")
+        print(f"index warm:     {timed(warm):7.3f} s")
+        print()
+        print(f"collect cold:   {collect(base):7.3f} s")
+        print(f"collect warm:   {collect(base):7.3f} s")
+        print(f"collect --skill:{collect(base, '--skill', 'skill-0007'):7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark skill digest computation during collection, cold vs warm cache.
+
+Builds a synthetic skills tree with hundreds of skills and times the digest
+pass that pytest_generate_tests performs in the controller and in every
+xdist worker:
+- uncached: no DigestCache, every file is read (previous behaviour)
+- cold:     empty on-disk cache, every file is read and the cache is written
+- warm:     cache loaded from disk, files are only stat()ed
+
+Usage:
+  python test/benchmarks/bench_digest_cache.py [--skills N] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from conftest import DigestCache, compute_skill_digest, find_skills  # noqa: E402
+
+
+def build_tree(base: Path, num_skills: int, file_kb: int):
+    """Create num_skills skills, each with a few non-test files and results."""
+    payload = ("x" * 1023 + "\n") * file_kb
+    for i in range(num_skills):
+        skill_dir = base / "skills" / f"skill-{i:04d}"
+        (skill_dir / "scripts").mkdir(parents=True)
+        (skill_dir / "tests" / "results").mkdir(parents=True)
+        (skill_dir / "SKILL.md").write_text(f"---\nname: skill-{i:04d}\n---\n{payload}")
+        (skill_dir / "README.md").write_text(payload)
+        for n in range(3):
+            (skill_dir / "scripts" / f"helper-{n}.sh").write_text(payload)
+        for n in range(1, 4):
+            (skill_dir / "tests" / "results" / f"scenario.{n}.txt").write_text(payload)
+
+    # Age every file out of the cache's racy window
+    past = time.time_ns() - 60 * 1_000_000_000
+    for root, dirs, files in os.walk(base):
+        for name in files:
+            os.utime(Path(root) / name, ns=(past, past))
+
+
+def collect(skills, cache_file):
+    """Run one collection's worth of digests, returning elapsed seconds."""
+    start = time.perf_counter()
+    cache = DigestCache(cache_file) if cache_file else None
+    for skill_dir in skills:
+        compute_skill_digest(skill_dir, cache)
+    if cache is not None:
+        cache.save()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--skills", type=int, default=300, help="number of synthetic skills")
+    parser.add_argument("--workers", type=int, default=8, help="xdist workers to simulate")
+    parser.add_argument("--file-kb", type=int, default=16, help="size of each skill file in KiB")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        build_tree(base, args.skills, args.file_kb)
+        skills = find_skills(base / "skills")
+        cache_file = base / "cache" / "digests.json"
+
+        # Controller plus one collection per worker
+        collections = args.workers + 1
+
+        uncached = sum(collect(skills, None) for _ in range(collections))
+        cold = collect(skills, cache_file)
+        cold += sum(collect(skills, cache_file) for _ in range(collections - 1))
+        warm = sum(collect(skills, cache_file) for _ in range(collections))
+
+    print(f"skills={len(skills)} files/skill=5 file_kb={args.file_kb} collections={collections}")
+    print(f"uncached: {uncached * 1000:8.1f} ms")
+    print(f"cold:     {cold * 1000:8.1f} ms  (first collection fills the cache)")
+    print(f"warm:     {warm * 1000:8.1f} ms  ({uncached / warm:.1f}x faster than uncached)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark expectation checking on large transcripts with many keywords.
+
+Compares the previous per-keyword scan (one `in` per keyword, OR
+alternative and does_not_contain entry, re-lowercasing every keyword per
+result) with CompiledExpectations, using the pyahocorasick automaton when
+installed and the str.find fallback otherwise.
+
+Usage:
+  python test/benchmarks/bench_expectations.py [--mb N] [--keywords N] [--samples N]
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import expectations  # noqa: E402
+from expectations import CompiledExpectations  # noqa: E402
+
+
+def legacy_check(content, expected):
+    """check_expectations as it was before expectations were compiled."""
+    failures = []
+    content_lower = content.lower()
+    for keyword in expected.get("contains_keywords", []):
+        if isinstance(keyword, list):
+            if not any(phrase.lower() in content_lower for phrase in keyword):
+                failures.append(keyword)
+        elif keyword.lower() not in content_lower:
+            failures.append(keyword)
+    for keyword in expected.get("does_not_contain", []):
+        if keyword.lower() in content_lower:
+            failures.append(keyword)
+    return failures
+
+
+def build_case(mb: int, num_keywords: int):
+    rng = random.Random(42)
+    vocabulary = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+                  for _ in range(20000)]
+    words = []
+    size = 0
+    while size < mb * 1024 * 1024:
+        word = rng.choice(vocabulary)
+        words.append(word.capitalize() if rng.random() < 0.1 else word)
+        size += len(word) + 1
+    content = " ".join(words)
+
+    present = rng.sample(vocabulary, num_keywords)
+    absent = [f"missing-{n}" for n in range(num_keywords // 4)]
+    contains = present[: num_keywords // 2]
+    contains += [[absent[n], present[num_keywords // 2 + n]] for n in range(len(absent))]
+    expected = {
+        "contains_keywords": contains,
+        "does_not_contain": absent + present[-num_keywords // 8:],
+    }
+    return content, expected
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=int, default=4, help="transcript size in MiB")
+    parser.add_argument("--keywords", type=int, default=400, help="number of keywords")
+    parser.add_argument("--samples", type=int, default=3, help="results checked per scenario")
+    args = parser.parse_args()
+
+    content, expected = build_case(args.mb, args.keywords)
+    print(f"transcript={len(content) / 2**20:.1f} MiB keywords={args.keywords} samples={args.samples}")
+
+    legacy = sum(timed(legacy_check, content, expected) for _ in range(args.samples))
+    print(f"per-keyword scan: {legacy * 1000:8.1f} ms")
+
+    backends = [("str.find", None)]
+    if expectations.ahocorasick is not None:
+        backends.insert(0, ("automaton", expectations.ahocorasick))
+    for name, module in backends:
+        expectations.ahocorasick = module
+        start = time.perf_counter()
+        compiled = CompiledExpectations(expected)
+        for _ in range(args.samples):
+            compiled.check(content)
+        elapsed = time.perf_counter() - start
+        print(f"compiled ({name}): {elapsed * 1000:7.1f} ms  ({legacy / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark worker HOME provisioning as the number of workers grows.
+
+Creates a fake real HOME with a gcloud config of the given size and
+materialises it into N worker homes, comparing plain copies with the
+template's default method (reflink or hardlink). Disk usage counts each
+inode once, so linked files are not double-counted. Set BENCH_TMPDIR to
+run on a specific filesystem (e.g. btrfs or XFS to exercise reflinks).
+
+Usage:
+  python test/benchmarks/bench_home_provisioning.py [--mb N] [--files N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from provisioning import HomeTemplate  # noqa: E402
+
+
+def build_source_home(base: Path, total_mb: int, num_files: int) -> Path:
+    home = base / "real-home"
+    gcloud = home / ".config" / "gcloud" / "logs"
+    gcloud.mkdir(parents=True)
+    chunk = os.urandom(total_mb * 1024 * 1024 // num_files)
+    for n in range(num_files):
+        (gcloud / f"log-{n:04d}.txt").write_bytes(chunk)
+    return home
+
+
+def disk_usage(path: Path) -> int:
+    """Bytes allocated under path, counting hardlinked inodes once."""
+    seen = set()
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            st = os.lstat(os.path.join(root, name))
+            if st.st_ino not in seen:
+                seen.add(st.st_ino)
+                total += st.st_blocks * 512
+    return total
+
+
+def provision(base: Path, source_home: Path, workers: int, method: str):
+    run_dir = Path(tempfile.mkdtemp(dir=base))
+    start = time.perf_counter()
+    template = HomeTemplate(run_dir / "template", source_home, method=method)
+    for n in range(workers):
+        template.materialize(".config/gcloud", run_dir / f"worker_gw{n}")
+    elapsed = time.perf_counter() - start
+    return elapsed, disk_usage(run_dir), template.method
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=int, default=64, help="size of the fake gcloud config in MiB")
+    parser.add_argument("--files", type=int, default=200, help="number of files in it")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=os.environ.get("BENCH_TMPDIR")) as tmp:
+        base = Path(tmp)
+        source_home = build_source_home(base, args.mb, args.files)
+
+        print(f"gcloud config: {args.mb} MiB in {args.files} files")
+        print(f"{'workers':>7}  {'copy ms':>9} {'copy MiB':>9}  {'auto ms':>9} {'auto MiB':>9}  method")
+        for workers in (1, 4, 8, 16, 32):
+            copy_time, copy_usage, _ = provision(base, source_home, workers, "copy")
+            auto_time, auto_usage, method = provision(base, source_home, workers, "auto")
+            print(
+                f"{workers:>7}  {copy_time * 1000:>9.1f} {copy_usage / 2**20:>9.1f}"
+                f"  {auto_time * 1000:>9.1f} {auto_usage / 2**20:>9.1f}  {method}"
+            )
+
+
+if __name__ == "__main__":
+    main()
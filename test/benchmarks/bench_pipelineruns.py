@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the multi-repository PipelineRun index against a slow fake GitHub.
+
+Indexes the Konflux checks of many repositories, each with more than one
+page of check runs, and compares:
+- serial: one get-branch-checks.sh --konflux call per repository (the
+  cost of looping over the per-branch script)
+- get-pipelineruns.sh: all targets in one call, every round of requests
+  sharing one curl process
+
+Every fake API request sleeps --latency seconds to stand in for the
+GitHub round-trip. Both runs start from an empty response cache.
+Requires jq and curl.
+
+Usage:
+  python test/benchmarks/bench_pipelineruns.py [--repos N] [--latency S] [-j N]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from test_skill_scripts import GITHUB_NAVIGATION, FakeGitHub, check_run  # noqa: E402
+
+SCRIPTS = GITHUB_NAVIGATION / "scripts"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repos", type=int, default=24, help="number of repositories")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per API request")
+    parser.add_argument("-j", type=int, default=8, help="get-pipelineruns.sh concurrency")
+    args = parser.parse_args()
+
+    github = FakeGitHub(latency=args.latency)
+    targets = []
+    for n in range(args.repos):
+        runs = [check_run(f"ci/prow/job-{m}") for m in range(100)]
+        runs.append(check_run(f"Red Hat Konflux / c{n}-on-push", f"https://konflux.example/ns/t/pipelinerun/c{n}-1"))
+        github.check_runs["bench", f"c{n}", "main"] = runs
+        targets.append(f"bench/c{n}@main")
+
+    with tempfile.TemporaryDirectory(dir=os.environ.get("BENCH_TMPDIR")) as tmp:
+        env = {**os.environ, "GITHUB_API_URL": github.url, "GH_TOKEN": "bench"}
+
+        start = time.perf_counter()
+        for n in range(args.repos):
+            subprocess.run(
+                [str(SCRIPTS / "get-branch-checks.sh"), "--konflux", "bench", f"c{n}", "main"],
+                env={**env, "GH_CHECKS_CACHE_DIR": f"{tmp}/serial"}, check=True, capture_output=True,
+            )
+        serial = time.perf_counter() - start
+        serial_requests = len(github.requests)
+        github.requests.clear()
+
+        start = time.perf_counter()
+        result = subprocess.run(
+            [str(SCRIPTS / "get-pipelineruns.sh"), "-j", str(args.j), *targets],
+            env={**env, "GH_CHECKS_CACHE_DIR": f"{tmp}/fanout"}, check=True, capture_output=True, text=True,
+        )
+        fanout = time.perf_counter() - start
+        fanout_requests = len(github.requests)
+
+    github.close()
+    assert len(json.loads(result.stdout)) == args.repos
+    print(f"{args.repos} repositories, 2 pages of check runs each, "
+          f"{args.latency * 1000:.0f} ms per API request")
+    print(f"serial get-branch-checks.sh: {serial:6.2f} s  {serial_requests:4d} requests")
+    print(f"get-pipelineruns.sh -j {args.j}:  {fanout:6.2f} s  {fanout_requests:4d} requests")
+    print(f"speedup: {serial / fanout:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
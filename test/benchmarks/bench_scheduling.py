@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark `make generate` wall time with xdist's loadgroup scheduling vs
+cost-weighted scheduling (--cost-schedule, see scheduling.py).
+
+Builds a synthetic skills tree whose scenarios mix haiku, sonnet and opus,
+and runs the real harness against a stub claude that sleeps according to
+the model (and four times longer for prompts marked as tool-heavy), so
+only scheduling differs between runs:
+- loadgroup: --dist loadgroup --scenario-batch, the previous default
+- cost:      --cost-schedule with model defaults only (no telemetry)
+- cost+tel:  --cost-schedule with the telemetry recorded by earlier runs
+
+Usage:
+  python test/benchmarks/bench_scheduling.py [--workers N] [--scale SECONDS]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TEST_DIR = Path(__file__).resolve().parent.parent
+
+# Stub CLI: claude --print --debug --model MODEL --allowed-tools=... PROMPT
+STUB_CLAUDE = """#!/bin/bash
+case "$4" in
+    opus) units=6 ;;
+    sonnet) units=3 ;;
+    *) units=1 ;;
+esac
+case "${@: -1}" in
+    *tool-heavy*) units=$((units * 4)) ;;
+esac
+sleep "$(awk -v u="$units" -v s="$BENCH_SCALE" 'BEGIN { print u * s }')"
+echo "model=$4"
+"""
+
+# (model, tool-heavy) of each skill's scenarios, in collection order: the
+# expensive scenarios sort last, as they would in any alphabetical catalogue
+SKILLS = [
+    [("haiku", False), ("haiku", False)],
+    [("haiku", False), ("haiku", False)],
+    [("haiku", False), ("haiku", True)],
+    [("haiku", False), ("haiku", False)],
+    [("haiku", False), ("sonnet", False)],
+    [("haiku", False), ("haiku", False)],
+    [("sonnet", False), ("haiku", True)],
+    [("opus", False), ("sonnet", False)],
+]
+
+
+def build_tree(base: Path, samples: int):
+    shutil.copytree(TEST_DIR, base / "test", ignore=shutil.ignore_patterns("__pycache__", "benchmarks"))
+    for i, scenarios in enumerate(SKILLS):
+        name = f"skill-{i}"
+        skill_dir = base / "skills" / name
+        (skill_dir / "tests" / "results").mkdir(parents=True)
+        (skill_dir / "SKILL.md").write_text(f"---\nname: {name}\n---\n\n# {name}\n")
+        lines = [f"skill_name: {name}", "description: benchmark", "test_scenarios:"]
+        for n, (model, heavy) in enumerate(scenarios):
+            lines += [
+                f"  - name: scenario-{n}",
+                f"    prompt: question {n}{' (tool-heavy)' if heavy else ''}",
+                f"    model: {model}",
+                f"    samples: {samples}",
+                "    expected:",
+                "      contains_keywords: [model]",
+            ]
+        (skill_dir / "tests" / "scenarios.yaml").write_text("\n".join(lines) + "\n")
+
+    bin_dir = base / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "claude").write_text(STUB_CLAUDE)
+    (bin_dir / "claude").chmod(0o755)
+    (base / "home").mkdir()
+
+
+def generate(base: Path, workers: int, scale: float, options):
+    """Run one `make generate` equivalent from scratch, returning elapsed seconds."""
+    for result in base.glob("skills/*/tests/results/*.txt"):
+        result.unlink()
+    env = dict(os.environ, HOME=str(base / "home"), BENCH_SCALE=str(scale),
+               PATH=f"{base / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "pytest", "test/test_skills.py", "-q", "-n", str(workers), "-m", "generate", *options],
+        cwd=base, env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4, help="xdist workers")
+    parser.add_argument("--samples", type=int, default=3, help="samples per scenario")
+    parser.add_argument("--scale", type=float, default=0.5, help="seconds per haiku invocation")
+    args = parser.parse_args()
+
+    work = sum(
+        {"opus": 6, "sonnet": 3}.get(model, 1) * (4 if heavy else 1)
+        for scenarios in SKILLS for model, heavy in scenarios
+    ) * args.samples * args.scale
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        build_tree(base, args.samples)
+
+        runs = [
+            ("loadgroup", ["--dist", "loadgroup", "--scenario-batch"]),
+            ("cost", ["--cost-schedule"]),
+            ("cost+tel", ["--cost-schedule"]),
+        ]
+        print(f"{len(SKILLS)} skills, {work:.1f} s of invocations on {args.workers} workers "
+              f"(ideal {work / args.workers:.1f} s)")
+        baseline = None
+        for name, options in runs:
+            if name == "cost":
+                for telemetry in base.glob("skills/*/tests/results/telemetry.jsonl"):
+                    telemetry.unlink()
+            elapsed = generate(base, args.workers, args.scale, options)
+            baseline = baseline or elapsed
+            print(f"{name:10s} {elapsed:6.2f} s  {(1 - elapsed / baseline) * 100:5.1f}% faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk provenance tracing against a fake cosign with latency.
+
+Traces a list of digest-pinned images, where every digest is shared by
+two pullspecs (as with the same build pushed to two repositories), and
+compares:
+- serial: one provenance.sh call per image, without the attestation
+  cache (the cost of looping over the build-*.sh scripts)
+- trace-images.sh: bounded concurrency and one fetch per digest, on a
+  cold cache
+
+Every fake cosign call sleeps --latency seconds to stand in for the
+registry round-trip. Requires jq.
+
+Usage:
+  python test/benchmarks/bench_trace_images.py [--images N] [--latency S] [-j N]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from test_skill_scripts import ATTESTATION, FAKE_COSIGN, PROVENANCE  # noqa: E402
+
+
+def fake_cosign_env(base: Path, latency: float) -> dict:
+    bin_dir = base / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "cosign"
+    stub.write_text(FAKE_COSIGN)
+    stub.chmod(0o755)
+    env = dict(os.environ)
+    env.update(
+        PATH=f"{bin_dir}{os.pathsep}{env['PATH']}",
+        FAKE_COSIGN_LOG=str(base / "cosign.log"),
+        FAKE_COSIGN_ATTESTATION=str(ATTESTATION.resolve()),
+        FAKE_COSIGN_DIGEST=f"sha256:{'f' * 64}",
+        FAKE_COSIGN_SLEEP=str(latency),
+        PROVENANCE_CACHE_DIR=str(base / "cache"),
+    )
+    return env
+
+
+def cosign_calls(env: dict) -> int:
+    log = Path(env["FAKE_COSIGN_LOG"])
+    calls = len(log.read_text().splitlines()) if log.exists() else 0
+    log.unlink(missing_ok=True)
+    return calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--images", type=int, default=32, help="number of pullspecs")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per cosign call")
+    parser.add_argument("-j", type=int, default=8, help="trace-images.sh concurrency")
+    args = parser.parse_args()
+
+    images = [
+        f"quay.io/bench/repo-{n % 2}@sha256:{n // 2:064x}"
+        for n in range(args.images)
+    ]
+
+    with tempfile.TemporaryDirectory(dir=os.environ.get("BENCH_TMPDIR")) as tmp:
+        env = fake_cosign_env(Path(tmp), args.latency)
+
+        start = time.perf_counter()
+        for image in images:
+            subprocess.run(
+                [str(PROVENANCE / "scripts" / "provenance.sh"), image],
+                env={**env, "PROVENANCE_CACHE": "0"}, check=True, capture_output=True,
+            )
+        serial = time.perf_counter() - start
+        serial_calls = cosign_calls(env)
+
+        start = time.perf_counter()
+        first = None
+        proc = subprocess.Popen(
+            [str(PROVENANCE / "scripts" / "trace-images.sh"), "-j", str(args.j), *images],
+            env=env, stdout=subprocess.PIPE, text=True,
+        )
+        results = []
+        for line in proc.stdout:
+            if first is None:
+                first = time.perf_counter() - start
+            results.append(json.loads(line))
+        if proc.wait() != 0:
+            sys.exit("trace-images.sh failed")
+        bulk = time.perf_counter() - start
+        bulk_calls = cosign_calls(env)
+
+    assert len(results) == len(images)
+    digests = {image.split("@")[1] for image in images}
+    print(f"{len(images)} images, {len(digests)} digests, each shared by 2 pullspecs, "
+          f"{args.latency * 1000:.0f} ms per cosign call")
+    print(f"serial provenance.sh: {serial:6.2f} s  {serial_calls:4d} cosign calls")
+    print(f"trace-images.sh -j {args.j}: {bulk:6.2f} s  {bulk_calls:4d} cosign calls  "
+          f"(first result after {first:.2f} s)")
+    print(f"speedup: {serial / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,86 @@ Pytest configuration and fixtures for Konflux skills testing.
 
 This module provides fixtures for:
 - Discovering skills
-- Computing skill digests
+- Computing skill digests (with an on-disk per-file digest cache), scoped
+  per scenario to SKILL.md and the files listed in its depends_on
 - Managing worker home directories for parallel execution
-- Loading test scenarios
+- Scheduling items across xdist workers by estimated cost (--cost-schedule)
+- Loading test scenarios (through an on-disk index of parsed scenarios.yaml files)
+- Validating results in bulk per skill (with an on-disk verdict cache)
 """
 
+import asyncio
+import fnmatch
+import functools
 import hashlib
+import json
 import os
 import shutil
 import subprocess
 import tempfile
+import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pytest
 import yaml
 
+from debuglog import SEGMENT_DIR as DEBUG_SEGMENT_DIR, DebugLogSink
+from expectations import compile_expectations
+from generation import GenerationEngine, GenerationJob, GenerationResult, Invoker, parse_rate_limits
+from provisioning import LINK_METHODS, HomeTemplate
+from sampling import DEFAULT_MIN_SAMPLES, SKIPPED_HEADER, decide, skip_marker, skipped_reason
+from scenarioindex import ScenarioIndex, parse_yaml
+from streaming import BoundedWriter, run_streaming
+from telemetry import Invocation, load as load_telemetry, record as record_telemetry
+from validation import (
+    SCOPE_MARKER,
+    BulkValidator,
+    Verdict,
+    VerdictCache,
+    parse_digest_header,
+    split_result,
+)
+
 
 # Number of parallel workers (for pytest-xdist)
 # Each worker gets isolated temp HOME to avoid file watcher conflicts
 PARALLEL_WORKERS = 8
 
+# HOME-relative path of gcloud credentials, provided to every worker HOME
+GCLOUD_CONFIG = ".config/gcloud"
+
+# Session HOME template that worker homes are materialised from, set by the
+# home_template fixture (None outside a test session)
+_home_template: Optional[HomeTemplate] = None
+
+# Session index of parsed scenarios.yaml files, set by pytest_configure
+# (None outside a test session, where load_scenarios parses directly)
+_scenario_index: Optional[ScenarioIndex] = None
+
+# Scenario preparation shared by all samples within this process:
+# CLI commands keyed by (prompt, skill_dir, model) and the set of
+# (worker_home, skill_dir) pairs whose HOME is already set up
+_prepared_commands: Dict[tuple, List[str]] = {}
+_prepared_homes: set = set()
+
+# Number of generate items deselected because their result is up to date
+up_to_date_key = pytest.StashKey[int]()
+
+# Per-session DigestCache, shared by collection in the controller and each worker
+digest_cache_key = pytest.StashKey["DigestCache"]()
+
+# Per-session index of parsed scenarios.yaml files
+scenario_index_key = pytest.StashKey[ScenarioIndex]()
+
+# Per-session result validator with its verdict cache
+validator_key = pytest.StashKey[BulkValidator]()
+
+# Skill directories of the session and the skill_scenario test cases (with
+# their ids) built from them, shared by every parametrized test function
+skills_key = pytest.StashKey[List[Path]]()
+test_cases_key = pytest.StashKey[Tuple[List[Dict], List[str]]]()
+
 
 def pytest_addoption(parser):
     """Add custom command line options."""
@@ -33,6 +92,110 @@ def pytest_addoption(parser):
         default=None,
         help="Run tests for a specific skill only"
     )
+    parser.addoption(
+        "--scenario-batch",
+        action="store_true",
+        default=False,
+        help="Keep all samples of a scenario on one xdist worker (use with "
+             "--dist loadgroup or --cost-schedule) so they share one HOME and "
+             "CLI preparation"
+    )
+    parser.addoption(
+        "--cost-schedule",
+        action="store_true",
+        default=False,
+        help="Schedule items across xdist workers by estimated cost, longest "
+             "first and grouped by skill (see scheduling.py)"
+    )
+    parser.addoption(
+        "--home-provisioning",
+        action="store",
+        default="auto",
+        choices=["auto", *LINK_METHODS],
+        help="How worker homes are materialised from the shared HOME template "
+             "(default: auto - reflink, then hardlink, then copy)"
+    )
+    parser.addoption(
+        "--stream-output",
+        action="store_true",
+        default=False,
+        help="Stream CLI stdout into the result file and stderr into the "
+             "debug log instead of capturing them in memory"
+    )
+    parser.addoption(
+        "--output-limit",
+        action="store",
+        type=int,
+        default=0,
+        metavar="BYTES",
+        help="With --stream-output, keep at most BYTES of stdout per result "
+             "(head and tail, with a truncation marker; default: unlimited)"
+    )
+    parser.addoption(
+        "--debug-limit",
+        action="store",
+        type=int,
+        default=0,
+        metavar="BYTES",
+        help="With --stream-output, keep at most BYTES of stderr per debug "
+             "log segment (default: unlimited)"
+    )
+    parser.addoption(
+        "--invocation-timeout",
+        action="store",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="With --stream-output, kill invocations running longer than "
+             "SECONDS, keeping their partial output"
+    )
+    parser.addoption(
+        "--concurrency",
+        action="store",
+        type=int,
+        default=0,
+        help="Generate results with N concurrent Claude invocations from one "
+             "process (asyncio engine) instead of one invocation per test item"
+    )
+    parser.addoption(
+        "--rate-limit",
+        action="append",
+        default=[],
+        metavar="MODEL=RPM",
+        help="Limit generation to RPM requests per minute for MODEL (repeatable)"
+    )
+    parser.addoption(
+        "--retries",
+        action="store",
+        type=int,
+        default=2,
+        help="Retries with exponential backoff for failed generations (default: 2)"
+    )
+    parser.addoption(
+        "--adaptive",
+        action="store_true",
+        default=False,
+        help="Generate each scenario's samples in order and skip the rest once "
+             "enough of them agree on the expectations (see sampling.py)"
+    )
+    parser.addoption(
+        "--adaptive-min",
+        action="store",
+        type=int,
+        default=DEFAULT_MIN_SAMPLES,
+        metavar="N",
+        help="With --adaptive, agreeing samples that settle a scenario unless it "
+             f"sets min_samples (default: {DEFAULT_MIN_SAMPLES})"
+    )
+    parser.addoption(
+        "--validate-processes",
+        action="store",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Check changed result files of a skill with up to N processes "
+             "(default: CPU count, or 1 under pytest-xdist)"
+    )
 
 
 def pytest_configure(config):
@@ -45,6 +208,41 @@ def pytest_configure(config):
         "markers",
         "test: mark test to validate existing results"
     )
+    # Registered by pytest-xdist too; declared here for runs without it
+    config.addinivalue_line(
+        "markers",
+        "xdist_group(name): run items of the same group on one xdist worker"
+    )
+
+    # The generation engine schedules every selected item itself, so each
+    # xdist worker would otherwise regenerate the whole batch
+    if config.getoption("--concurrency") and config.getoption("numprocesses", None):
+        raise pytest.UsageError("--concurrency cannot be combined with -n (pytest-xdist)")
+
+    global _scenario_index
+    _scenario_index = get_scenario_index(config)
+
+
+def selected_skills(config) -> List[Path]:
+    """
+    Skill directories of the session: the --skill one, or all of them.
+
+    Discovered once per session, before any scenarios.yaml is parsed or
+    skill file hashed, so --skill runs only touch that skill.
+    """
+    skills = config.stash.get(skills_key, None)
+    if skills is None:
+        skill_filter = config.getoption("--skill")
+        if skill_filter:
+            # Handle both "skill-name" and "skills/skill-name" formats
+            skill_path = Path(skill_filter)
+            if not skill_path.exists():
+                skill_path = Path("skills") / skill_filter
+            skills = [skill_path]
+        else:
+            skills = find_skills()
+        config.stash[skills_key] = skills
+    return skills
 
 
 def find_skills(base_dir: Path = Path("skills")) -> List[Path]:
@@ -59,51 +257,227 @@ def find_skills(base_dir: Path = Path("skills")) -> List[Path]:
     return sorted(skills)
 
 
-def compute_skill_digest(skill_dir: Path) -> str:
+class DigestCache:
     """
-    Compute SHA256 digest of all non-test files in skill directory.
+    On-disk cache of per-file SHA256 digests.
 
-    Hashes all files except those in tests/ subdirectory, sorted by path
-    for consistency.
+    Entries are keyed by absolute path and validated against the file's
+    (size, mtime_ns, inode) signature, so an unchanged file is never re-read.
+    Files modified within the last few seconds are hashed but not cached,
+    since a later write in the same mtime tick would go unnoticed.
     """
-    hasher = hashlib.sha256()
 
-    # Get all files except those in tests/ directory
-    files_to_hash = []
-    for root, dirs, files in os.walk(skill_dir):
+    # Files younger than this (in nanoseconds) are considered racily clean
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.entries: Dict[str, List] = {}
+        self.dirty = False
+        if path is not None and path.exists():
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def file_digest(self, file_path: str) -> str:
+        """Return SHA256 of file content, reading it only if its stat changed."""
+        st = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        signature = [st.st_size, st.st_mtime_ns, st.st_ino]
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[:3] == signature:
+            return entry[3]
+
+        hasher = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+
+        if time.time_ns() - st.st_mtime_ns > self.RACY_WINDOW_NS:
+            self.entries[key] = signature + [digest]
+            self.dirty = True
+        else:
+            self.entries.pop(key, None)
+        return digest
+
+    def save(self):
+        """Atomically write the cache back to disk if anything changed."""
+        if self.path is None or not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_name, self.path)
+        except OSError:
+            # Another worker may be writing the same cache; losing a save is harmless
+            Path(tmp_name).unlink(missing_ok=True)
+            return
+        self.dirty = False
+
+
+def skill_files(skill_dir: Path) -> List[str]:
+    """
+    List all non-test files in skill directory.
+
+    Returns POSIX paths relative to skill_dir, sorted for consistent ordering.
+    """
+    files = []
+    for root, dirs, names in os.walk(skill_dir):
         # Skip tests directory
-        if "tests" in Path(root).parts:
-            continue
+        dirs[:] = [d for d in dirs if d != "tests"]
+
+        rel_root = os.path.relpath(root, skill_dir)
+        for name in names:
+            rel = name if rel_root == "." else os.path.join(rel_root, name)
+            files.append(rel.replace(os.sep, "/"))
 
-        for file in sorted(files):
-            file_path = Path(root) / file
-            files_to_hash.append(file_path)
+    return sorted(files)
 
-    # Sort for consistent ordering
-    files_to_hash.sort()
 
-    # Hash each file's content
-    for file_path in files_to_hash:
+def file_digests(skill_dir: Path, rel_paths: List[str], cache: DigestCache) -> Dict[str, str]:
+    """Map each of a skill's files (relative paths) to its SHA256, via the cache."""
+    root = os.path.abspath(skill_dir)
+    digests = {}
+    for rel_path in rel_paths:
+        file_path = os.path.join(root, rel_path)
         try:
-            with open(file_path, "rb") as f:
-                hasher.update(file_path.relative_to(skill_dir).as_posix().encode())
-                hasher.update(b"\x00")
-                hasher.update(f.read())
-                hasher.update(b"\x00")
+            digests[rel_path] = cache.file_digest(file_path)
         except Exception as e:
             print(f"Warning: Could not hash {file_path}: {e}")
+    return digests
+
 
+def merkle_root(digests: Dict[str, str]) -> str:
+    """SHA256 of the sorted (relative path, file digest) pairs."""
+    hasher = hashlib.sha256()
+    for rel_path, file_digest in sorted(digests.items()):
+        hasher.update(rel_path.encode())
+        hasher.update(b"\x00")
+        hasher.update(file_digest.encode())
+        hasher.update(b"\x00")
     return hasher.hexdigest()
 
 
+def compute_skill_digest(skill_dir: Path, cache: Optional[DigestCache] = None) -> str:
+    """
+    Compute SHA256 digest of all non-test files in skill directory.
+
+    Each file is hashed individually and the skill digest is the SHA256 of
+    the sorted (relative path, file digest) pairs. Per-file digests come from
+    the cache when given, so unchanged files are not read again.
+    """
+    if cache is None:
+        cache = DigestCache()
+    return merkle_root(file_digests(skill_dir, skill_files(skill_dir), cache))
+
+
+def scenario_scope(files: List[str], depends_on: List[str]) -> List[str]:
+    """
+    Files of a skill that a scenario depends on: SKILL.md plus every file
+    matching its depends_on entries.
+
+    Entries are paths relative to the skill directory, shell-style patterns
+    (where * also matches /) or directories.
+    """
+    scope = {"SKILL.md"} & set(files)
+    for pattern in depends_on:
+        directory = pattern.rstrip("/") + "/"
+        scope.update(
+            rel_path for rel_path in files
+            if fnmatch.fnmatchcase(rel_path, pattern) or rel_path.startswith(directory)
+        )
+    return sorted(scope)
+
+
+def scope_header(digest: str, scope: List[str]) -> str:
+    """Digest header value of a scoped result: the digest and the files it covers."""
+    return f"{digest}{SCOPE_MARKER} {' '.join(scope)}"
+
+
+def result_is_current(recorded: Optional[str], skill_scenario: Dict) -> bool:
+    """
+    Whether a digest recorded in a result header is current for a scenario.
+
+    Results record the digest of the scenario's scope (see scenario_scope);
+    results written before scopes existed record the digest of the whole
+    skill, and stay current until any file of the skill changes.
+    """
+    if recorded is None:
+        return False
+    return recorded in (skill_scenario["digest"], skill_scenario.get("skill_digest"))
+
+
+def get_digest_cache(config) -> DigestCache:
+    """
+    Return the session's digest cache, stored under pytest's cache directory.
+
+    Falls back to an in-memory cache when the cacheprovider plugin is disabled.
+    """
+    cache = config.stash.get(digest_cache_key, None)
+    if cache is None:
+        path = None
+        if getattr(config, "cache", None) is not None:
+            path = config.cache.mkdir("skill-digests") / "digests.json"
+        cache = DigestCache(path)
+        config.stash[digest_cache_key] = cache
+    return cache
+
+
+def get_scenario_index(config) -> ScenarioIndex:
+    """
+    Return the session's scenario index, stored under pytest's cache directory.
+
+    Falls back to an in-memory index when the cacheprovider plugin is disabled.
+    """
+    index = config.stash.get(scenario_index_key, None)
+    if index is None:
+        path = None
+        if getattr(config, "cache", None) is not None:
+            path = config.cache.mkdir("scenario-index") / "index.json"
+        index = ScenarioIndex(path, get_digest_cache(config).file_digest)
+        config.stash[scenario_index_key] = index
+    return index
+
+
+def get_result_validator(config) -> BulkValidator:
+    """
+    Return the session's result validator.
+
+    Result file hashes come from the session's digest cache and verdicts are
+    cached under pytest's cache directory (in memory when the cacheprovider
+    plugin is disabled). Under xdist the workers already run in parallel,
+    so each validates in-process unless --validate-processes says otherwise.
+    """
+    validator = config.stash.get(validator_key, None)
+    if validator is None:
+        path = None
+        if getattr(config, "cache", None) is not None:
+            path = config.cache.mkdir("result-verdicts") / "verdicts.json"
+        processes = config.getoption("--validate-processes", None)
+        if processes is None:
+            processes = 1 if hasattr(config, "workerinput") else (os.cpu_count() or 1)
+        validator = BulkValidator(
+            get_digest_cache(config).file_digest, VerdictCache(path), processes=processes
+        )
+        config.stash[validator_key] = validator
+    return validator
+
+
 def load_scenarios(skill_dir: Path) -> Optional[Dict]:
-    """Load scenarios.yaml from skill's tests directory."""
+    """Load scenarios.yaml from skill's tests directory, via the session's scenario index."""
+    if _scenario_index is not None:
+        return _scenario_index.scenarios(skill_dir)
+
     scenarios_file = skill_dir / "tests" / "scenarios.yaml"
     if not scenarios_file.exists():
         return None
-
-    with open(scenarios_file) as f:
-        return yaml.safe_load(f)
+    return parse_yaml(scenarios_file)
 
 
 def parse_skill_frontmatter(skill_dir: Path) -> Optional[Dict]:
@@ -136,8 +510,143 @@ def parse_skill_frontmatter(skill_dir: Path) -> Optional[Dict]:
         return None
 
 
+def read_result_digest(result_file: Path, include_skipped: bool = True) -> Optional[str]:
+    """
+    Return the skill digest recorded in a result file header, if any.
+
+    With include_skipped=False, results of skipped samples (see
+    sampling.py) have no digest, so they count as stale.
+    """
+    try:
+        with open(result_file) as f:
+            first_line = f.readline()
+            skipped = f.readline(len(SKIPPED_HEADER)) == SKIPPED_HEADER
+    except OSError:
+        return None
+    if skipped and not include_skipped:
+        return None
+    return parse_digest_header(first_line)
+
+
+def read_result_digests(results_dir: Path, include_skipped: bool = True) -> Dict[str, str]:
+    """
+    Read the digest headers of all result files in a directory at once.
+
+    Returns a mapping of result file name to recorded skill digest; files
+    without a digest header are omitted, and so are skipped samples with
+    include_skipped=False.
+    """
+    digests = {}
+    try:
+        entries = list(os.scandir(results_dir))
+    except OSError:
+        return digests
+
+    for entry in entries:
+        if not entry.name.endswith(".txt") or not entry.is_file():
+            continue
+        try:
+            with open(entry.path, "rb") as f:
+                first_line = f.readline(256).decode(errors="replace")
+                skipped = f.readline(len(SKIPPED_HEADER)) == SKIPPED_HEADER.encode()
+        except OSError:
+            continue
+        digest = parse_digest_header(first_line)
+        if digest is not None and (include_skipped or not skipped):
+            digests[entry.name] = digest
+    return digests
+
+
+def write_result(result_file: Path, digest: str, output: str):
+    """Write a result file with its digest header (a digest, or a scope_header value)."""
+    result_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(result_file, "w") as f:
+        f.write(f"# skill_digest: {digest}\n")
+        f.write(output)
+
+
+def result_file_for(skill_scenario: Dict) -> Path:
+    """Path of the result file for a skill_scenario test case."""
+    return (
+        skill_scenario["skill_dir"] / "tests" / "results"
+        / f"{skill_scenario['scenario_name']}.{skill_scenario['sample_num']}.txt"
+    )
+
+
+def sample_outcomes(skill_scenario: Dict, sample_nums) -> List[bool]:
+    """
+    Whether each generated, up-to-date result among a scenario's sample_nums
+    meets its expectations; missing, stale and skipped samples are left out.
+    """
+    outcomes = []
+    for sample_num in sample_nums:
+        try:
+            data = result_file_for({**skill_scenario, "sample_num": sample_num}).read_bytes()
+        except OSError:
+            continue
+        digest, content = split_result(data)
+        if not result_is_current(digest, skill_scenario) or skipped_reason(content) is not None:
+            continue
+        outcomes.append(not skill_scenario["expectations"].check(content))
+    return outcomes
+
+
+def adaptive_min_samples(config, skill_scenario: Dict) -> int:
+    """Agreeing samples that settle a scenario under --adaptive."""
+    return skill_scenario.get("min_samples") or config.getoption("--adaptive-min")
+
+
+def skill_result_tasks(skill_dir: Path) -> Dict[str, Dict]:
+    """Map every result file of a skill to the expected block it is checked against."""
+    scenarios_data = load_scenarios(skill_dir)
+    if not scenarios_data:
+        return {}
+    results_dir = skill_dir / "tests" / "results"
+    tasks = {}
+    for scenario in scenarios_data.get("test_scenarios", []):
+        for sample_num in range(1, scenario.get("samples", 1) + 1):
+            result_file = results_dir / f"{scenario['name']}.{sample_num}.txt"
+            tasks[str(result_file)] = scenario.get("expected", {})
+    return tasks
+
+
+def scenario_key(skill_scenario: Dict):
+    """Key identifying a (skill, scenario, sample) test case."""
+    return (
+        skill_scenario["skill_name"],
+        skill_scenario["scenario_name"],
+        skill_scenario["sample_num"],
+    )
+
+
+@pytest.fixture(scope="session")
+def home_template(tmp_path_factory, request):
+    """
+    Build the session's shared HOME template and activate it.
+
+    Credentials are copied from the real HOME into the template once; every
+    worker home is then materialised from it with reflinks or hardlinks
+    where available (see --home-provisioning), so startup time and disk
+    usage stay flat as the number of workers grows. Under xdist all workers
+    share one template in the session's base temp directory.
+    """
+    global _home_template
+
+    basetemp = tmp_path_factory.getbasetemp()
+    if hasattr(request.config, "workerinput"):
+        # Worker basetemps are siblings in the session's temp directory
+        basetemp = basetemp.parent
+
+    _home_template = HomeTemplate(
+        basetemp / "home-template",
+        method=request.config.getoption("--home-provisioning"),
+    )
+    yield _home_template
+    _home_template = None
+
+
 @pytest.fixture(scope="session")
-def worker_home(tmp_path_factory, request):
+def worker_home(tmp_path_factory, request, home_template):
     """
     Create a persistent temp HOME directory for this worker.
 
@@ -158,22 +667,135 @@ def worker_home(tmp_path_factory, request):
     return temp_dir
 
 
+@pytest.fixture(scope="session")
+def generation_batch(request, tmp_path_factory, home_template):
+    """
+    Generate all stale results up front with the asyncio engine.
+
+    Only active with --concurrency N. Collects every selected generate item
+    whose result is missing or out of date and runs them concurrently, each
+    slot with its own HOME. Results are written as soon as each invocation
+    succeeds. Returns a dict of GenerationResult keyed by scenario_key, or
+    None when running in the default one-invocation-per-item mode.
+    """
+    concurrency = request.config.getoption("--concurrency")
+    if not concurrency:
+        return None
+
+    streaming = request.config.getoption("--stream-output")
+    adaptive = request.config.getoption("--adaptive")
+    jobs = []
+    scenarios = {}
+    for item in request.session.items:
+        skill_scenario = generate_item_scenario(item)
+        if skill_scenario is None:
+            continue
+
+        result_file = result_file_for(skill_scenario)
+        digest = skill_scenario["header"]
+        if result_is_current(read_result_digest(result_file, include_skipped=adaptive), skill_scenario):
+            continue
+        scenarios[scenario_key(skill_scenario)] = skill_scenario
+
+        jobs.append(GenerationJob(
+            key=scenario_key(skill_scenario),
+            prompt=skill_scenario["prompt"],
+            skill_dir=skill_scenario["skill_dir"],
+            model=skill_scenario["model"],
+            scenario_name=skill_scenario["scenario_name"],
+            sample_num=skill_scenario["sample_num"],
+            result_file=result_file,
+            digest=digest,
+            on_success=None if streaming else functools.partial(write_result, result_file, digest),
+        ))
+
+    if not jobs:
+        return {}
+
+    homes = [tmp_path_factory.mktemp(f"slot_{n}") for n in range(min(concurrency, len(jobs)))]
+    engine = GenerationEngine(
+        homes,
+        streaming_job_invoker(request.config) if streaming else claude_job_invoker,
+        rate_limits=parse_rate_limits(request.config.getoption("--rate-limit")),
+        max_retries=request.config.getoption("--retries"),
+    )
+    if adaptive:
+        return run_adaptive(engine, jobs, scenarios, request.config)
+    return engine.run_all(jobs)
+
+
+def run_adaptive(
+    engine: GenerationEngine,
+    jobs: List[GenerationJob],
+    scenarios: Dict,
+    config
+) -> Dict:
+    """
+    Run generation jobs in waves, skipping the samples of settled scenarios.
+
+    Each wave generates, for every scenario still open, as many of its next
+    samples as sampling.decide asks for (up to min_samples at first, every
+    remaining one once samples disagree), all scenarios' samples running
+    concurrently. Between waves the new results are checked against their
+    expectations; scenarios whose samples agree get skip markers for the
+    rest. Returns GenerationResults keyed by job key, as engine.run_all.
+    """
+    pending: Dict[str, List[GenerationJob]] = {}
+    for job in sorted(jobs, key=lambda job: job.sample_num):
+        pending.setdefault(scenario_group(scenarios[job.key]), []).append(job)
+
+    results: Dict = {}
+    while pending:
+        wave = []
+        for group, group_jobs in list(pending.items()):
+            skill_scenario = scenarios[group_jobs[0].key]
+            outcomes = sample_outcomes(skill_scenario, range(1, skill_scenario["total_samples"] + 1))
+            decision = decide(outcomes, len(group_jobs), adaptive_min_samples(config, skill_scenario))
+            if decision.settled:
+                for job in group_jobs:
+                    write_result(job.result_file, job.digest, skip_marker(decision.skip_reason))
+                    results[job.key] = GenerationResult(key=job.key, skipped=decision.skip_reason)
+                del pending[group]
+                continue
+
+            wave.extend(group_jobs[:decision.generate])
+            if decision.generate < len(group_jobs):
+                pending[group] = group_jobs[decision.generate:]
+            else:
+                del pending[group]
+        if wave:
+            results.update(engine.run_all(wave))
+    return results
+
+
 @pytest.fixture(scope="session")
 def skills_list(request):
     """Get list of skills to test (all or specific one from --skill option)."""
+    skills = selected_skills(request.config)
     skill_name = request.config.getoption("--skill")
+    if skill_name and not skills[0].exists():
+        pytest.fail(f"Skill directory '{skill_name}' not found")
+    return skills
 
-    if skill_name:
-        # Handle both "skill-name" and "skills/skill-name" formats
-        skill_path = Path(skill_name)
-        if not skill_path.exists():
-            # Try prepending "skills/" if not found
-            skill_path = Path("skills") / skill_name
-            if not skill_path.exists():
-                pytest.fail(f"Skill directory '{skill_name}' not found")
-        return [skill_path]
-    else:
-        return find_skills()
+
+@pytest.fixture(scope="session")
+def result_verdicts(request):
+    """
+    Look up the verdict of a test case's result file.
+
+    The first lookup for a skill validates all of that skill's result files
+    at once (see validation.py); later lookups are dictionary hits.
+    """
+    validator = get_result_validator(request.config)
+    verdicts: Dict[Path, Dict[str, Optional[Verdict]]] = {}
+
+    def lookup(skill_scenario: Dict) -> Optional[Verdict]:
+        skill_dir = skill_scenario["skill_dir"]
+        if skill_dir not in verdicts:
+            verdicts[skill_dir] = validator.validate(skill_result_tasks(skill_dir))
+        return verdicts[skill_dir].get(str(result_file_for(skill_scenario)))
+
+    return lookup
 
 
 def pytest_generate_tests(metafunc):
@@ -183,27 +805,33 @@ def pytest_generate_tests(metafunc):
     This is the core of pytest parameterization - it discovers all scenarios
     across all skills and creates individual test items for each sample.
 
-    Creates both 'generate' and 'test' variants of each test case.
+    Creates both 'generate' and 'test' variants of each test case, from
+    test cases built once per session (see build_test_cases).
     """
     if "skill_scenario" not in metafunc.fixturenames:
         return
 
-    # Get skill filter if provided
-    skill_filter = metafunc.config.getoption("--skill")
+    config = metafunc.config
+    if test_cases_key not in config.stash:
+        config.stash[test_cases_key] = build_test_cases(config)
+    test_cases, test_ids = config.stash[test_cases_key]
+    metafunc.parametrize("skill_scenario", test_cases, ids=test_ids)
 
-    # Discover all skills
-    if skill_filter:
-        # Handle both "skill-name" and "skills/skill-name" formats
-        skill_path = Path(skill_filter)
-        if not skill_path.exists():
-            skill_path = Path("skills") / skill_filter
-        skills = [skill_path]
-    else:
-        skills = find_skills()
+
+def build_test_cases(config) -> Tuple[List[Dict], List[str]]:
+    """
+    Build a skill_scenario test case, and its id, per scenario sample.
+
+    Scenarios come from the session's scenario index and skill digests
+    from its digest cache, so unchanged skills are neither parsed nor read.
+    """
+    # Discover all skills (or the --skill one)
+    skills = selected_skills(config)
 
     # Collect all test cases
     test_cases = []
     test_ids = []
+    digest_cache = get_digest_cache(config)
 
     for skill_dir in skills:
         scenarios_data = load_scenarios(skill_dir)
@@ -211,54 +839,202 @@ def pytest_generate_tests(metafunc):
             continue
 
         skill_name = skill_dir.name
-        digest = compute_skill_digest(skill_dir)
+        leaves = file_digests(skill_dir, skill_files(skill_dir), digest_cache)
+        skill_digest = merkle_root(leaves)
+        default_depends_on = scenarios_data.get("depends_on", [])
 
         for scenario in scenarios_data.get("test_scenarios", []):
+            scope = scenario_scope(list(leaves), scenario.get("depends_on", default_depends_on))
+            digest = merkle_root({rel_path: leaves[rel_path] for rel_path in scope})
             scenario_name = scenario["name"]
             prompt = scenario["prompt"]
             model = scenario.get("model", "haiku")
             samples = scenario.get("samples", 1)
+            min_samples = scenario.get("min_samples")
             expected = scenario.get("expected", {})
+            expectations = compile_expectations(expected)
 
             for sample_num in range(1, samples + 1):
                 test_cases.append({
                     "skill_dir": skill_dir,
                     "skill_name": skill_name,
                     "digest": digest,
+                    "skill_digest": skill_digest,
+                    "scope": scope,
+                    "header": scope_header(digest, scope),
                     "scenario_name": scenario_name,
                     "prompt": prompt,
                     "model": model,
                     "sample_num": sample_num,
                     "total_samples": samples,
+                    "min_samples": min_samples,
                     "expected": expected,
+                    "expectations": expectations,
                 })
 
                 test_ids.append(f"{skill_name}::{scenario_name}[{sample_num}]")
 
-    metafunc.parametrize("skill_scenario", test_cases, ids=test_ids)
+    digest_cache.save()
+    get_scenario_index(config).save()
+    return test_cases, test_ids
 
 
-def invoke_claude(
-    prompt: str,
-    skill_dir: Path,
-    model: str,
-    worker_home: Path,
-    scenario_name: str,
-    sample_num: int
-) -> str:
+def scenario_models(skills: List[Path]) -> Dict[Tuple[str, str], str]:
+    """Model of each (skill, scenario) of the given skills."""
+    models = {}
+    for skill_dir in skills:
+        scenarios_data = load_scenarios(skill_dir) or {}
+        for scenario in scenarios_data.get("test_scenarios", []):
+            models[(skill_dir.name, scenario["name"])] = scenario.get("model", "haiku")
+    return models
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
     """
-    Invoke Claude CLI with the given prompt.
+    With --cost-schedule, schedule xdist items by estimated cost.
 
-    Uses a dedicated temp HOME directory per worker to isolate file watchers.
-    The worker_home is reused across all tests in the same worker.
+    Costs come from the telemetry recorded in the selected skills' results
+    directories (see scheduling.py). Only the controller calls this hook.
+    """
+    if not config.getoption("--cost-schedule") or config.getvalue("dist") == "each":
+        return None
+    from scheduling import CostScheduling, estimate_costs
 
-    Args:
-        prompt: The prompt to send to Claude
-        skill_dir: Path to the skill directory being tested
-        model: Model to use (default: haiku)
-        worker_home: Path to worker's persistent temp HOME
-        scenario_name: Name of the test scenario
-        sample_num: Sample number for this test
+    skills = selected_skills(config)
+    records = load_telemetry(skill_dir / "tests" / "results" for skill_dir in skills)
+    return CostScheduling(
+        config, estimate_costs(scenario_models(skills), records), log,
+        group_scenarios=config.getoption("--scenario-batch"),
+    )
+
+
+def item_scenario(item, marker: str) -> Optional[Dict]:
+    """Return the skill_scenario of a test item with the given marker, or None."""
+    callspec = getattr(item, "callspec", None)
+    if item.get_closest_marker(marker) is None or callspec is None:
+        return None
+    return callspec.params.get("skill_scenario")
+
+
+def generate_item_scenario(item) -> Optional[Dict]:
+    """Return the skill_scenario of a generate test item, or None."""
+    return item_scenario(item, "generate")
+
+
+@pytest.hookimpl(tryfirst=True, specname="pytest_collection_modifyitems")
+def group_collected_items(config, items):
+    """
+    Mark items with the xdist_group they must share a worker with.
+
+    With --scenario-batch, generate items are marked with an xdist_group
+    named after their scenario, so with --dist loadgroup all samples of a
+    scenario run on the same worker and reuse that worker's prepared HOME
+    and command (see prepare_scenario). (--cost-schedule groups a
+    scenario's samples by their item ids instead, see scheduling.py.)
+
+    Validate items are always grouped by skill, so with --dist loadgroup
+    each skill's results are validated in bulk by a single worker.
+
+    Runs first so xdist sees the marks when it assigns groups. Marks on
+    items that -m or the digest check deselect later are simply dropped
+    with them.
+    """
+    scenario_batch = config.getoption("--scenario-batch")
+    for item in items:
+        validated = item_scenario(item, "test")
+        if validated is not None:
+            item.add_marker(pytest.mark.xdist_group(name=f"validate-{validated['skill_name']}"))
+        skill_scenario = generate_item_scenario(item) if scenario_batch else None
+        if skill_scenario is not None:
+            item.add_marker(pytest.mark.xdist_group(name=scenario_group(skill_scenario)))
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config, items):
+    """
+    Deselect generate items whose results are up to date.
+
+    Result headers are read in one pass per results directory, and every
+    generate item whose result already carries the current digest is
+    deselected, so only stale samples are scheduled on workers. Samples
+    skipped by adaptive sampling only count as up to date with --adaptive.
+
+    Runs last, on the items pytest's own -m handling kept, so under -m test
+    no result headers are read at all.
+    """
+    adaptive = config.getoption("--adaptive")
+    headers: Dict[Path, Dict[str, str]] = {}
+    selected = []
+    current = []
+
+    for item in items:
+        skill_scenario = generate_item_scenario(item)
+        if skill_scenario is None:
+            selected.append(item)
+            continue
+
+        result_file = result_file_for(skill_scenario)
+        results_dir = result_file.parent
+        if results_dir not in headers:
+            headers[results_dir] = read_result_digests(results_dir, include_skipped=adaptive)
+        if result_is_current(headers[results_dir].get(result_file.name), skill_scenario):
+            current.append(item)
+        else:
+            selected.append(item)
+
+    if current:
+        config.hook.pytest_deselected(items=current)
+        items[:] = selected
+        config.stash[up_to_date_key] = len(current)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """
+    Save validation caches, compact debug logs and report up-to-date
+    generate runs as success.
+
+    Every process that validated results saves its verdicts and the digests
+    of the result files it hashed, and every process saves the scenarios.yaml
+    files it parsed into the scenario index.
+
+    The controller (or the only process, without xdist) merges the debug
+    log segments written during the session into each results directory's
+    indexed archive.
+
+    Deselecting up-to-date items can leave nothing to run, which pytest
+    reports as "no tests collected" (exit code 5). The xdist controller
+    never collects itself, so there the generate mark expression is used
+    as the signal instead.
+    """
+    config = session.config
+    validator = config.stash.get(validator_key, None)
+    if validator is not None:
+        validator.cache.save()
+        get_digest_cache(config).save()
+    get_scenario_index(config).save()
+
+    if not hasattr(config, "workerinput"):
+        for segment_dir in Path("skills").glob(f"*/tests/results/{DEBUG_SEGMENT_DIR}"):
+            DebugLogSink(segment_dir.parent).compact()
+
+    if exitstatus != pytest.ExitCode.NO_TESTS_COLLECTED:
+        return
+
+    is_xdist_controller = config.pluginmanager.hasplugin("dsession")
+    generating = "generate" in (config.getoption("markexpr") or "")
+    if generating and (config.stash.get(up_to_date_key, 0) or is_xdist_controller):
+        session.exitstatus = pytest.ExitCode.OK
+
+
+def prepare_worker_home(worker_home: Path, skill_dir: Path):
+    """
+    Set up a worker HOME for invoking Claude with the given skill.
+
+    Symlinks the skill into ~/.claude/skills and provides credentials
+    (gcloud plus any copy_to_home entries) once per HOME. When a session
+    HOME template is active they are linked from it (see provisioning.py),
+    otherwise copied from the real HOME.
     """
     # Setup worker home if needed
     skills_dir = worker_home / ".claude" / "skills"
@@ -269,29 +1045,37 @@ def invoke_claude(
     if not skill_link.exists():
         skill_link.symlink_to(skill_dir.absolute())
 
-    # Always copy gcloud credentials (required for Claude Code API authentication)
-    gcloud_source = Path.home() / ".config" / "gcloud"
-    gcloud_dest = worker_home / ".config" / "gcloud"
-    if gcloud_source.exists() and not gcloud_dest.exists():
-        gcloud_dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copytree(gcloud_source, gcloud_dest)
-
-    # Copy additional paths specified in scenarios.yaml copy_to_home field
+    # Always provide gcloud credentials (required for Claude Code API authentication),
+    # plus additional paths specified in scenarios.yaml copy_to_home field
     # (for skill-specific credentials like gh, kubectl configs, etc.)
+    for path_str in (GCLOUD_CONFIG, *skill_copy_to_home(skill_dir)):
+        if _home_template is not None:
+            _home_template.materialize(path_str, worker_home)
+            continue
+
+        source_path = Path.home() / path_str
+        dest_path = worker_home / path_str
+
+        # Only copy if source exists and dest doesn't (once per worker)
+        if source_path.exists() and not dest_path.exists():
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            if source_path.is_dir():
+                shutil.copytree(source_path, dest_path)
+            else:
+                shutil.copy2(source_path, dest_path)
+
+
+@functools.lru_cache(maxsize=None)
+def skill_copy_to_home(skill_dir: Path) -> Tuple[str, ...]:
+    """Resolve a skill's copy_to_home entries from scenarios.yaml, once per skill."""
     scenarios_data = load_scenarios(skill_dir)
-    if scenarios_data and "copy_to_home" in scenarios_data:
-        for path_str in scenarios_data["copy_to_home"]:
-            source_path = Path.home() / path_str
-            dest_path = worker_home / path_str
-
-            # Only copy if source exists and dest doesn't (once per worker)
-            if source_path.exists() and not dest_path.exists():
-                dest_path.parent.mkdir(parents=True, exist_ok=True)
-                if source_path.is_dir():
-                    shutil.copytree(source_path, dest_path)
-                else:
-                    shutil.copy2(source_path, dest_path)
+    if not scenarios_data:
+        return ()
+    return tuple(scenarios_data.get("copy_to_home", []))
+
 
+def build_claude_command(prompt: str, skill_dir: Path, model: str) -> List[str]:
+    """Build the Claude CLI command line, allowing the skill's tools."""
     # Parse skill frontmatter to get allowed-tools
     frontmatter = parse_skill_frontmatter(skill_dir)
     allowed_tools = ["Skill"]  # Always include Skill tool for skill invocation
@@ -309,8 +1093,7 @@ def invoke_claude(
     # Build --allowed-tools parameter
     allowed_tools_str = ",".join(allowed_tools)
 
-    # Invoke Claude with custom HOME
-    cmd = [
+    return [
         "claude",
         "--print",
         "--debug",
@@ -319,8 +1102,149 @@ def invoke_claude(
         prompt
     ]
 
+
+def prepare_scenario(prompt: str, skill_dir: Path, model: str, worker_home: Path) -> List[str]:
+    """
+    Prepare HOME and the CLI command for a scenario, once per process.
+
+    All samples of a scenario share the same prompt, model and skill, so the
+    tool list (which parses SKILL.md frontmatter) is built for the first
+    sample only, and each HOME is set up (which reads scenarios.yaml) once
+    per skill. Later samples reuse the prepared command and just start
+    their own CLI process.
+    """
+    skill_dir = skill_dir.absolute()
+
+    if (worker_home, skill_dir) not in _prepared_homes:
+        prepare_worker_home(worker_home, skill_dir)
+        _prepared_homes.add((worker_home, skill_dir))
+
+    key = (prompt, skill_dir, model)
+    if key not in _prepared_commands:
+        _prepared_commands[key] = build_claude_command(prompt, skill_dir, model)
+    return list(_prepared_commands[key])
+
+
+def scenario_group(skill_scenario: Dict) -> str:
+    """Name of the scenario batch a skill_scenario test case belongs to."""
+    return f"{skill_scenario['skill_name']}::{skill_scenario['scenario_name']}"
+
+
+def claude_env(worker_home: Path) -> Dict[str, str]:
+    """Return the environment for a Claude invocation using worker_home as HOME."""
     env = os.environ.copy()
     env["HOME"] = str(worker_home)
+    return env
+
+
+def report_claude_failure(cmd: List[str], returncode: int, stdout: str, stderr: str):
+    """Print details of a failed Claude invocation for debugging."""
+    print(f"\n=== Claude command failed ===")
+    print(f"Command: {' '.join(cmd)}")
+    print(f"Exit code: {returncode}")
+    print(f"STDOUT:\n{stdout}")
+    print(f"STDERR:\n{stderr}")
+    print(f"===========================\n")
+
+
+def save_debug_output(
+    prompt: str,
+    skill_dir: Path,
+    worker_home: Path,
+    scenario_name: str,
+    sample_num: int,
+    stderr: str
+) -> Optional[Path]:
+    """
+    Save CLI stderr and the Claude debug log alongside the results.
+
+    Stderr goes to a per-invocation segment (see debuglog.py), which is
+    merged into the results directory's debug archive at session end.
+
+    Returns:
+        The copy of the Claude debug log, or None if there was none
+    """
+    # Save debug output (stderr) if present
+    if stderr:
+        DebugLogSink(skill_dir / "tests" / "results").write(scenario_name, sample_num, prompt, stderr)
+
+    # Copy Claude debug log if available
+    debug_dir = worker_home / ".claude" / "debug"
+    if debug_dir.exists():
+        latest_link = debug_dir / "latest"
+        if latest_link.exists() and latest_link.is_symlink():
+            # Copy debug log to results directory with matching name
+            debug_dest = skill_dir / "tests" / "results" / f"{scenario_name}-{sample_num}.debug.txt"
+            debug_dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(latest_link, debug_dest)
+            return debug_dest
+    return None
+
+
+def session_parallelism() -> int:
+    """Number of xdist workers generating concurrently (1 without xdist)."""
+    return int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", 1))
+
+
+def save_telemetry(
+    skill_dir: Path,
+    scenario_name: str,
+    sample_num: int,
+    model: str,
+    started: float,
+    wall: float,
+    exit_status: Optional[int],
+    debug_log: Optional[Path],
+    queue_wait: Optional[float] = None,
+    rate_wait: Optional[float] = None,
+    attempt: int = 1,
+    parallelism: Optional[int] = None
+):
+    """Append one invocation's timings and token counts to the results directory (see telemetry.py)."""
+    record_telemetry(
+        skill_dir / "tests" / "results",
+        Invocation(
+            skill=skill_dir.name,
+            scenario=scenario_name,
+            sample=sample_num,
+            model=model,
+            started=started,
+            wall=round(wall, 3),
+            exit_status=exit_status,
+            queue_wait=None if queue_wait is None else round(queue_wait, 3),
+            rate_wait=None if rate_wait is None else round(rate_wait, 3),
+            attempt=attempt,
+            parallelism=parallelism or session_parallelism(),
+        ),
+        debug_log,
+    )
+
+
+def invoke_claude(
+    prompt: str,
+    skill_dir: Path,
+    model: str,
+    worker_home: Path,
+    scenario_name: str,
+    sample_num: int
+) -> str:
+    """
+    Invoke Claude CLI with the given prompt.
+
+    Uses a dedicated temp HOME directory per worker to isolate file watchers.
+    The worker_home is reused across all tests in the same worker.
+
+    Args:
+        prompt: The prompt to send to Claude
+        skill_dir: Path to the skill directory being tested
+        model: Model to use (default: haiku)
+        worker_home: Path to worker's persistent temp HOME
+        scenario_name: Name of the test scenario
+        sample_num: Sample number for this test
+    """
+    cmd = prepare_scenario(prompt, skill_dir, model, worker_home)
+    started = time.time()
+    start = time.monotonic()
 
     try:
         result = subprocess.run(
@@ -329,43 +1253,174 @@ def invoke_claude(
             text=True,
             check=True,
             close_fds=True,
-            env=env,
+            env=claude_env(worker_home),
             cwd=str(worker_home)  # Run from worker home to avoid project CLAUDE.md
         )
     except subprocess.CalledProcessError as e:
+        wall = time.monotonic() - start
         # Log the error for debugging
-        print(f"\n=== Claude command failed ===")
-        print(f"Command: {' '.join(cmd)}")
-        print(f"Exit code: {e.returncode}")
-        print(f"STDOUT:\n{e.stdout}")
-        print(f"STDERR:\n{e.stderr}")
-        print(f"===========================\n")
+        report_claude_failure(cmd, e.returncode, e.stdout, e.stderr)
+        debug_log = save_debug_output(prompt, skill_dir, worker_home, scenario_name, sample_num, e.stderr)
+        save_telemetry(skill_dir, scenario_name, sample_num, model, started, wall, e.returncode, debug_log)
         raise
 
-    # Save debug output (stderr) if present
-    if result.stderr:
-        debug_log = skill_dir / "tests" / "results" / "debug.log"
-        debug_log.parent.mkdir(parents=True, exist_ok=True)
-        with open(debug_log, "a") as f:
-            f.write(f"\n{'='*80}\n")
-            f.write(f"Debug output for: {prompt[:100]}...\n")
-            f.write(f"{'='*80}\n")
-            f.write(result.stderr)
-            f.write("\n")
-
-    # Copy Claude debug log if available
-    debug_dir = worker_home / ".claude" / "debug"
-    if debug_dir.exists():
-        latest_link = debug_dir / "latest"
-        if latest_link.exists() and latest_link.is_symlink():
-            # Copy debug log to results directory with matching name
-            debug_dest = skill_dir / "tests" / "results" / f"{scenario_name}-{sample_num}.debug.txt"
-            debug_dest.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(latest_link, debug_dest)
+    wall = time.monotonic() - start
+    debug_log = save_debug_output(prompt, skill_dir, worker_home, scenario_name, sample_num, result.stderr)
+    save_telemetry(skill_dir, scenario_name, sample_num, model, started, wall, 0, debug_log)
 
     return result.stdout
 
 
+async def invoke_claude_async(
+    prompt: str,
+    skill_dir: Path,
+    model: str,
+    worker_home: Path,
+    scenario_name: str,
+    sample_num: int,
+    queue_wait: Optional[float] = None,
+    rate_wait: Optional[float] = None,
+    attempt: int = 1,
+    parallelism: Optional[int] = None
+) -> str:
+    """
+    Invoke Claude CLI without blocking the event loop.
+
+    Asyncio counterpart of invoke_claude, used by the generation engine to
+    run many invocations concurrently from a single process. The caller must
+    ensure no two concurrent invocations share the same worker_home.
+    queue_wait, rate_wait, attempt and parallelism are only recorded in the
+    telemetry.
+
+    Raises:
+        subprocess.CalledProcessError: If the CLI exits with non-zero status
+    """
+    cmd = prepare_scenario(prompt, skill_dir, model, worker_home)
+    started = time.time()
+    start = time.monotonic()
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        close_fds=True,
+        env=claude_env(worker_home),
+        cwd=str(worker_home)  # Run from worker home to avoid project CLAUDE.md
+    )
+    stdout_bytes, stderr_bytes = await proc.communicate()
+    wall = time.monotonic() - start
+    stdout = stdout_bytes.decode(errors="replace")
+    stderr = stderr_bytes.decode(errors="replace")
+
+    if proc.returncode != 0:
+        report_claude_failure(cmd, proc.returncode, stdout, stderr)
+    debug_log = save_debug_output(prompt, skill_dir, worker_home, scenario_name, sample_num, stderr)
+    save_telemetry(skill_dir, scenario_name, sample_num, model, started, wall, proc.returncode, debug_log,
+                   queue_wait, rate_wait, attempt, parallelism)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+
+    return stdout
+
+
+def partial_result_file(result_file: Path) -> Path:
+    """Path that a streaming invocation writes to before it succeeds."""
+    return result_file.with_name(result_file.name + ".partial")
+
+
+async def invoke_claude_streaming(
+    prompt: str,
+    skill_dir: Path,
+    model: str,
+    worker_home: Path,
+    scenario_name: str,
+    sample_num: int,
+    result_file: Path,
+    digest: str,
+    output_limit: int = 0,
+    debug_limit: int = 0,
+    timeout: Optional[float] = None,
+    queue_wait: Optional[float] = None,
+    rate_wait: Optional[float] = None,
+    attempt: int = 1,
+    parallelism: Optional[int] = None
+) -> Path:
+    """
+    Invoke Claude CLI, streaming its output instead of capturing it.
+
+    Stdout is written, after the digest header, to the partial result file
+    and stderr to the debug log segment, each through a BoundedWriter, so
+    memory stays constant however verbose the run is. On success the
+    partial file replaces result_file. On failure or timeout it is kept
+    (ending with a marker on timeout) and result_file is left untouched,
+    so the sample is still regenerated next time. queue_wait, rate_wait,
+    attempt and parallelism are only recorded in the telemetry.
+
+    Raises:
+        subprocess.CalledProcessError: If the CLI exits with non-zero status
+        subprocess.TimeoutExpired: If the CLI runs longer than timeout
+    """
+    cmd = prepare_scenario(prompt, skill_dir, model, worker_home)
+    partial_file = partial_result_file(result_file)
+    partial_file.parent.mkdir(parents=True, exist_ok=True)
+    sink = DebugLogSink(skill_dir / "tests" / "results")
+    started = time.time()
+    start = time.monotonic()
+
+    with open(partial_file, "wb") as out, sink.open_segment(scenario_name, sample_num, prompt) as err:
+        out.write(f"# skill_digest: {digest}\n".encode())
+        returncode = await run_streaming(
+            cmd,
+            BoundedWriter(out, output_limit),
+            BoundedWriter(err, debug_limit),
+            timeout,
+            close_fds=True,
+            env=claude_env(worker_home),
+            cwd=str(worker_home)  # Run from worker home to avoid project CLAUDE.md
+        )
+
+    wall = time.monotonic() - start
+
+    # Stderr is already in the debug log; this only copies the Claude debug log
+    debug_log = save_debug_output(prompt, skill_dir, worker_home, scenario_name, sample_num, "")
+    save_telemetry(skill_dir, scenario_name, sample_num, model, started, wall, returncode, debug_log,
+                   queue_wait, rate_wait, attempt, parallelism)
+
+    if returncode is None:
+        raise subprocess.TimeoutExpired(cmd, timeout, output=f"partial output kept in {partial_file}")
+    if returncode != 0:
+        report_claude_failure(cmd, returncode, f"(kept in {partial_file})", "(see debug log)")
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+    os.replace(partial_file, result_file)
+    return result_file
+
+
+async def claude_job_invoker(job: GenerationJob, home: Path) -> str:
+    """Generation engine invoker capturing output with invoke_claude_async."""
+    return await invoke_claude_async(
+        job.prompt, job.skill_dir, job.model, home, job.scenario_name, job.sample_num,
+        queue_wait=job.queue_wait, rate_wait=job.rate_wait,
+        attempt=job.attempt, parallelism=job.parallelism,
+    )
+
+
+def streaming_job_invoker(config) -> Invoker:
+    """Generation engine invoker streaming output with the session's limits."""
+    async def invoke(job: GenerationJob, home: Path) -> str:
+        result_file = await invoke_claude_streaming(
+            job.prompt, job.skill_dir, job.model, home, job.scenario_name, job.sample_num,
+            job.result_file, job.digest,
+            output_limit=config.getoption("--output-limit"),
+            debug_limit=config.getoption("--debug-limit"),
+            timeout=config.getoption("--invocation-timeout"),
+            queue_wait=job.queue_wait, rate_wait=job.rate_wait,
+            attempt=job.attempt, parallelism=job.parallelism,
+        )
+        return str(result_file)
+    return invoke
+
+
 def check_expectations(content: str, expected: Dict) -> List[str]:
     """
     Check if content meets expectations.
@@ -376,27 +1431,8 @@ def check_expectations(content: str, expected: Dict) -> List[str]:
     - contains_keywords: ["foo", "bar"] - both must be present (AND)
     - contains_keywords: [["foo", "bar"]] - at least one must be present (OR)
     - contains_keywords: ["foo", ["bar", "baz"]] - "foo" must be present AND (bar OR baz)
-    """
-    failures = []
-    content_lower = content.lower()
-
-    # Check contains_keywords
-    if "contains_keywords" in expected:
-        for keyword in expected["contains_keywords"]:
-            # If keyword is a list, at least one phrase must match (OR logic)
-            if isinstance(keyword, list):
-                if not any(phrase.lower() in content_lower for phrase in keyword):
-                    phrase_list = "', '".join(keyword)
-                    failures.append(f"Should contain at least one of ['{phrase_list}'] but doesn't")
-            # If keyword is a string, it must match (AND logic)
-            else:
-                if keyword.lower() not in content_lower:
-                    failures.append(f"Should contain '{keyword}' but doesn't")
 
-    # Check does_not_contain
-    if "does_not_contain" in expected:
-        for keyword in expected["does_not_contain"]:
-            if keyword.lower() in content_lower:
-                failures.append(f"Should NOT contain '{keyword}' but does")
-
-    return failures
+    The expected block is compiled once (see expectations.py) and reused
+    for every result checked against it.
+    """
+    return compile_expectations(expected).check(content)
@@ -0,0 +1,195 @@
+"""
+Per-invocation debug log sink and indexed debug log archive.
+
+Each Claude invocation writes its CLI stderr to its own segment file,
+results/debug/{scenario}.{sample}.log, so parallel workers never append to
+a shared file. At the end of a session the segments of a results directory
+are compacted into an archive:
+- results/debug-archive.gz: one gzip member per (scenario, sample); the
+  concatenation is itself a valid gzip file, so `zcat` shows everything
+- results/debug-archive.idx.json: maps "{scenario}.{sample}" to the
+  member's [offset, length], so one entry is read with a single seek
+
+Usage:
+  python test/debuglog.py show <results_dir> <scenario> <sample>
+  python test/debuglog.py compact <results_dir>
+"""
+
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+
+SEGMENT_DIR = "debug"
+ARCHIVE_NAME = "debug-archive.gz"
+INDEX_NAME = "debug-archive.idx.json"
+
+
+def entry_key(scenario_name: str, sample_num: int) -> str:
+    return f"{scenario_name}.{sample_num}"
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write data to path via a temp file and rename, never partially."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class DebugLogSink:
+    """Debug log segments and archive for one results directory."""
+
+    def __init__(self, results_dir: Path):
+        self.results_dir = results_dir
+        self.segment_dir = results_dir / SEGMENT_DIR
+        self.archive = results_dir / ARCHIVE_NAME
+        self.index_file = results_dir / INDEX_NAME
+
+    def segment_path(self, scenario_name: str, sample_num: int) -> Path:
+        return self.segment_dir / f"{entry_key(scenario_name, sample_num)}.log"
+
+    def write(self, scenario_name: str, sample_num: int, prompt: str, stderr: str):
+        """Write one invocation's stderr to its own segment file."""
+        with self.open_segment(scenario_name, sample_num, prompt) as f:
+            f.write(f"{stderr}\n".encode())
+
+    @contextlib.contextmanager
+    def open_segment(self, scenario_name: str, sample_num: int, prompt: str) -> Iterator[BinaryIO]:
+        """
+        Open one invocation's segment for streaming stderr into.
+
+        The segment is written to a temp file and renamed into place when
+        the block exits, so readers never see a half-written segment.
+        """
+        path = self.segment_path(scenario_name, sample_num)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(
+                    f"{'='*80}\n"
+                    f"Debug output for: {prompt[:100]}...\n"
+                    f"{'='*80}\n".encode()
+                )
+                yield f
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def load_index(self) -> Dict[str, List[int]]:
+        try:
+            with open(self.index_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def segments(self) -> List[Path]:
+        if not self.segment_dir.is_dir():
+            return []
+        return sorted(self.segment_dir.glob("*.log"))
+
+    def read(self, scenario_name: str, sample_num: int) -> Optional[str]:
+        """
+        Return the debug log of one sample, or None if there is none.
+
+        A pending segment (newer than the archive) takes precedence.
+        """
+        segment = self.segment_path(scenario_name, sample_num)
+        if segment.exists():
+            return segment.read_text(errors="replace")
+
+        location = self.load_index().get(entry_key(scenario_name, sample_num))
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.archive, "rb") as f:
+            f.seek(offset)
+            member = f.read(length)
+        return gzip.decompress(member).decode(errors="replace")
+
+    def compact(self) -> int:
+        """
+        Merge pending segments into the archive and remove them.
+
+        Segments replace archived entries of the same sample. Returns the
+        number of segments merged.
+        """
+        segments = self.segments()
+        if not segments:
+            return 0
+
+        index = self.load_index()
+        pending = {segment.name[:-len(".log")]: segment for segment in segments}
+
+        members = []
+        if index and self.archive.exists():
+            with open(self.archive, "rb") as f:
+                for key, (offset, length) in sorted(index.items()):
+                    if key in pending:
+                        continue
+                    f.seek(offset)
+                    members.append((key, f.read(length)))
+        for key, segment in sorted(pending.items()):
+            members.append((key, gzip.compress(segment.read_bytes())))
+
+        new_index = {}
+        offset = 0
+        for key, member in members:
+            new_index[key] = [offset, len(member)]
+            offset += len(member)
+
+        atomic_write(self.archive, b"".join(member for _, member in members))
+        atomic_write(self.index_file, json.dumps(new_index, indent=1, sort_keys=True).encode())
+
+        for segment in segments:
+            segment.unlink(missing_ok=True)
+        try:
+            self.segment_dir.rmdir()
+        except OSError:
+            pass  # A new segment arrived meanwhile; it is merged next time
+        return len(segments)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read or compact skill test debug logs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    show = subparsers.add_parser("show", help="print the debug log of one sample")
+    show.add_argument("results_dir", type=Path)
+    show.add_argument("scenario")
+    show.add_argument("sample", type=int)
+
+    compact = subparsers.add_parser("compact", help="merge pending segments into the archive")
+    compact.add_argument("results_dir", type=Path)
+
+    args = parser.parse_args(argv)
+    sink = DebugLogSink(args.results_dir)
+
+    if args.command == "compact":
+        print(f"Merged {sink.compact()} segment(s) into {sink.archive}")
+        return 0
+
+    text = sink.read(args.scenario, args.sample)
+    if text is None:
+        print(f"No debug log for {entry_key(args.scenario, args.sample)} in {args.results_dir}",
+              file=sys.stderr)
+        return 1
+    sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
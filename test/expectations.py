@@ -0,0 +1,158 @@
+"""
+Compiled expectation matching for skill test results.
+
+An `expected` block from scenarios.yaml is compiled once per scenario into
+a CompiledExpectations: every phrase from contains_keywords (including OR
+alternatives), does_not_contain, in_order and min_count is lowercased and
+deduplicated into a single multi-pattern matcher, and matches_regex
+patterns are compiled. Checking a result is then one pass over its
+lowercased content that records the first offset and the occurrence count
+of every phrase, and all predicates are evaluated from that hit table.
+
+The matcher is an Aho-Corasick automaton when pyahocorasick is installed.
+Otherwise each unique phrase is searched with str.find, which in CPython
+outperforms a pure-Python automaton for up to thousands of phrases.
+"""
+
+import json
+import re
+from typing import Dict, List, Tuple, Union
+
+try:
+    import ahocorasick
+except ImportError:  # Optional dependency, see requirements-optional.txt
+    ahocorasick = None
+
+
+class CompiledExpectations:
+    """
+    Expectations of one scenario, compiled for single-pass matching.
+
+    Supports flexible keyword matching:
+    - contains_keywords: ["foo", "bar"] - both must be present (AND)
+    - contains_keywords: [["foo", "bar"]] - at least one must be present (OR)
+    - contains_keywords: ["foo", ["bar", "baz"]] - "foo" must be present AND (bar OR baz)
+    - does_not_contain: ["foo"] - "foo" must not be present
+    - matches_regex: ["foo-[0-9]+"] - each pattern must match (case-insensitive)
+    - in_order: ["foo", "bar"] - phrases must appear in this order
+    - min_count: {"foo": 2} - "foo" must occur at least twice
+    """
+
+    def __init__(self, expected: Dict):
+        # Each AND entry keeps its original phrases for failure messages
+        self.required: List[Tuple[Union[str, List[str]], List[str]]] = []
+        for keyword in expected.get("contains_keywords", []):
+            phrases = keyword if isinstance(keyword, list) else [keyword]
+            self.required.append((keyword, [phrase.lower() for phrase in phrases]))
+        self.forbidden: List[Tuple[str, str]] = [
+            (keyword, keyword.lower()) for keyword in expected.get("does_not_contain", [])
+        ]
+
+        self.patterns: List[Tuple[str, "re.Pattern"]] = [
+            (pattern, re.compile(pattern, re.IGNORECASE | re.MULTILINE))
+            for pattern in expected.get("matches_regex", [])
+        ]
+        self.ordered: List[Tuple[str, str]] = [
+            (keyword, keyword.lower()) for keyword in expected.get("in_order", [])
+        ]
+        self.counted: List[Tuple[str, str, int]] = [
+            (keyword, keyword.lower(), count)
+            for keyword, count in expected.get("min_count", {}).items()
+        ]
+
+        phrases = {phrase for _, alternatives in self.required for phrase in alternatives}
+        phrases.update(phrase for _, phrase in self.forbidden)
+        phrases.update(phrase for _, phrase in self.ordered)
+        phrases.update(phrase for _, phrase, _ in self.counted)
+        # Empty phrases match everywhere and cannot be added to an automaton
+        self.phrases = sorted(phrase for phrase in phrases if phrase)
+
+        self.automaton = None
+        if ahocorasick is not None and self.phrases:
+            self.automaton = ahocorasick.Automaton()
+            for phrase in self.phrases:
+                self.automaton.add_word(phrase, phrase)
+            self.automaton.make_automaton()
+
+    def scan(self, content: str) -> Dict[str, List[int]]:
+        """
+        Find every phrase in content in one pass.
+
+        Returns a mapping of each lowercased phrase to the offsets (in the
+        lowercased content) of its non-overlapping occurrences, in order.
+        """
+        content_lower = content.lower()
+        hits: Dict[str, List[int]] = {phrase: [] for phrase in self.phrases}
+
+        if self.automaton is not None:
+            for end, phrase in self.automaton.iter(content_lower):
+                offsets = hits[phrase]
+                start = end - len(phrase) + 1
+                if not offsets or start >= offsets[-1] + len(phrase):
+                    offsets.append(start)
+            return hits
+
+        for phrase in self.phrases:
+            offsets = hits[phrase]
+            start = content_lower.find(phrase)
+            while start >= 0:
+                offsets.append(start)
+                start = content_lower.find(phrase, start + len(phrase))
+        return hits
+
+    def check(self, content: str) -> List[str]:
+        """Return list of failure messages (empty if all pass)."""
+        hits = self.scan(content)
+        hits[""] = [0]
+        failures = []
+
+        for keyword, alternatives in self.required:
+            if any(hits[phrase] for phrase in alternatives):
+                continue
+            # If keyword is a list, at least one phrase must match (OR logic)
+            if isinstance(keyword, list):
+                phrase_list = "', '".join(keyword)
+                failures.append(f"Should contain at least one of ['{phrase_list}'] but doesn't")
+            # If keyword is a string, it must match (AND logic)
+            else:
+                failures.append(f"Should contain '{keyword}' but doesn't")
+
+        for keyword, phrase in self.forbidden:
+            if hits[phrase]:
+                failures.append(f"Should NOT contain '{keyword}' but does (at offset {hits[phrase][0]})")
+
+        for pattern, regex in self.patterns:
+            if not regex.search(content):
+                failures.append(f"Should match regex '{pattern}' but doesn't")
+
+        # Each phrase must start after the previous one's first match ends
+        position = 0
+        previous = None
+        for keyword, phrase in self.ordered:
+            offset = next((o for o in hits[phrase] if o >= position), None)
+            if offset is None:
+                where = f"after '{previous}' (offset {position})" if previous else "at all"
+                failures.append(f"Should contain '{keyword}' in order {where} but doesn't")
+                break
+            position = offset + len(phrase)
+            previous = keyword
+
+        for keyword, phrase, count in self.counted:
+            found = len(hits[phrase])
+            if found < count:
+                failures.append(f"Should contain '{keyword}' at least {count} times but found {found}")
+
+        return failures
+
+
+# Compiled expectations by canonical JSON of the expected block
+_compiled: Dict[str, CompiledExpectations] = {}
+
+
+def compile_expectations(expected: Dict) -> CompiledExpectations:
+    """Compile an expected block, reusing the compiled form for equal blocks."""
+    key = json.dumps(expected, sort_keys=True)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = _compiled[key] = CompiledExpectations(expected)
+    return compiled
@@ -0,0 +1,201 @@
+"""
+Asynchronous generation engine for skill test results.
+
+Runs many Claude CLI invocations concurrently from a single Python process,
+instead of tying the number of in-flight requests to the number of xdist
+workers. The engine provides:
+- A configurable concurrency limit, with one isolated HOME per slot
+- Per-model rate limits (requests per minute)
+- Retry with exponential backoff for failed invocations
+
+The engine only schedules work; the actual invocation is a coroutine
+supplied by the caller (normally conftest.claude_job_invoker).
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+@dataclass
+class GenerationJob:
+    """A single (scenario, sample) invocation to run."""
+
+    key: Hashable
+    prompt: str
+    skill_dir: Path
+    model: str
+    scenario_name: str
+    sample_num: int
+    # Result file and skill digest, for invokers that write results themselves
+    result_file: Optional[Path] = None
+    digest: str = ""
+    # Called with the invoker's return value once the invocation succeeds
+    on_success: Optional[Callable[[str], None]] = None
+    # Set by the engine before each attempt, for telemetry: seconds spent
+    # waiting for a free slot, then for the model's rate limit, the 1-based
+    # attempt number and the engine's concurrency
+    queue_wait: float = 0.0
+    rate_wait: float = 0.0
+    attempt: int = 0
+    parallelism: int = 1
+
+
+@dataclass
+class GenerationResult:
+    """Outcome of a job after all retries."""
+
+    key: Hashable
+    output: Optional[str] = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    # Set instead of running the job when adaptive sampling skipped it
+    skipped: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# Coroutine running one job in the given HOME, returning its output
+Invoker = Callable[[GenerationJob, Path], Awaitable[str]]
+
+
+class RateLimiter:
+    """
+    Space out request starts to at most `per_minute` per minute.
+
+    A per_minute of 0 (or less) disables limiting.
+    """
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def parse_rate_limits(values: List[str]) -> Dict[str, float]:
+    """
+    Parse MODEL=RPM strings (e.g. "sonnet=30") into a rate limit mapping.
+
+    Raises:
+        ValueError: If a value is not in MODEL=RPM form
+    """
+    limits = {}
+    for value in values:
+        model, sep, rpm = value.partition("=")
+        if not sep or not model:
+            raise ValueError(f"Invalid rate limit '{value}', expected MODEL=RPM")
+        limits[model.strip()] = float(rpm)
+    return limits
+
+
+class GenerationEngine:
+    """
+    Run generation jobs concurrently with rate limits and retries.
+
+    Args:
+        homes: One isolated HOME directory per concurrent slot; the
+            concurrency limit is len(homes)
+        invoke: Coroutine performing a single invocation
+        rate_limits: Requests per minute per model name
+        max_retries: Retries after the first failed attempt
+        backoff: Base delay in seconds, doubled for every retry
+    """
+
+    def __init__(
+        self,
+        homes: List[Path],
+        invoke: Invoker,
+        rate_limits: Optional[Dict[str, float]] = None,
+        max_retries: int = 2,
+        backoff: float = 2.0,
+    ):
+        if not homes:
+            raise ValueError("GenerationEngine needs at least one HOME slot")
+        self.homes = homes
+        self.invoke = invoke
+        self.rate_limits = rate_limits or {}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiters: Dict[str, RateLimiter] = {}
+
+    @property
+    def concurrency(self) -> int:
+        return len(self.homes)
+
+    def limiter(self, model: str) -> RateLimiter:
+        if model not in self.limiters:
+            self.limiters[model] = RateLimiter(self.rate_limits.get(model, 0))
+        return self.limiters[model]
+
+    def retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter for the given (1-based) attempt."""
+        delay = self.backoff * (2 ** (attempt - 1))
+        return delay + random.uniform(0, delay / 2)
+
+    async def run_job(self, job: GenerationJob, free_homes: asyncio.Queue) -> GenerationResult:
+        result = GenerationResult(key=job.key)
+        start = time.monotonic()
+
+        while True:
+            result.attempts += 1
+            queued = time.monotonic()
+            # Take the slot first, so the rate limit spaces out actual starts
+            # rather than letting queued jobs start together once slots free up
+            home = await free_homes.get()
+            limited = time.monotonic()
+            job.queue_wait = limited - queued
+            await self.limiter(job.model).acquire()
+            job.rate_wait = time.monotonic() - limited
+            job.attempt = result.attempts
+            job.parallelism = self.concurrency
+            try:
+                output = await self.invoke(job, home)
+            except Exception as e:
+                result.error = e
+            else:
+                result.output = output
+                result.error = None
+            finally:
+                free_homes.put_nowait(home)
+
+            if result.ok or result.attempts > self.max_retries:
+                break
+            await asyncio.sleep(self.retry_delay(result.attempts))
+
+        if result.ok and job.on_success is not None:
+            try:
+                job.on_success(result.output)
+            except Exception as e:
+                result.error = e
+
+        result.elapsed = time.monotonic() - start
+        return result
+
+    async def run(self, jobs: List[GenerationJob]) -> Dict[Hashable, GenerationResult]:
+        """Run all jobs, returning results keyed by job key."""
+        free_homes: asyncio.Queue = asyncio.Queue()
+        for home in self.homes:
+            free_homes.put_nowait(home)
+
+        results = await asyncio.gather(*(self.run_job(job, free_homes) for job in jobs))
+        return {result.key: result for result in results}
+
+    def run_all(self, jobs: List[GenerationJob]) -> Dict[Hashable, GenerationResult]:
+        """Synchronous entry point: run jobs on a fresh event loop."""
+        return asyncio.run(self.run(jobs))
@@ -0,0 +1,203 @@
+"""
+Shared HOME template for worker homes.
+
+Credentials needed inside worker homes (~/.config/gcloud plus each skill's
+copy_to_home entries) are copied from the real HOME once per session into a
+template directory. Worker homes are then materialised from the template
+file by file using, in order of preference:
+- reflink: copy-on-write clone (Linux FICLONE), no extra data blocks
+- hardlink: shares the template's inode, no extra data blocks
+- copy: plain shutil.copy2 fallback
+
+The real HOME is never linked; only the session's private template is.
+Files the tools are known to write (kube config, gcloud's sqlite databases
+and configurations) are always copied instead of hardlinked, and the
+template files that are hardlinked are made read-only, so any other write
+fails loudly instead of leaking into the other workers' homes.
+"""
+
+import os
+import shutil
+import stat
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+# ioctl request number for FICLONE (linux/fs.h)
+FICLONE = 0x40049409
+
+# Materialisation methods in order of preference for "auto"
+LINK_METHODS = ["reflink", "hardlink", "copy"]
+
+# HOME-relative files that kubectl and gcloud update in place, never hardlinked
+MUTABLE_FILES = [
+    ".kube/config",
+    ".kube/cache/*",
+    ".config/gcloud/*.db",
+    ".config/gcloud/.last_*",
+    ".config/gcloud/active_config",
+    ".config/gcloud/config_sentinel",
+    ".config/gcloud/configurations/*",
+    ".config/gcloud/gce",
+    ".config/gcloud/logs/*",
+]
+
+
+def reflink_file(src: Path, dst: Path):
+    """
+    Clone src to dst with copy-on-write where the filesystem supports it.
+
+    Raises:
+        OSError: If reflinks are not supported for this pair of files
+    """
+    if fcntl is None:
+        raise OSError("reflink not supported on this platform")
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            dst.unlink(missing_ok=True)
+            raise
+    shutil.copystat(src, dst)
+
+
+def place_file(src: Path, dst: Path, method: str):
+    """Materialise one file using the given method."""
+    if method == "reflink":
+        reflink_file(src, dst)
+    elif method == "hardlink":
+        os.link(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+class HomeTemplate:
+    """
+    Read-only HOME template shared by all worker homes of a session.
+
+    Args:
+        root: Template directory (shared by xdist workers of a session)
+        source_home: HOME to take credentials from
+        method: "auto", or one of LINK_METHODS to force a method
+    """
+
+    def __init__(self, root: Path, source_home: Optional[Path] = None, method: str = "auto"):
+        if method != "auto" and method not in LINK_METHODS:
+            raise ValueError(f"Unknown provisioning method '{method}'")
+        self.root = root
+        self.source_home = source_home or Path.home()
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Candidate methods, narrowed to the first one that works
+        self.methods: List[str] = LINK_METHODS if method == "auto" else [method]
+
+    def entry(self, path_str: str) -> Optional[Path]:
+        """
+        Return the template copy of HOME-relative path_str, creating it once.
+
+        Returns None if the path does not exist in the source HOME. Safe to
+        call concurrently from several workers: each builds into a private
+        staging path and the first rename wins.
+        """
+        template_path = self.root / path_str
+        if template_path.exists():
+            return template_path
+
+        source_path = self.source_home / path_str
+        if not source_path.exists():
+            return None
+
+        template_path.parent.mkdir(parents=True, exist_ok=True)
+        staging = template_path.with_name(f".{template_path.name}.{os.getpid()}.tmp")
+        if source_path.is_dir():
+            shutil.copytree(source_path, staging, symlinks=True)
+        else:
+            shutil.copy2(source_path, staging)
+
+        try:
+            os.rename(staging, template_path)
+        except OSError:
+            # Another worker created it first
+            if staging.is_dir():
+                shutil.rmtree(staging, ignore_errors=True)
+            else:
+                staging.unlink(missing_ok=True)
+        return template_path
+
+    def is_mutable(self, template_path: Path) -> bool:
+        """Whether a template file is one that tools write to (see MUTABLE_FILES)."""
+        rel = template_path.relative_to(self.root).as_posix()
+        return any(fnmatch(rel, pattern) for pattern in MUTABLE_FILES)
+
+    def place(self, src: Path, dst: Path):
+        """
+        Materialise one template file, settling on the first working method.
+
+        Mutable files are copied rather than hardlinked; hardlinked template
+        files are made read-only, which their links share.
+        """
+        while True:
+            method = self.methods[0]
+            if method == "hardlink" and self.is_mutable(src):
+                shutil.copy2(src, dst)
+                return
+            try:
+                place_file(src, dst, method)
+                if method == "hardlink":
+                    mode = src.stat().st_mode
+                    if mode & 0o222:
+                        src.chmod(stat.S_IMODE(mode) & ~0o222)
+                return
+            except OSError:
+                if len(self.methods) == 1:
+                    raise
+                self.methods = self.methods[1:]
+
+    @property
+    def method(self) -> str:
+        """Method currently used to materialise files."""
+        return self.methods[0]
+
+    def materialize(self, path_str: str, worker_home: Path) -> bool:
+        """
+        Materialise HOME-relative path_str into worker_home from the template.
+
+        Does nothing if the destination already exists. Returns True if the
+        path exists in worker_home afterwards.
+        """
+        dest_path = worker_home / path_str
+        if dest_path.exists():
+            return True
+
+        template_path = self.entry(path_str)
+        if template_path is None:
+            return False
+
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        if not template_path.is_dir():
+            self.place(template_path, dest_path)
+            return True
+
+        for root, dirs, files in os.walk(template_path):
+            rel_root = Path(root).relative_to(template_path)
+            (dest_path / rel_root).mkdir(exist_ok=True)
+            for name in files:
+                src = Path(root) / name
+                dst = dest_path / rel_root / name
+                if src.is_symlink():
+                    dst.symlink_to(os.readlink(src))
+                else:
+                    self.place(src, dst)
+            # os.walk lists symlinks to directories in dirs without following them
+            for name in list(dirs):
+                src = Path(root) / name
+                if src.is_symlink():
+                    (dest_path / rel_root / name).symlink_to(os.readlink(src))
+                    dirs.remove(name)
+        return True
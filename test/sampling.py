@@ -0,0 +1,76 @@
+"""
+Adaptive sampling: stop generating a scenario's samples once they agree.
+
+With --adaptive, the samples of a scenario are generated in order (or, with
+the generation engine, in small batches) and each is checked against the
+scenario's expectations as soon as it is written. Once min_samples
+generated samples agree - all pass or all fail - the scenario's outcome
+is settled and its remaining samples are skipped. As soon as two samples
+disagree, the scenario escalates to generating every remaining sample.
+
+A skipped sample still gets a result file, with the current digest header
+and a skip marker instead of Claude's output:
+
+    # skill_digest: <digest>
+    # skipped: adaptive sampling, 2 earlier samples all passed
+
+so the set of result files stays complete: validation reports the sample
+as skipped, and adaptive runs treat it as up to date. Runs without
+--adaptive regenerate it.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+SKIPPED_HEADER = "# skipped:"
+
+# Generated samples that must agree before the rest are skipped, unless
+# the scenario sets min_samples
+DEFAULT_MIN_SAMPLES = 2
+
+
+@dataclass
+class SampleDecision:
+    """What to do with a scenario's remaining samples."""
+
+    # Samples to generate next (0 once settled)
+    generate: int
+    # Why the remaining samples are skipped, once the outcome is settled
+    skip_reason: Optional[str] = None
+
+    @property
+    def settled(self) -> bool:
+        return self.skip_reason is not None
+
+
+def decide(outcomes: List[bool], remaining: int, min_samples: int = DEFAULT_MIN_SAMPLES) -> SampleDecision:
+    """
+    Decide how many more samples of a scenario to generate.
+
+    Args:
+        outcomes: Whether each generated sample so far met expectations
+        remaining: Samples not generated yet
+        min_samples: Agreeing samples that settle the outcome
+    """
+    if len(set(outcomes)) > 1:
+        return SampleDecision(generate=remaining)
+    if outcomes and len(outcomes) >= min_samples:
+        verdict = "passed" if outcomes[0] else "failed"
+        return SampleDecision(
+            generate=0,
+            skip_reason=f"adaptive sampling, {len(outcomes)} earlier samples all {verdict}",
+        )
+    return SampleDecision(generate=min(remaining, min_samples - len(outcomes)))
+
+
+def skip_marker(reason: str) -> str:
+    """Result file content recording a skipped sample."""
+    return f"{SKIPPED_HEADER} {reason}\n"
+
+
+def skipped_reason(content: str) -> Optional[str]:
+    """The skip reason of result content (after the digest header), or None."""
+    if not content.startswith(SKIPPED_HEADER):
+        return None
+    return content[len(SKIPPED_HEADER):].split("\n", 1)[0].strip()
@@ -0,0 +1,107 @@
+"""
+Compiled index of parsed scenarios.yaml files.
+
+Parsing YAML dominates collection once skills number in the hundreds, and
+every collection (the controller's and each xdist worker's) used to parse
+every scenarios.yaml again. The index stores each file's parsed content
+on disk, keyed by the file's SHA256; the session's DigestCache supplies
+that SHA256 from a stat() call, so an unchanged file is neither read nor
+parsed. Changed files are parsed with libyaml's CSafeLoader when PyYAML
+was built with it.
+
+Several xdist workers may save the same index; each save merges its
+entries into the ones on disk. Files whose parsed content does not survive
+a JSON round trip unchanged (timestamps, non-string keys) are not stored,
+so they are parsed again every time rather than served altered.
+"""
+
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+from debuglog import atomic_write
+
+
+# Bump when the stored form of a scenarios.yaml changes
+INDEX_VERSION = 1
+
+
+def json_round_trips(data) -> bool:
+    """Whether data comes back unchanged from json.dumps and json.loads."""
+    try:
+        return json.loads(json.dumps(data)) == data
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_yaml(path: Path):
+    """Parse a YAML file with the fastest available safe loader."""
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+class ScenarioIndex:
+    """
+    Parsed scenarios.yaml files, keyed by absolute path and validated by digest.
+
+    Args:
+        path: Index file, or None to keep the index in memory only
+        file_digest: Returns the SHA256 of a file (normally the session's
+            stat-validated DigestCache.file_digest)
+    """
+
+    def __init__(self, path: Optional[Path], file_digest: Callable[[str], str]):
+        self.path = path
+        self.file_digest = file_digest
+        self.entries: Dict[str, List] = self.load()
+        self.updates: Dict[str, List] = {}
+
+    def load(self) -> Dict[str, List]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+            return {}
+        return index.get("entries", {})
+
+    def scenarios(self, skill_dir: Path) -> Optional[Dict]:
+        """Return a skill's parsed scenarios.yaml, or None if it has none."""
+        scenarios_file = skill_dir / "tests" / "scenarios.yaml"
+        try:
+            digest = self.file_digest(str(scenarios_file))
+        except FileNotFoundError:
+            return None
+
+        key = str(scenarios_file.absolute())
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == digest:
+            return entry[1]
+
+        data = parse_yaml(scenarios_file)
+        self.entries[key] = [digest, data]
+        if json_round_trips(data):
+            self.updates[key] = self.entries[key]
+        return data
+
+    def save(self):
+        """Merge this session's parses into the index file, atomically."""
+        if self.path is None or not self.updates:
+            return
+        entries = self.load()
+        entries.update(self.updates)
+        try:
+            atomic_write(self.path, json.dumps({"version": INDEX_VERSION, "entries": entries}).encode())
+        except (OSError, TypeError, ValueError):
+            return  # Losing a save only costs parsing again next time
+        self.updates = {}
@@ -0,0 +1,288 @@
+"""
+Cost-weighted, skill-affine scheduling of test items across xdist workers.
+
+xdist's own schedulers hand out items in collection order without knowing
+what they cost, so a run often ends with one worker grinding through a
+tail of slow opus/sonnet samples while the others sit idle. With
+--cost-schedule the controller uses CostScheduling instead:
+- Each item's cost is estimated from its scenario's recorded wall times
+  (telemetry.jsonl, see telemetry.py), falling back to the median of its
+  model and then to DEFAULT_MODEL_COSTS
+- Items are queued per skill, most expensive first, and every worker only
+  holds the item it runs plus the next one; the rest stay with the
+  controller, so an idle worker always takes over pending work
+- A worker is sent the most expensive pending item of any skill, but
+  prefers skills it has already run (whose HOME and CLI command are
+  prepared, see conftest.prepare_scenario) unless another skill's item
+  costs more than SWITCH_COST seconds extra
+- With --scenario-batch (which adaptive sampling needs), a scenario's
+  samples are sent together, in order, to one worker. The scenario comes
+  from the item id, since xdist only adds its @group suffix under
+  --dist loadgroup; items that do carry one are grouped by it
+
+Usage:
+  pytest test/ -n 8 --cost-schedule -m generate
+"""
+
+import re
+import statistics
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import pytest
+from xdist.remote import Producer
+from xdist.report import report_collection_diff
+from xdist.workermanage import WorkerController, parse_tx_spec_config
+
+
+# Rough seconds per invocation by model, until telemetry has history
+DEFAULT_MODEL_COSTS = {"haiku": 30.0, "sonnet": 90.0, "opus": 180.0}
+DEFAULT_COST = 60.0
+
+# Estimated seconds a worker loses preparing a skill it has not run yet
+SWITCH_COST = 5.0
+
+# Items a worker holds: the one it runs and the next (a worker only starts
+# an item once it knows which one follows)
+MIN_PENDING = 2
+
+# Parametrized item ids: ...[skill::scenario[sample]], with an @group
+# suffix under --dist loadgroup
+ITEM_ID_PATTERN = re.compile(r"\[(?P<skill>[^\[\]:]+)::(?P<scenario>[^\[\]]+)\[\d+\]\](?:@.*)?$")
+
+ScenarioKey = Tuple[str, str]
+
+
+def item_scenario_key(nodeid: str) -> Optional[ScenarioKey]:
+    """The (skill, scenario) of a skill_scenario item id, or None."""
+    match = ITEM_ID_PATTERN.search(nodeid)
+    if match is None:
+        return None
+    return match.group("skill"), match.group("scenario")
+
+
+def estimate_costs(models: Dict[ScenarioKey, str], records: List[Dict]) -> Dict[ScenarioKey, float]:
+    """
+    Estimate the seconds an invocation of each scenario takes.
+
+    Args:
+        models: Model of each (skill, scenario)
+        records: Telemetry records (see telemetry.load)
+
+    Uses the median wall time recorded for the scenario with its current
+    model, else the median over every recorded invocation of that model,
+    else the model's default cost.
+    """
+    by_scenario: Dict[Tuple[str, str, str], List[float]] = {}
+    by_model: Dict[str, List[float]] = {}
+    for entry in records:
+        key = (entry.get("skill"), entry.get("scenario"), entry.get("model"))
+        by_scenario.setdefault(key, []).append(entry["wall"])
+        by_model.setdefault(entry.get("model"), []).append(entry["wall"])
+
+    costs = {}
+    for (skill, scenario), model in models.items():
+        walls = by_scenario.get((skill, scenario, model)) or by_model.get(model)
+        if walls:
+            costs[(skill, scenario)] = statistics.median(walls)
+        else:
+            costs[(skill, scenario)] = DEFAULT_MODEL_COSTS.get(model, DEFAULT_COST)
+    return costs
+
+
+class CostScheduling:
+    """
+    Hand out items most expensive first, keeping workers on warm skills.
+
+    Implements xdist's scheduler protocol (xdist.scheduler.protocol). The
+    unit of scheduling is an item, all items of an xdist_group, or with
+    group_scenarios all samples of a scenario; items without a
+    skill_scenario parameter cost nothing and run last.
+
+    Args:
+        config: The controller's pytest config
+        costs: Estimated seconds per (skill, scenario), see estimate_costs
+        log: xdist's scheduler log
+        group_scenarios: Send all samples of a scenario to one worker
+    """
+
+    def __init__(self, config: pytest.Config, costs: Dict[ScenarioKey, float], log: Optional[Producer] = None,
+                 group_scenarios: bool = False):
+        self.numnodes = len(parse_tx_spec_config(config))
+        self.config = config
+        self.costs = costs
+        self.group_scenarios = group_scenarios
+        self.log = Producer("costsched") if log is None else log.costsched
+        self.node2collection: Dict[WorkerController, List[str]] = {}
+        self.node2pending: Dict[WorkerController, List[int]] = {}
+        # Skill each worker works on, and every skill it has run
+        self.node2skill: Dict[WorkerController, str] = {}
+        self.node2warm: Dict[WorkerController, Set[str]] = {}
+        self.collection: Optional[List[str]] = None
+        # Pending units (lists of item indices) per skill, most expensive first
+        self.queues: Dict[str, List[List[int]]] = {}
+        self.item_costs: List[float] = []
+
+    @property
+    def nodes(self) -> List[WorkerController]:
+        return list(self.node2pending)
+
+    @property
+    def collection_is_completed(self) -> bool:
+        return len(self.node2collection) >= self.numnodes
+
+    @property
+    def tests_finished(self) -> bool:
+        if not self.collection_is_completed or self.queued:
+            return False
+        return all(len(pending) < MIN_PENDING for pending in self.node2pending.values())
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self.queued) or any(self.node2pending.values())
+
+    @property
+    def queued(self) -> int:
+        return sum(len(unit) for queue in self.queues.values() for unit in queue)
+
+    def add_node(self, node: WorkerController) -> None:
+        assert node not in self.node2pending
+        self.node2pending[node] = []
+        self.node2warm[node] = set()
+
+    def add_node_collection(self, node: WorkerController, collection: Sequence[str]) -> None:
+        assert node in self.node2pending
+        if self.collection is not None and list(collection) != self.collection:
+            # A replacement for a crashed worker collected something else
+            self.log(report_collection_diff(
+                self.collection, collection, next(iter(self.node2collection)).gateway.id, node.gateway.id
+            ))
+            return
+        self.node2collection[node] = list(collection)
+
+    def mark_test_complete(self, node: WorkerController, item_index: int, duration: float = 0) -> None:
+        self.node2pending[node].remove(item_index)
+        self.check_schedule()
+
+    def mark_test_pending(self, item: str) -> None:
+        assert self.collection is not None
+        self.requeue([self.collection.index(item)])
+        self.check_schedule()
+
+    def remove_pending_tests_from_node(self, node: WorkerController, indices: Sequence[int]) -> None:
+        # Never sends steal requests, but handles returned items all the same
+        returned = set(indices)
+        self.node2pending[node] = [i for i in self.node2pending[node] if i not in returned]
+        self.requeue(indices)
+        self.check_schedule()
+
+    def remove_node(self, node: WorkerController) -> Optional[str]:
+        pending = self.node2pending.pop(node)
+        self.node2skill.pop(node, None)
+        self.node2warm.pop(node, None)
+        crashitem = None
+        if pending:
+            assert self.collection is not None
+            crashitem = self.collection[pending.pop(0)]
+            self.requeue(pending)
+        self.check_schedule()
+        return crashitem
+
+    def schedule(self) -> None:
+        assert self.collection_is_completed
+        if self.collection is not None:
+            self.check_schedule()
+            return
+
+        collections = list(self.node2collection.items())
+        first_node, collection = collections[0]
+        for node, other in collections[1:]:
+            diff = report_collection_diff(collection, other, first_node.gateway.id, node.gateway.id)
+            if diff:
+                self.log(diff)
+                self.config.hook.pytest_collectreport(report=pytest.CollectReport(
+                    nodeid=node.gateway.id, outcome="failed", longrepr=diff, result=[],
+                ))
+                self.log("**Different tests collected, aborting run**")
+                return
+
+        self.collection = collection
+        self.item_costs = [self.item_cost(nodeid) for nodeid in collection]
+        self.requeue(range(len(collection)))
+        self.check_schedule()
+
+    def item_cost(self, nodeid: str) -> float:
+        key = item_scenario_key(nodeid)
+        return self.costs.get(key, 0.0) if key is not None else 0.0
+
+    def item_skill(self, index: int) -> str:
+        key = item_scenario_key(self.collection[index])
+        return key[0] if key is not None else ""
+
+    def unit_key(self, nodeid: str) -> Optional[str]:
+        """The group an item is scheduled with, or None to schedule it alone."""
+        if "@" in nodeid:
+            return nodeid.split("@")[-1]
+        key = item_scenario_key(nodeid) if self.group_scenarios else None
+        return "::".join(key) if key is not None else None
+
+    def unit_cost(self, unit: List[int]) -> float:
+        return sum(self.item_costs[index] for index in unit)
+
+    def requeue(self, indices) -> None:
+        """Put items back into their skills' queues as units, most expensive first."""
+        groups: Dict[str, List[int]] = {}
+        for index in sorted(indices):
+            key = self.unit_key(self.collection[index])
+            if key is not None:
+                groups.setdefault(key, []).append(index)
+            else:
+                self.queues.setdefault(self.item_skill(index), []).append([index])
+        for unit in groups.values():
+            self.queues.setdefault(self.item_skill(unit[0]), []).append(unit)
+        for queue in self.queues.values():
+            queue.sort(key=lambda unit: (-self.unit_cost(unit), unit[0]))
+
+    def pick_skill(self, node: WorkerController) -> Optional[str]:
+        """The skill whose next unit the node should run, or None if none is left."""
+        current = self.node2skill.get(node)
+        warm = self.node2warm[node]
+        busy = {skill for other, skill in self.node2skill.items() if other is not node}
+
+        def priority(skill: str):
+            queue = self.queues[skill]
+            head = self.unit_cost(queue[0]) - (0.0 if skill in warm else SWITCH_COST)
+            remaining = sum(self.unit_cost(unit) for unit in queue)
+            return -head, skill != current, skill in busy, -remaining
+
+        candidates = [skill for skill, queue in self.queues.items() if queue]
+        return min(candidates, key=priority, default=None)
+
+    def check_schedule(self) -> None:
+        """
+        Top up every worker to MIN_PENDING items, one unit per worker per
+        round so the most expensive units start on different workers, and
+        shut down workers once nothing is left for them.
+        """
+        if self.collection is None:
+            return
+        sent = True
+        while sent:
+            sent = False
+            for node, pending in self.node2pending.items():
+                if node.shutting_down or len(pending) >= MIN_PENDING:
+                    continue
+                skill = self.pick_skill(node)
+                if skill is None:
+                    break
+                unit = self.queues[skill].pop(0)
+                self.node2skill[node] = skill
+                self.node2warm[node].add(skill)
+                pending.extend(unit)
+                node.send_runtest_some(unit)
+                sent = True
+
+        if not self.queued:
+            for node, pending in self.node2pending.items():
+                if not node.shutting_down and len(pending) < MIN_PENDING:
+                    # Let the worker run its last item
+                    node.shutdown()
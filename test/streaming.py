@@ -0,0 +1,136 @@
+"""
+Streaming capture of CLI output with bounded memory.
+
+Instead of holding a process's whole stdout and stderr in memory, each
+stream is pumped chunk by chunk into a file through a BoundedWriter. A
+writer with a byte limit keeps the first half of the limit on disk and the
+last half in a ring buffer, and writes a truncation marker between them
+when the stream ends, so memory per stream never exceeds limit / 2 plus
+one chunk, however verbose the process is.
+"""
+
+import asyncio
+import os
+import signal
+from typing import BinaryIO, List, Optional
+
+
+# Bytes read from a pipe at a time
+CHUNK_SIZE = 64 * 1024
+
+
+def truncation_marker(dropped: int) -> bytes:
+    return f"\n[... truncated {dropped} bytes ...]\n".encode()
+
+
+def timeout_marker(timeout: float) -> bytes:
+    return f"\n[... timed out after {timeout:g}s, output is partial ...]\n".encode()
+
+
+class BoundedWriter:
+    """
+    Write a stream to a file, keeping at most `limit` bytes of it.
+
+    The first limit // 2 bytes go straight to the file; beyond that only
+    the most recent limit // 2 bytes are kept, and are written after a
+    truncation marker by close(). A limit of 0 means unlimited.
+    """
+
+    def __init__(self, f: BinaryIO, limit: int = 0):
+        self.f = f
+        self.limit = limit
+        self.head_limit = limit - limit // 2 if limit else 0
+        self.tail_limit = limit // 2
+        self.written = 0
+        self.dropped = 0
+        self.tail = bytearray()
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped > 0
+
+    def write(self, chunk: bytes):
+        if not self.limit:
+            self.f.write(chunk)
+            self.written += len(chunk)
+            return
+
+        if self.written < self.head_limit:
+            head = chunk[:self.head_limit - self.written]
+            self.f.write(head)
+            self.written += len(head)
+            chunk = chunk[len(head):]
+        if not chunk:
+            return
+
+        self.tail += chunk
+        overflow = len(self.tail) - self.tail_limit
+        if overflow > 0:
+            del self.tail[:overflow]
+            self.dropped += overflow
+
+    def close(self):
+        """Flush the kept tail, with a marker if anything was dropped."""
+        if self.dropped:
+            self.f.write(truncation_marker(self.dropped))
+        self.f.write(bytes(self.tail))
+        self.written += len(self.tail)
+        self.tail = bytearray()
+        self.f.flush()
+
+
+async def pump(stream: asyncio.StreamReader, writer: BoundedWriter):
+    """Copy a subprocess pipe into a writer until EOF."""
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        writer.write(chunk)
+
+
+async def run_streaming(
+    cmd: List[str],
+    stdout: BoundedWriter,
+    stderr: BoundedWriter,
+    timeout: Optional[float] = None,
+    **kwargs
+) -> Optional[int]:
+    """
+    Run cmd, streaming its stdout and stderr into the given writers.
+
+    Both writers are closed before returning. On timeout the process and
+    its children are killed, whatever it produced so far is kept and a timeout marker is
+    appended to stdout.
+
+    Returns:
+        The exit code, or None if the process timed out
+    """
+    # Own process group, so a timeout also kills children holding the pipes
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+        **kwargs
+    )
+    pumps = asyncio.gather(pump(proc.stdout, stdout), pump(proc.stderr, stderr), proc.wait())
+
+    returncode: Optional[int]
+    try:
+        await asyncio.wait_for(asyncio.shield(pumps), timeout)
+        returncode = proc.returncode
+    except asyncio.TimeoutError:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await pumps
+        returncode = None
+    finally:
+        stdout.close()
+        stderr.close()
+
+    if returncode is None:
+        stdout.f.write(timeout_marker(timeout))
+        stdout.f.flush()
+    return returncode
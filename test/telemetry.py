@@ -0,0 +1,251 @@
+"""
+Generation telemetry: timings, exit status and token counts per invocation.
+
+Every Claude invocation made by `make generate` appends one JSON line to its
+results directory's telemetry.jsonl:
+- skill, scenario, sample, model and the start time
+- wall: seconds the CLI ran; queue_wait and rate_wait: seconds the
+  invocation waited for a free slot, then for its model's rate limit
+  (generation engine only)
+- exit_status: the CLI's exit code, or null if it timed out
+- attempt: 1 for the first try, higher for engine retries
+- parallelism: concurrent invocations of the session (xdist workers or
+  engine slots)
+- api_model and token counts, when the Claude debug log copied to
+  {scenario}-{sample}.debug.txt reports them
+
+Each record is a single O_APPEND write, so parallel workers can share the
+file. The report aggregates every results directory's records into p50/p95
+wall times per skill, model, scenario and parallelism, plus the slowest
+samples, to tune WORKERS and scenario sample counts.
+
+Usage:
+  python test/telemetry.py report [--skill NAME] [--slowest N] [--json] [results_dir...]
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+TELEMETRY_NAME = "telemetry.jsonl"
+
+# Token counters of the API usage objects found in debug logs
+TOKEN_FIELDS = {
+    "input_tokens": "input_tokens",
+    "output_tokens": "output_tokens",
+    "cache_read_input_tokens": "cache_read_tokens",
+    "cache_creation_input_tokens": "cache_creation_tokens",
+}
+TOKEN_PATTERN = re.compile(r'"(%s)"\s*:\s*(\d+)' % "|".join(TOKEN_FIELDS))
+MODEL_PATTERN = re.compile(r'"model"\s*:\s*"([^"]+)"')
+
+
+@dataclass
+class Invocation:
+    """Telemetry of one Claude CLI invocation."""
+
+    skill: str
+    scenario: str
+    sample: int
+    model: str
+    started: float
+    wall: float
+    exit_status: Optional[int]
+    queue_wait: Optional[float] = None
+    rate_wait: Optional[float] = None
+    attempt: int = 1
+    parallelism: Optional[int] = None
+    api_model: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    cache_read_tokens: Optional[int] = None
+    cache_creation_tokens: Optional[int] = None
+
+
+def parse_debug_log(text: str) -> Dict:
+    """
+    Extract the API model and token counts from a Claude debug log.
+
+    Token counts are summed over every usage object the log reports; fields
+    the log does not mention are left out.
+    """
+    fields: Dict = {}
+    model = MODEL_PATTERN.search(text)
+    if model:
+        fields["api_model"] = model.group(1)
+    for name, count in TOKEN_PATTERN.findall(text):
+        key = TOKEN_FIELDS[name]
+        fields[key] = fields.get(key, 0) + int(count)
+    return fields
+
+
+def record(results_dir: Path, invocation: Invocation, debug_log: Optional[Path] = None):
+    """Append an invocation's telemetry, with token counts from its debug log."""
+    if debug_log is not None:
+        try:
+            text = debug_log.read_text(errors="replace")
+        except OSError:
+            text = ""
+        for key, value in parse_debug_log(text).items():
+            setattr(invocation, key, value)
+
+    line = json.dumps(asdict(invocation), separators=(",", ":")) + "\n"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    fd = os.open(results_dir / TELEMETRY_NAME, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
+
+
+def load(results_dirs: Iterable[Path]) -> List[Dict]:
+    """Read the telemetry records of the given results directories, skipping torn lines."""
+    records = []
+    for results_dir in results_dirs:
+        try:
+            with open(results_dir / TELEMETRY_NAME) as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    return records
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of values, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(records: List[Dict], key: str) -> List[Dict]:
+    """Invocation count, failures and latency percentiles per value of key."""
+    groups: Dict[str, List[Dict]] = {}
+    for entry in records:
+        groups.setdefault(str(entry.get(key)), []).append(entry)
+
+    rows = []
+    for name, entries in groups.items():
+        walls = [entry["wall"] for entry in entries]
+        waits = [entry["queue_wait"] for entry in entries if entry.get("queue_wait") is not None]
+        rate_waits = [entry["rate_wait"] for entry in entries if entry.get("rate_wait") is not None]
+        outputs = [entry["output_tokens"] for entry in entries if entry.get("output_tokens") is not None]
+        rows.append({
+            key: name,
+            "runs": len(entries),
+            "failed": sum(1 for entry in entries if entry.get("exit_status") != 0),
+            "p50": percentile(walls, 50),
+            "p95": percentile(walls, 95),
+            "queue_p95": percentile(waits, 95),
+            "rate_p95": percentile(rate_waits, 95),
+            "output_tokens_p50": percentile(outputs, 50),
+        })
+    return sorted(rows, key=lambda row: -row["p95"])
+
+
+def scenario_label(entry: Dict) -> str:
+    return f"{entry['skill']}::{entry['scenario']}"
+
+
+def build_report(records: List[Dict], slowest: int = 10) -> Dict:
+    """Aggregate telemetry records into the report's tables."""
+    for entry in records:
+        entry["scenario_label"] = scenario_label(entry)
+    return {
+        "invocations": len(records),
+        "by_skill": summarize(records, "skill"),
+        "by_model": summarize(records, "model"),
+        "by_scenario": summarize(records, "scenario_label"),
+        "by_parallelism": summarize(records, "parallelism"),
+        "slowest": sorted(records, key=lambda entry: -entry["wall"])[:slowest],
+    }
+
+
+def seconds(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}s"
+
+
+def render(report: Dict) -> str:
+    """Render a report as Markdown tables."""
+    lines = [f"# Generation telemetry: {report['invocations']} invocations"]
+    tables = [
+        ("Skill", "skill", report["by_skill"]),
+        ("Model", "model", report["by_model"]),
+        ("Scenario", "scenario_label", report["by_scenario"]),
+        ("Parallelism", "parallelism", report["by_parallelism"]),
+    ]
+    for title, key, rows in tables:
+        lines += [
+            "",
+            f"## By {title.lower()}",
+            "",
+            f"| {title} | Runs | Failed | p50 | p95 | Queue p95 | Rate p95 | Output tokens p50 |",
+            f"|{'-' * (len(title) + 2)}|------|--------|-----|-----|-----------|----------|-------------------|",
+        ]
+        for row in rows:
+            tokens = row["output_tokens_p50"]
+            lines.append(
+                f"| {row[key]} | {row['runs']} | {row['failed']} | {seconds(row['p50'])} | "
+                f"{seconds(row['p95'])} | {seconds(row['queue_p95'])} | "
+                f"{seconds(row['rate_p95'])} | {'-' if tokens is None else tokens} |"
+            )
+
+    lines += [
+        "",
+        "## Slowest samples",
+        "",
+        "| Wall | Sample | Model | Exit | Attempt | Started |",
+        "|------|--------|-------|------|---------|---------|",
+    ]
+    for entry in report["slowest"]:
+        status = "timeout" if entry.get("exit_status") is None else entry["exit_status"]
+        started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(entry["started"]))
+        lines.append(
+            f"| {seconds(entry['wall'])} | {entry['scenario_label']}[{entry['sample']}] | "
+            f"{entry.get('api_model') or entry['model']} | {status} | {entry.get('attempt', 1)} | {started} |"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report skill test generation telemetry")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    report = subparsers.add_parser("report", help="latency percentiles and slowest samples")
+    report.add_argument("results_dirs", type=Path, nargs="*",
+                        help="results directories (default: every skill's tests/results)")
+    report.add_argument("--skill", help="only this skill's invocations")
+    report.add_argument("--slowest", type=int, default=10, help="slowest samples to list (default: 10)")
+    report.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    args = parser.parse_args(argv)
+    results_dirs = args.results_dirs or sorted(Path("skills").glob("*/tests/results"))
+    records = load(results_dirs)
+    if args.skill:
+        records = [entry for entry in records if entry["skill"] == Path(args.skill).name]
+    if not records:
+        print("No generation telemetry found; run 'make generate' first", file=sys.stderr)
+        return 1
+
+    summary = build_report(records, args.slowest)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(render(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
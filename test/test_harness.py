@@ -0,0 +1,1296 @@
+"""
+Unit tests for the test harness helpers in conftest.py.
+
+These cover the machinery behind test_skills.py (digest computation,
+result handling, scheduling) rather than any individual skill, and run
+as part of the validation suite:
+  pytest -m test
+"""
+
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import stat
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+
+import conftest
+from conftest import (
+    DigestCache,
+    compute_skill_digest,
+    check_expectations,
+    file_digests,
+    merkle_root,
+    claude_job_invoker,
+    invoke_claude,
+    invoke_claude_streaming,
+    prepare_scenario,
+    group_collected_items,
+    pytest_collection_modifyitems,
+    read_result_digest,
+    read_result_digests,
+    result_is_current,
+    run_adaptive,
+    scenario_group,
+    scenario_scope,
+    scope_header,
+    selected_skills,
+    skill_files,
+    skill_result_tasks,
+    write_result,
+)
+from debuglog import DebugLogSink
+import expectations
+from expectations import CompiledExpectations, compile_expectations
+from generation import GenerationEngine, GenerationJob, RateLimiter, parse_rate_limits
+from provisioning import HomeTemplate
+from sampling import decide, skip_marker
+import scenarioindex
+from scenarioindex import ScenarioIndex
+from scheduling import CostScheduling, estimate_costs, item_scenario_key
+from streaming import BoundedWriter
+import scheduling
+import telemetry
+import validation
+from validation import BulkValidator, Verdict, VerdictCache, check_result_file
+
+
+# Stand-in for the claude CLI: sleeps, then echoes the model and prompt.
+# Fails once per marker file when STUB_CLAUDE_FAIL_ONCE is set, prints
+# STUB_CLAUDE_BYTES filler bytes first when set, and installs
+# STUB_CLAUDE_DEBUG as ~/.claude/debug/latest when set.
+STUB_CLAUDE = """#!/bin/bash
+prompt="${@: -1}"
+if [ -n "${STUB_CLAUDE_DEBUG:-}" ]; then
+    mkdir -p "$HOME/.claude/debug"
+    cp "$STUB_CLAUDE_DEBUG" "$HOME/.claude/debug/session.txt"
+    ln -sfn session.txt "$HOME/.claude/debug/latest"
+fi
+if [ -n "${STUB_CLAUDE_FAIL_ONCE:-}" ] && [ ! -e "$STUB_CLAUDE_FAIL_ONCE" ]; then
+    touch "$STUB_CLAUDE_FAIL_ONCE"
+    echo "transient failure" >&2
+    exit 1
+fi
+sleep "${STUB_CLAUDE_SLEEP:-0}"
+echo "debug: $*" >&2
+if [ -n "${STUB_CLAUDE_BYTES:-}" ]; then
+    head -c "$STUB_CLAUDE_BYTES" /dev/zero | tr '\\0' x
+    echo
+fi
+echo "model=$4"
+echo "prompt=$prompt"
+"""
+
+
+def make_skill(base: Path, name: str = "example-skill") -> Path:
+    """Create a minimal skill directory with a SKILL.md and a test file."""
+    skill_dir = base / name
+    (skill_dir / "tests" / "results").mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text(f"---\nname: {name}\n---\n\n# {name}\n")
+    (skill_dir / "tests" / "scenarios.yaml").write_text(f"skill_name: {name}\n")
+    return skill_dir
+
+
+@pytest.fixture
+def stub_claude(tmp_path, monkeypatch):
+    """Put a stub claude executable first on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "claude"
+    stub.write_text(STUB_CLAUDE)
+    stub.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return stub
+
+
+def make_jobs(skill_dir: Path, count: int, model: str = "haiku"):
+    return [
+        GenerationJob(
+            key=n,
+            prompt=f"question {n}",
+            skill_dir=skill_dir,
+            model=model,
+            scenario_name="scenario",
+            sample_num=n,
+        )
+        for n in range(1, count + 1)
+    ]
+
+
+class FakeItem:
+    """Minimal stand-in for a collected test_generate_result item."""
+
+    def __init__(self, skill_scenario, marker="generate"):
+        self.callspec = type("CallSpec", (), {"params": {"skill_scenario": skill_scenario}})()
+        self.marker = marker
+        self.added_markers = []
+
+    def get_closest_marker(self, name):
+        return name if name == self.marker else None
+
+    def add_marker(self, marker):
+        self.added_markers.append(marker)
+
+
+class FakeConfig:
+    """Minimal stand-in for pytest.Config used by collection hooks."""
+
+    def __init__(self, **options):
+        self.options = options
+        self.deselected = []
+        self.stash = pytest.Stash()
+        self.hook = type("Hook", (), {"pytest_deselected": lambda _, items: self.deselected.extend(items)})()
+
+    def getoption(self, name):
+        return self.options.get(name.lstrip("-").replace("-", "_"))
+
+
+def age_file(path: Path, seconds: int = 60):
+    """Move a file's mtime into the past so the digest cache trusts it."""
+    st = path.stat()
+    past = st.st_mtime_ns - seconds * 1_000_000_000
+    os.utime(path, ns=(past, past))
+
+
+@pytest.mark.test
+def test_digest_ignores_tests_directory(tmp_path):
+    """Files under tests/ do not contribute to the skill digest."""
+    skill_dir = make_skill(tmp_path)
+    before = compute_skill_digest(skill_dir)
+
+    (skill_dir / "tests" / "results" / "new.1.txt").write_text("output")
+
+    assert compute_skill_digest(skill_dir) == before
+
+
+@pytest.mark.test
+def test_digest_changes_with_content(tmp_path):
+    """Editing a skill file changes the skill digest."""
+    skill_dir = make_skill(tmp_path)
+    before = compute_skill_digest(skill_dir)
+
+    (skill_dir / "SKILL.md").write_text("changed")
+
+    assert compute_skill_digest(skill_dir) != before
+
+
+@pytest.mark.test
+def test_digest_cache_skips_unchanged_files(tmp_path):
+    """A warm cache returns the stored digest without re-reading the file."""
+    skill_dir = make_skill(tmp_path)
+    skill_file = skill_dir / "SKILL.md"
+    age_file(skill_file)
+
+    cache_file = tmp_path / "cache" / "digests.json"
+    cache = DigestCache(cache_file)
+    cold = compute_skill_digest(skill_dir, cache)
+    cache.save()
+    assert cache_file.exists()
+
+    # Same size, mtime and inode: only a stat signature change forces a read
+    st = skill_file.stat()
+    content = skill_file.read_bytes()
+    with open(skill_file, "r+b") as f:
+        f.write(content.swapcase())
+    os.utime(skill_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    warm = compute_skill_digest(skill_dir, DigestCache(cache_file))
+    assert warm == cold
+    assert compute_skill_digest(skill_dir) != cold
+
+
+@pytest.mark.test
+def test_digest_cache_invalidates_changed_files(tmp_path):
+    """Changing a file's stat signature invalidates only that entry."""
+    skill_dir = make_skill(tmp_path)
+    (skill_dir / "README.md").write_text("readme")
+    for path in (skill_dir / "SKILL.md", skill_dir / "README.md"):
+        age_file(path)
+
+    cache_file = tmp_path / "digests.json"
+    cache = DigestCache(cache_file)
+    compute_skill_digest(skill_dir, cache)
+    cache.save()
+
+    (skill_dir / "README.md").write_text("readme, edited")
+
+    cache = DigestCache(cache_file)
+    assert compute_skill_digest(skill_dir, cache) == compute_skill_digest(skill_dir)
+    readme_key = str((skill_dir / "README.md").absolute())
+    assert readme_key not in cache.entries
+    assert str((skill_dir / "SKILL.md").absolute()) in cache.entries
+
+
+@pytest.mark.test
+def test_digest_cache_tolerates_corrupt_file(tmp_path):
+    """An unreadable cache file is treated as empty."""
+    cache_file = tmp_path / "digests.json"
+    cache_file.write_text("{not json")
+
+    cache = DigestCache(cache_file)
+
+    assert cache.entries == {}
+
+
+@pytest.mark.test
+def test_scenario_index_parses_changed_files_only(tmp_path, monkeypatch):
+    """A saved index serves unchanged scenarios.yaml files without parsing them."""
+    skill_dir = make_skill(tmp_path)
+    scenarios_file = skill_dir / "tests" / "scenarios.yaml"
+    age_file(scenarios_file)
+    parsed = []
+
+    def parse_yaml(path):
+        parsed.append(path)
+        return scenarioindex.yaml.safe_load(path.read_text())
+
+    monkeypatch.setattr(scenarioindex, "parse_yaml", parse_yaml)
+    digest_file = tmp_path / "digests.json"
+    index_file = tmp_path / "index.json"
+    digests = DigestCache(digest_file)
+    index = ScenarioIndex(index_file, digests.file_digest)
+    assert index.scenarios(skill_dir) == {"skill_name": "example-skill"}
+    assert index.scenarios(tmp_path / "missing") is None
+    index.save()
+    digests.save()
+
+    warm = ScenarioIndex(index_file, DigestCache(digest_file).file_digest)
+    assert warm.scenarios(skill_dir) == {"skill_name": "example-skill"}
+    assert len(parsed) == 1
+
+    scenarios_file.write_text("skill_name: renamed\n")
+    assert warm.scenarios(skill_dir) == {"skill_name": "renamed"}
+    assert len(parsed) == 2
+
+    # Indexes written by another version are ignored
+    index_file.write_text('{"version": 0, "entries": {}}')
+    assert ScenarioIndex(index_file, digests.file_digest).entries == {}
+
+
+@pytest.mark.test
+def test_scenario_index_skips_content_json_would_alter(tmp_path):
+    """Parsed YAML that JSON cannot store unchanged is never written to the index."""
+    skill_dir = make_skill(tmp_path)
+    scenarios_file = skill_dir / "tests" / "scenarios.yaml"
+    scenarios_file.write_text("skill_name: example-skill\nsince: 2025-11-13\nsamples:\n  1: first\n")
+    age_file(scenarios_file)
+    index_file = tmp_path / "index.json"
+    digests = DigestCache(tmp_path / "digests.json")
+
+    index = ScenarioIndex(index_file, digests.file_digest)
+    data = index.scenarios(skill_dir)
+    index.save()
+
+    assert data["since"] == datetime.date(2025, 11, 13)
+    assert data["samples"] == {1: "first"}
+    assert not index_file.exists()
+    assert ScenarioIndex(index_file, digests.file_digest).scenarios(skill_dir) == data
+
+    # An entry that slipped in anyway does not make save() raise
+    index.updates["bad"] = ["digest", {datetime.date(2025, 11, 13)}]
+    index.save()
+    assert not index_file.exists()
+
+
+@pytest.mark.test
+def test_selected_skills_skips_discovery_for_skill_option(tmp_path, monkeypatch):
+    """--skill resolves its directory without listing every skill, once per session."""
+    skill_dir = make_skill(tmp_path)
+
+    def find_skills():
+        raise AssertionError("all skills discovered")
+
+    monkeypatch.setattr(conftest, "find_skills", find_skills)
+    config = FakeConfig(skill=str(skill_dir))
+
+    assert selected_skills(config) == [skill_dir]
+    assert selected_skills(config) is selected_skills(config)
+
+
+def scope_digest(skill_dir: Path, depends_on):
+    leaves = file_digests(skill_dir, skill_files(skill_dir), DigestCache())
+    scope = scenario_scope(list(leaves), depends_on)
+    return scope, merkle_root({rel_path: leaves[rel_path] for rel_path in scope})
+
+
+@pytest.mark.test
+def test_scenario_scope_matches_paths_patterns_and_directories(tmp_path):
+    skill_dir = make_skill(tmp_path)
+    (skill_dir / "README.md").write_text("readme")
+    (skill_dir / "scripts").mkdir()
+    (skill_dir / "scripts" / "a.sh").write_text("a")
+    (skill_dir / "scripts" / "lib").mkdir()
+    (skill_dir / "scripts" / "lib" / "b.tsv").write_text("b")
+    files = skill_files(skill_dir)
+
+    assert scenario_scope(files, []) == ["SKILL.md"]
+    assert scenario_scope(files, ["README.md"]) == ["README.md", "SKILL.md"]
+    assert scenario_scope(files, ["scripts/*.sh"]) == ["SKILL.md", "scripts/a.sh"]
+    assert scenario_scope(files, ["scripts/"]) == ["SKILL.md", "scripts/a.sh", "scripts/lib/b.tsv"]
+
+
+@pytest.mark.test
+def test_scope_digest_only_covers_dependencies(tmp_path):
+    """Editing a file only changes the digests of scenarios depending on it."""
+    skill_dir = make_skill(tmp_path)
+    (skill_dir / "README.md").write_text("readme")
+    _, skill_only = scope_digest(skill_dir, [])
+    _, with_readme = scope_digest(skill_dir, ["README.md"])
+
+    (skill_dir / "README.md").write_text("readme, edited")
+
+    assert scope_digest(skill_dir, [])[1] == skill_only
+    assert scope_digest(skill_dir, ["README.md"])[1] != with_readme
+
+    # A scope covering every file digests like the whole skill
+    assert scope_digest(skill_dir, ["*"])[1] == compute_skill_digest(skill_dir)
+
+
+@pytest.mark.test
+def test_scoped_and_legacy_headers_are_current(tmp_path):
+    """Scoped headers record their file list; whole-skill headers stay valid."""
+    skill_dir = make_skill(tmp_path)
+    (skill_dir / "README.md").write_text("readme")
+    scope, digest = scope_digest(skill_dir, [])
+    skill_scenario = {"digest": digest, "skill_digest": compute_skill_digest(skill_dir), "scope": scope}
+    results_dir = tmp_path / "results"
+
+    write_result(results_dir / "scoped.1.txt", scope_header(digest, scope), "output")
+    write_result(results_dir / "legacy.1.txt", skill_scenario["skill_digest"], "output")
+    write_result(results_dir / "stale.1.txt", "0" * 64, "output")
+
+    assert (results_dir / "scoped.1.txt").read_text().startswith(
+        f"# skill_digest: {digest} scope: SKILL.md\n"
+    )
+    headers = read_result_digests(results_dir)
+    assert headers["scoped.1.txt"] == read_result_digest(results_dir / "scoped.1.txt") == digest
+    assert Verdict(digest, []) == check_result_file(str(results_dir / "scoped.1.txt"), {})[1]
+    assert result_is_current(headers["scoped.1.txt"], skill_scenario)
+    assert result_is_current(headers["legacy.1.txt"], skill_scenario)
+    assert not result_is_current(headers["stale.1.txt"], skill_scenario)
+    assert not result_is_current(None, skill_scenario)
+
+    # Any change to the skill makes a whole-skill header stale
+    (skill_dir / "README.md").write_text("readme, edited")
+    skill_scenario["skill_digest"] = compute_skill_digest(skill_dir)
+    assert not result_is_current(headers["legacy.1.txt"], skill_scenario)
+    assert result_is_current(headers["scoped.1.txt"], skill_scenario)
+
+
+@pytest.mark.test
+def test_engine_respects_concurrency_limit(tmp_path, stub_claude, monkeypatch):
+    """No more than len(homes) invocations run at once, each in its own HOME."""
+    monkeypatch.setenv("STUB_CLAUDE_SLEEP", "0.2")
+    skill_dir = make_skill(tmp_path)
+    in_flight = []
+    peak = []
+    homes_seen = set()
+
+    async def counting_invoke(job, home):
+        assert home not in in_flight
+        in_flight.append(home)
+        peak.append(len(in_flight))
+        homes_seen.add(home)
+        try:
+            return await claude_job_invoker(job, home)
+        finally:
+            in_flight.remove(home)
+
+    homes = [tmp_path / f"home{n}" for n in range(3)]
+    for home in homes:
+        home.mkdir()
+    engine = GenerationEngine(homes, counting_invoke)
+
+    start = time.monotonic()
+    results = engine.run_all(make_jobs(skill_dir, 9))
+    elapsed = time.monotonic() - start
+
+    assert all(result.ok for result in results.values())
+    assert results[4].output == "model=haiku\nprompt=question 4\n"
+    assert max(peak) == 3
+    assert homes_seen == set(homes)
+    # Three waves of 0.2s rather than nine sequential invocations
+    assert elapsed < 9 * 0.2
+
+
+@pytest.mark.test
+def test_engine_retries_failed_invocations(tmp_path, stub_claude, monkeypatch):
+    """A transient CLI failure is retried and the output written on success."""
+    monkeypatch.setenv("STUB_CLAUDE_FAIL_ONCE", str(tmp_path / "failed-once"))
+    skill_dir = make_skill(tmp_path)
+    home = tmp_path / "home"
+    home.mkdir()
+    written = []
+
+    job = make_jobs(skill_dir, 1)[0]
+    job.on_success = written.append
+    engine = GenerationEngine([home], claude_job_invoker, max_retries=1, backoff=0)
+    result = engine.run_all([job])[1]
+
+    assert result.ok
+    assert result.attempts == 2
+    assert written == ["model=haiku\nprompt=question 1\n"]
+
+
+@pytest.mark.test
+def test_engine_reports_exhausted_retries(tmp_path, stub_claude, monkeypatch):
+    """Failures beyond max_retries are reported, not raised."""
+    monkeypatch.setenv("STUB_CLAUDE_FAIL_ONCE", str(tmp_path / "failed-once"))
+    skill_dir = make_skill(tmp_path)
+    home = tmp_path / "home"
+    home.mkdir()
+
+    engine = GenerationEngine([home], claude_job_invoker, max_retries=0)
+    result = engine.run_all(make_jobs(skill_dir, 1))[1]
+
+    assert not result.ok
+    assert result.attempts == 1
+    assert isinstance(result.error, subprocess.CalledProcessError)
+
+
+@pytest.mark.test
+def test_rate_limiter_spaces_requests():
+    """Requests for a rate-limited model start at most RPM per minute."""
+    async def acquire_all():
+        limiter = RateLimiter(per_minute=600)
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(acquire_all()) >= 0.3
+
+
+@pytest.mark.test
+def test_engine_rate_limits_starts_after_slot_wait(tmp_path):
+    """Jobs queued for a slot still start at most RPM per minute once slots free up."""
+    homes = [tmp_path / "home-1", tmp_path / "home-2"]
+    starts = []
+    begin = time.monotonic()
+
+    async def invoke(job, home):
+        starts.append(time.monotonic())
+        # Both slots free up at the same moment
+        await asyncio.sleep(max(0.0, begin + 0.4 - time.monotonic()))
+        return ""
+
+    jobs = make_jobs(make_skill(tmp_path), 4)
+    engine = GenerationEngine(homes, invoke, rate_limits={"haiku": 600})
+    results = engine.run_all(jobs)
+
+    assert all(result.ok for result in results.values())
+    assert min(b - a for a, b in zip(starts, starts[1:])) >= 0.09
+    # The last job waited for a slot, then for the rate limit
+    assert jobs[-1].queue_wait >= 0.3
+    assert jobs[-1].rate_wait >= 0.05
+
+
+@pytest.mark.test
+def test_parse_rate_limits():
+    assert parse_rate_limits(["sonnet=30", "opus = 10"]) == {"sonnet": 30.0, "opus": 10.0}
+    with pytest.raises(ValueError):
+        parse_rate_limits(["sonnet"])
+
+
+@pytest.mark.test
+def test_prepare_scenario_once_per_scenario(tmp_path, monkeypatch):
+    """Samples of a scenario reuse the HOME setup and tool list of the first."""
+    skill_dir = make_skill(tmp_path)
+    (skill_dir / "SKILL.md").write_text("---\nname: example-skill\nallowed-tools: Bash(jq:*)\n---\n")
+    calls = {"frontmatter": 0, "scenarios": 0}
+
+    def counting(name, func):
+        def wrapper(*args):
+            calls[name] += 1
+            return func(*args)
+        return wrapper
+
+    monkeypatch.setattr(conftest, "parse_skill_frontmatter",
+                        counting("frontmatter", conftest.parse_skill_frontmatter))
+    monkeypatch.setattr(conftest, "load_scenarios", counting("scenarios", conftest.load_scenarios))
+
+    home = tmp_path / "home"
+    commands = [prepare_scenario("question", skill_dir, "haiku", home) for _ in range(3)]
+
+    assert calls == {"frontmatter": 1, "scenarios": 1}
+    assert commands[0] == commands[2]
+    assert "--allowed-tools=Skill,Bash(jq:*)" in commands[0]
+    assert (home / ".claude" / "skills" / "example-skill").is_symlink()
+
+    # A second HOME is set up too, without rebuilding the command or
+    # re-reading copy_to_home
+    prepare_scenario("question", skill_dir, "haiku", tmp_path / "other-home")
+    assert calls == {"frontmatter": 1, "scenarios": 1}
+
+
+@pytest.mark.test
+def test_scenario_group_names_scenario():
+    skill_scenario = {"skill_name": "example-skill", "scenario_name": "basic", "sample_num": 2}
+    assert scenario_group(skill_scenario) == "example-skill::basic"
+
+
+@pytest.mark.test
+def test_read_result_digests(tmp_path):
+    """All headers of a results directory are read in one pass."""
+    results_dir = tmp_path / "results"
+    write_result(results_dir / "a.1.txt", "abc", "output")
+    write_result(results_dir / "a.2.txt", "def", "output")
+    (results_dir / "no-header.1.txt").write_text("output only")
+    (results_dir / "a-1.debug.log").write_text("# skill_digest: ignored")
+
+    assert read_result_digests(results_dir) == {"a.1.txt": "abc", "a.2.txt": "def"}
+    assert read_result_digests(tmp_path / "missing") == {}
+
+
+@pytest.mark.test
+def test_collection_deselects_up_to_date_results(tmp_path):
+    """Only generate items with missing or stale results stay selected."""
+    skill_dir = make_skill(tmp_path)
+    results_dir = skill_dir / "tests" / "results"
+    write_result(results_dir / "basic.1.txt", "current", "output")
+    write_result(results_dir / "basic.2.txt", "stale", "output")
+
+    def scenario(sample_num):
+        return {
+            "skill_dir": skill_dir,
+            "skill_name": skill_dir.name,
+            "scenario_name": "basic",
+            "sample_num": sample_num,
+            "digest": "current",
+        }
+
+    up_to_date, stale, missing = (FakeItem(scenario(n)) for n in (1, 2, 3))
+    validate = FakeItem(scenario(1), marker="test")
+    items = [up_to_date, stale, missing, validate]
+    config = FakeConfig(scenario_batch=True)
+
+    group_collected_items(config, items)
+    pytest_collection_modifyitems(config, items)
+
+    assert items == [stale, missing, validate]
+    assert config.deselected == [up_to_date]
+    assert [m.kwargs["name"] for m in stale.added_markers] == ["example-skill::basic"]
+    assert [m.kwargs["name"] for m in validate.added_markers] == ["validate-example-skill"]
+
+
+@pytest.mark.test
+def test_collection_reads_only_items_kept_by_markexpr(tmp_path, monkeypatch):
+    """Generate items that -m test dropped are never checked against their results."""
+    skill_dir = make_skill(tmp_path)
+    write_result(skill_dir / "tests" / "results" / "basic.1.txt", "current", "output")
+    skill_scenario = {
+        "skill_dir": skill_dir,
+        "skill_name": skill_dir.name,
+        "scenario_name": "basic",
+        "sample_num": 1,
+        "digest": "current",
+    }
+
+    def read_result_digests(*args, **kwargs):
+        raise AssertionError("result headers read")
+
+    monkeypatch.setattr(conftest, "read_result_digests", read_result_digests)
+    generate, validate = FakeItem(skill_scenario), FakeItem(skill_scenario, marker="test")
+    config = FakeConfig(scenario_batch=True, markexpr="test")
+    group_collected_items(config, [generate, validate])
+    # pytest's -m handling runs between the two hooks
+    items = [validate]
+
+    pytest_collection_modifyitems(config, items)
+
+    assert items == [validate]
+    assert config.deselected == []
+    assert [m.kwargs["name"] for m in validate.added_markers] == ["validate-example-skill"]
+
+
+def make_source_home(base: Path) -> Path:
+    """Create a fake real HOME with gcloud credentials and a kube config."""
+    home = base / "real-home"
+    gcloud = home / ".config" / "gcloud"
+    (gcloud / "configurations").mkdir(parents=True)
+    (gcloud / "credentials.db").write_text("secret")
+    (gcloud / "application_default_credentials.json").write_text("{}")
+    (gcloud / "configurations" / "config_default").write_text("[core]")
+    (gcloud / "active_config").symlink_to("configurations/config_default")
+    (home / ".kube").mkdir()
+    (home / ".kube" / "config").write_text("clusters: []")
+    return home
+
+
+@pytest.mark.test
+def test_home_template_hardlinks_worker_homes(tmp_path):
+    """Worker homes share the template's inodes instead of copying data."""
+    template = HomeTemplate(tmp_path / "template", make_source_home(tmp_path), method="hardlink")
+    homes = [tmp_path / f"worker{n}" for n in range(3)]
+
+    for home in homes:
+        assert template.materialize(".config/gcloud", home)
+        assert template.materialize(".kube/config", home)
+
+    template_adc = tmp_path / "template" / ".config" / "gcloud" / "application_default_credentials.json"
+    assert template_adc.stat().st_nlink == 1 + len(homes)
+    for home in homes:
+        gcloud = home / ".config" / "gcloud"
+        assert (gcloud / "application_default_credentials.json").stat().st_ino == template_adc.stat().st_ino
+        assert (gcloud / "active_config").is_symlink()
+        assert (gcloud / "active_config").read_text() == "[core]"
+        assert (home / ".kube" / "config").read_text() == "clusters: []"
+
+
+@pytest.mark.test
+def test_home_template_hardlink_keeps_workers_apart(tmp_path):
+    """Files tools write to are copied; hardlinked ones are read-only."""
+    template = HomeTemplate(tmp_path / "template", make_source_home(tmp_path), method="hardlink")
+    homes = [tmp_path / f"worker{n}" for n in range(2)]
+    for home in homes:
+        template.materialize(".config/gcloud", home)
+        template.materialize(".kube/config", home)
+
+    for rel in (".config/gcloud/credentials.db", ".config/gcloud/configurations/config_default", ".kube/config"):
+        inodes = {(home / rel).stat().st_ino for home in homes}
+        assert len(inodes) == len(homes), rel
+        assert (homes[0] / rel).stat().st_mode & stat.S_IWUSR, rel
+
+    (homes[0] / ".kube" / "config").write_text("clusters: [changed]")
+    assert (homes[1] / ".kube" / "config").read_text() == "clusters: []"
+    adc = homes[0] / ".config" / "gcloud" / "application_default_credentials.json"
+    assert adc.stat().st_mode & 0o222 == 0
+
+
+@pytest.mark.test
+def test_home_template_copy_method(tmp_path):
+    """The copy method gives each worker home independent files."""
+    template = HomeTemplate(tmp_path / "template", make_source_home(tmp_path), method="copy")
+    home = tmp_path / "worker"
+
+    template.materialize(".kube/config", home)
+
+    template_config = tmp_path / "template" / ".kube" / "config"
+    assert (home / ".kube" / "config").stat().st_ino != template_config.stat().st_ino
+
+
+@pytest.mark.test
+def test_home_template_auto_settles_on_working_method(tmp_path):
+    """Auto mode falls back from reflink when the filesystem lacks support."""
+    template = HomeTemplate(tmp_path / "template", make_source_home(tmp_path))
+
+    template.materialize(".config/gcloud", tmp_path / "worker")
+
+    assert template.method in ("reflink", "hardlink")
+    assert (tmp_path / "worker" / ".config" / "gcloud" / "credentials.db").read_text() == "secret"
+
+
+@pytest.mark.test
+def test_home_template_missing_source(tmp_path):
+    """Paths missing from the real HOME are skipped."""
+    template = HomeTemplate(tmp_path / "template", make_source_home(tmp_path))
+
+    assert not template.materialize(".config/gh", tmp_path / "worker")
+    assert not (tmp_path / "worker" / ".config" / "gh").exists()
+
+
+@pytest.mark.test
+def test_debug_log_sink_segments_and_archive(tmp_path):
+    """Segments are compacted into an archive readable per sample."""
+    sink = DebugLogSink(tmp_path / "results")
+    sink.write("basic", 1, "prompt one", "stderr one")
+    sink.write("basic", 2, "prompt two", "stderr two")
+    assert "stderr one" in sink.read("basic", 1)
+
+    assert sink.compact() == 2
+    assert not sink.segment_dir.exists()
+    assert "stderr two" in sink.read("basic", 2)
+    assert sink.read("basic", 3) is None
+
+    # The archive is a plain multi-member gzip file
+    combined = gzip.decompress(sink.archive.read_bytes()).decode()
+    assert "stderr one" in combined and "stderr two" in combined
+
+
+@pytest.mark.test
+def test_debug_log_sink_recompaction_replaces_entries(tmp_path):
+    """A regenerated sample replaces its archived log; others are kept."""
+    sink = DebugLogSink(tmp_path / "results")
+    sink.write("basic", 1, "prompt", "first run")
+    sink.write("basic", 2, "prompt", "untouched")
+    sink.compact()
+
+    sink.write("basic", 1, "prompt", "second run")
+    assert "second run" in sink.read("basic", 1)
+    assert sink.compact() == 1
+
+    assert "second run" in sink.read("basic", 1)
+    assert "first run" not in sink.read("basic", 1)
+    assert "untouched" in sink.read("basic", 2)
+    assert sorted(sink.load_index()) == ["basic.1", "basic.2"]
+
+
+@pytest.mark.test
+def test_bounded_writer_keeps_head_and_tail(tmp_path):
+    """Output beyond the limit is dropped from the middle with a marker."""
+    out = tmp_path / "out"
+    with open(out, "wb") as f:
+        writer = BoundedWriter(f, limit=10)
+        for chunk in (b"0123", b"456789", b"abcdefghij"):
+            writer.write(chunk)
+        writer.close()
+
+    assert writer.truncated
+    assert out.read_bytes() == b"01234\n[... truncated 10 bytes ...]\nfghij"
+
+
+@pytest.mark.test
+def test_streaming_invocation_writes_result(tmp_path, stub_claude):
+    """Stdout is streamed into the result file after the digest header."""
+    skill_dir = make_skill(tmp_path)
+    result_file = skill_dir / "tests" / "results" / "basic.1.txt"
+
+    asyncio.run(invoke_claude_streaming(
+        "question", skill_dir, "haiku", tmp_path / "home", "basic", 1, result_file, "abc"
+    ))
+
+    assert result_file.read_text() == "# skill_digest: abc\nmodel=haiku\nprompt=question\n"
+    assert not (result_file.parent / "basic.1.txt.partial").exists()
+    assert "debug: --print" in DebugLogSink(result_file.parent).read("basic", 1)
+
+
+@pytest.mark.test
+def test_streaming_invocation_caps_output(tmp_path, stub_claude, monkeypatch):
+    """Verbose output is truncated to the configured limit."""
+    monkeypatch.setenv("STUB_CLAUDE_BYTES", str(1024 * 1024))
+    skill_dir = make_skill(tmp_path)
+    result_file = skill_dir / "tests" / "results" / "basic.1.txt"
+
+    asyncio.run(invoke_claude_streaming(
+        "question", skill_dir, "haiku", tmp_path / "home", "basic", 1, result_file, "abc",
+        output_limit=4096
+    ))
+
+    content = result_file.read_text()
+    assert len(content) < 4096 + 200
+    assert "[... truncated" in content
+    assert content.endswith("prompt=question\n")
+
+
+@pytest.mark.test
+def test_streaming_invocation_keeps_partial_on_timeout(tmp_path, stub_claude, monkeypatch):
+    """A timed-out run keeps its partial output and leaves the result alone."""
+    monkeypatch.setenv("STUB_CLAUDE_SLEEP", "5")
+    skill_dir = make_skill(tmp_path)
+    result_file = skill_dir / "tests" / "results" / "basic.1.txt"
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        asyncio.run(invoke_claude_streaming(
+            "question", skill_dir, "haiku", tmp_path / "home", "basic", 1, result_file, "abc",
+            timeout=0.5
+        ))
+
+    assert not result_file.exists()
+    partial = (result_file.parent / "basic.1.txt.partial").read_text()
+    assert partial.startswith("# skill_digest: abc\n")
+    assert "timed out after 0.5s" in partial
+
+
+@pytest.fixture(params=["automaton", "find"])
+def matcher_backend(request, monkeypatch):
+    """Run expectation tests with and without pyahocorasick."""
+    if request.param == "automaton":
+        pytest.importorskip("ahocorasick")
+    else:
+        monkeypatch.setattr(expectations, "ahocorasick", None)
+    return request.param
+
+
+EXPECTED = {
+    "contains_keywords": ["PipelineRun", ["oomkilled", "out of memory"], "pipeline"],
+    "does_not_contain": ["I apologize", "pipelinerun"],
+}
+
+
+@pytest.mark.test
+def test_expectations_report_offsets(matcher_backend):
+    """One scan reports the offsets of every phrase, case-insensitively."""
+    compiled = CompiledExpectations(EXPECTED)
+    assert (compiled.automaton is not None) == (matcher_backend == "automaton")
+
+    hits = compiled.scan("The pipeline failed. Check the PipelineRun: OOMKilled")
+
+    assert hits["pipeline"] == [4, 31]
+    assert hits["pipelinerun"] == [31]
+    assert hits["oomkilled"] == [44]
+    assert hits["out of memory"] == []
+    assert hits["i apologize"] == []
+
+
+@pytest.mark.test
+def test_expectations_failure_messages(matcher_backend):
+    content = "I apologize, the PipelineRun is gone"
+
+    assert CompiledExpectations(EXPECTED).check(content) == [
+        "Should contain at least one of ['oomkilled', 'out of memory'] but doesn't",
+        "Should NOT contain 'I apologize' but does (at offset 0)",
+        "Should NOT contain 'pipelinerun' but does (at offset 17)",
+    ]
+
+
+@pytest.mark.test
+def test_expectations_compiled_once_per_block():
+    assert compile_expectations(dict(EXPECTED)) is compile_expectations(dict(EXPECTED))
+    assert check_expectations("pipelinerun out of memory", {"contains_keywords": [["x", "memory"]]}) == []
+
+
+@pytest.mark.test
+def test_expectations_count_non_overlapping(matcher_backend):
+    compiled = CompiledExpectations({"contains_keywords": [], "min_count": {"aa": 2}})
+
+    assert compiled.scan("aaaa")["aa"] == [0, 2]
+    assert compiled.check("aaa") == ["Should contain 'aa' at least 2 times but found 1"]
+    assert compiled.check("AA, aa") == []
+
+
+@pytest.mark.test
+def test_expectations_in_order(matcher_backend):
+    compiled = CompiledExpectations({
+        "contains_keywords": [],
+        "in_order": ["Snapshot", "Release", "PipelineRun"],
+    })
+
+    assert compiled.check("snapshot, then release, then the pipelinerun") == []
+    # A later occurrence satisfies the order even if an earlier one does not
+    assert compiled.check("PipelineRun Snapshot Release PipelineRun") == []
+    assert compiled.check("Release Snapshot PipelineRun") == [
+        "Should contain 'Release' in order after 'Snapshot' (offset 16) but doesn't",
+    ]
+    assert compiled.check("Release") == ["Should contain 'Snapshot' in order at all but doesn't"]
+
+
+@pytest.mark.test
+def test_expectations_matches_regex(matcher_backend):
+    compiled = CompiledExpectations({
+        "contains_keywords": ["digest"],
+        "matches_regex": [r"sha256:[0-9a-f]{8}", r"^exit code: \d+$"],
+    })
+
+    assert compiled.check("Digest SHA256:0123abcd\nexit code: 1\n") == []
+    assert compiled.check("digest sha256:xyz") == [
+        "Should match regex 'sha256:[0-9a-f]{8}' but doesn't",
+        "Should match regex '^exit code: \\d+$' but doesn't",
+    ]
+
+
+def make_results(skill_dir: Path, samples: int, content: str = "PipelineRun succeeded"):
+    """Give a skill one scenario with the given number of result samples."""
+    (skill_dir / "tests" / "scenarios.yaml").write_text(
+        "skill_name: example-skill\n"
+        "test_scenarios:\n"
+        "  - name: basic\n"
+        f"    samples: {samples}\n"
+        "    expected:\n"
+        "      contains_keywords: [pipelinerun]\n"
+    )
+    for n in range(1, samples + 1):
+        write_result(skill_dir / "tests" / "results" / f"basic.{n}.txt", "abc", content)
+
+
+@pytest.mark.test
+def test_check_result_file_splits_header(tmp_path):
+    result = tmp_path / "basic.1.txt"
+    result.write_bytes(b"# skill_digest: abc\r\nPipelineRun\r\n")
+    _, verdict = check_result_file(str(result), {"matches_regex": ["^pipelinerun$"]})
+    assert verdict == Verdict("abc", [])
+
+    result.write_bytes(b"")
+    _, verdict = check_result_file(str(result), {"contains_keywords": ["x"]})
+    assert verdict == Verdict(None, ["Should contain 'x' but doesn't"])
+
+
+@pytest.mark.test
+def test_bulk_validator_reuses_cached_verdicts(tmp_path):
+    skill_dir = make_skill(tmp_path)
+    make_results(skill_dir, 3)
+    tasks = skill_result_tasks(skill_dir)
+    tasks[str(skill_dir / "tests" / "results" / "missing.1.txt")] = {}
+    cache_file = tmp_path / "verdicts.json"
+
+    validator = BulkValidator(DigestCache().file_digest, VerdictCache(cache_file))
+    verdicts = validator.validate(tasks)
+    validator.cache.save()
+
+    assert validator.checked == 3
+    assert [v.failures for v in verdicts.values() if v] == [[], [], []]
+    assert verdicts[str(skill_dir / "tests" / "results" / "missing.1.txt")] is None
+
+    # A later session only re-checks the changed result
+    write_result(skill_dir / "tests" / "results" / "basic.2.txt", "abc", "no luck")
+    validator = BulkValidator(DigestCache().file_digest, VerdictCache(cache_file))
+    verdicts = validator.validate(tasks)
+
+    assert validator.checked == 1
+    assert verdicts[str(skill_dir / "tests" / "results" / "basic.2.txt")].failures == [
+        "Should contain 'pipelinerun' but doesn't"
+    ]
+
+
+@pytest.mark.test
+def test_bulk_validator_reports_unreadable_files(tmp_path):
+    skill_dir = make_skill(tmp_path)
+    make_results(skill_dir, 3)
+    results = skill_dir / "tests" / "results"
+    (results / "basic.2.txt").unlink()
+    (results / "basic.2.txt").mkdir()
+    (results / "basic.3.txt").write_bytes(b"")
+    tasks = skill_result_tasks(skill_dir)
+
+    validator = BulkValidator(DigestCache().file_digest, VerdictCache())
+    verdicts = validator.validate(tasks)
+
+    assert verdicts[str(results / "basic.1.txt")] == Verdict("abc", [])
+    assert verdicts[str(results / "basic.2.txt")].error.startswith("IsADirectoryError")
+    assert verdicts[str(results / "basic.3.txt")].failures == ["Should contain 'pipelinerun' but doesn't"]
+
+    # Unreadable files are reported by check_result_file too, and never cached
+    file_hash, verdict = check_result_file(str(results / "basic.2.txt"), {})
+    assert file_hash is None and verdict.error.startswith("IsADirectoryError")
+    assert len(validator.cache.entries) == 2
+
+
+@pytest.mark.test
+def test_bulk_validator_rechecks_changed_expectations(tmp_path):
+    skill_dir = make_skill(tmp_path)
+    make_results(skill_dir, 2)
+    cache = VerdictCache()
+    validator = BulkValidator(DigestCache().file_digest, cache)
+
+    validator.validate(skill_result_tasks(skill_dir))
+    tasks = {path: {"contains_keywords": ["succeeded"]} for path in skill_result_tasks(skill_dir)}
+    validator.validate(tasks)
+
+    assert validator.checked == 4
+
+
+@pytest.mark.test
+def test_bulk_validator_process_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(validation, "POOL_MIN_BATCH", 2)
+    skill_dir = make_skill(tmp_path)
+    make_results(skill_dir, 6)
+    validator = BulkValidator(DigestCache().file_digest, VerdictCache(), processes=2)
+
+    verdicts = validator.validate(skill_result_tasks(skill_dir))
+
+    assert validator.checked == 6
+    assert list(verdicts.values()) == [Verdict("abc", [])] * 6
+
+
+@pytest.mark.test
+def test_verdict_cache_merges_concurrent_saves(tmp_path):
+    cache_file = tmp_path / "verdicts.json"
+    first, second = VerdictCache(cache_file), VerdictCache(cache_file)
+    first.put("a:1", Verdict("abc", []))
+    second.put("b:1", Verdict("abc", ["failed"]))
+    first.save()
+    second.save()
+
+    merged = VerdictCache(cache_file)
+    assert merged.get("a:1") == Verdict("abc", [])
+    assert merged.get("b:1") == Verdict("abc", ["failed"])
+
+
+def telemetry_entry(skill: str, scenario: str, sample: int, wall: float, **fields) -> dict:
+    return {"skill": skill, "scenario": scenario, "sample": sample, "model": "haiku",
+            "started": 1763032800.0, "wall": wall, "exit_status": 0, **fields}
+
+
+@pytest.mark.test
+def test_invocation_records_telemetry(tmp_path, stub_claude, monkeypatch):
+    """Each invocation appends its timings and the debug log's token counts."""
+    debug_log = tmp_path / "debug.txt"
+    debug_log.write_text(
+        '[DEBUG] API request {"model":"claude-haiku-4-5","max_tokens":32000}\n'
+        '[DEBUG] usage {"input_tokens":12,"cache_read_input_tokens":3000,'
+        '"cache_creation":{"ephemeral_5m_input_tokens":0},"output_tokens":40}\n'
+        '[DEBUG] usage {"input_tokens":8,"output_tokens":60}\n'
+    )
+    monkeypatch.setenv("STUB_CLAUDE_DEBUG", str(debug_log))
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "4")
+    skill_dir = make_skill(tmp_path)
+    home = tmp_path / "home"
+    home.mkdir()
+
+    invoke_claude("question", skill_dir, "haiku", home, "basic", 2)
+
+    [entry] = telemetry.load([skill_dir / "tests" / "results"])
+    assert entry["wall"] > 0
+    assert {key: entry[key] for key in entry if key not in ("started", "wall")} == {
+        "skill": "example-skill", "scenario": "basic", "sample": 2, "model": "haiku",
+        "exit_status": 0, "queue_wait": None, "rate_wait": None, "attempt": 1, "parallelism": 4,
+        "api_model": "claude-haiku-4-5", "input_tokens": 20, "output_tokens": 100,
+        "cache_read_tokens": 3000, "cache_creation_tokens": None,
+    }
+
+
+@pytest.mark.test
+def test_engine_records_queue_wait_and_retries(tmp_path, stub_claude, monkeypatch):
+    """Engine invocations record their wait for a slot and every attempt."""
+    monkeypatch.setenv("STUB_CLAUDE_SLEEP", "0.2")
+    monkeypatch.setenv("STUB_CLAUDE_FAIL_ONCE", str(tmp_path / "failed-once"))
+    skill_dir = make_skill(tmp_path)
+    home = tmp_path / "home"
+    home.mkdir()
+
+    engine = GenerationEngine([home], claude_job_invoker, max_retries=1, backoff=0)
+    results = engine.run_all(make_jobs(skill_dir, 2))
+
+    assert all(result.ok for result in results.values())
+    entries = telemetry.load([skill_dir / "tests" / "results"])
+    assert [(entry["exit_status"], entry["parallelism"]) for entry in entries] == [(1, 1), (0, 1), (0, 1)]
+    assert sorted(entry["attempt"] for entry in entries) == [1, 1, 2]
+    # The last invocation waited for the only slot while another ran
+    assert max(entry["queue_wait"] for entry in entries) >= 0.15
+    assert entries[0]["input_tokens"] is None
+
+
+@pytest.mark.test
+def test_telemetry_report_percentiles_and_slowest(tmp_path, capsys):
+    """The report aggregates p50/p95 per skill and scenario and lists the slowest samples."""
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    lines = [telemetry_entry("a", "quick", n, float(n)) for n in range(1, 21)]
+    lines.append(telemetry_entry("b", "slow", 1, 90.0, exit_status=None, model="sonnet"))
+    (results_dir / telemetry.TELEMETRY_NAME).write_text(
+        "".join(json.dumps(line) + "\n" for line in lines) + '{"torn": \n'
+    )
+
+    assert telemetry.percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert telemetry.percentile([], 95) is None
+
+    report = telemetry.build_report(telemetry.load([results_dir]), slowest=2)
+    assert report["invocations"] == 21
+    assert [(row["skill"], row["runs"], row["failed"], row["p50"], row["p95"]) for row in report["by_skill"]] == \
+        [("b", 1, 1, 90.0, 90.0), ("a", 20, 0, 10.0, 19.0)]
+    assert [row["model"] for row in report["by_model"]] == ["sonnet", "haiku"]
+    assert [(entry["skill"], entry["sample"]) for entry in report["slowest"]] == [("b", 1), ("a", 20)]
+
+    assert telemetry.main(["report", "--skill", "a", "--slowest", "1", str(results_dir)]) == 0
+    output = capsys.readouterr().out
+    assert "| a::quick | 20 | 0 | 10.0s | 19.0s | - | - |" in output
+    assert "| 20.0s | a::quick[20] | haiku | 0 | 1 | 2025-11-13T11:20:00Z |" in output
+    assert "b::slow" not in output
+
+
+@pytest.mark.test
+def test_decide_settles_agreeing_samples_and_escalates_disagreement():
+    assert decide([], remaining=5, min_samples=2).generate == 2
+    assert decide([True], remaining=4, min_samples=2).generate == 1
+    assert not decide([True], remaining=4, min_samples=2).settled
+
+    settled = decide([False, False], remaining=3, min_samples=2)
+    assert settled.generate == 0
+    assert settled.skip_reason == "adaptive sampling, 2 earlier samples all failed"
+
+    escalated = decide([True, False], remaining=3, min_samples=2)
+    assert (escalated.generate, escalated.settled) == (3, False)
+
+
+def adaptive_jobs(skill_dir: Path, samples: int, first: int = 1):
+    """Generation jobs and skill_scenarios of one scenario expecting the stub's output."""
+    expected = {"contains_keywords": ["prompt=question"]}
+    scenarios = {}
+    jobs = []
+    for sample_num in range(first, samples + 1):
+        key = ("example-skill", "scenario", sample_num)
+        scenarios[key] = {
+            "skill_dir": skill_dir, "skill_name": "example-skill", "scenario_name": "scenario",
+            "sample_num": sample_num, "total_samples": samples, "min_samples": None,
+            "digest": "abc", "expected": expected, "expectations": compile_expectations(expected),
+        }
+        result_file = skill_dir / "tests" / "results" / f"scenario.{sample_num}.txt"
+        jobs.append(GenerationJob(
+            key=key, prompt="question", skill_dir=skill_dir, model="haiku",
+            scenario_name="scenario", sample_num=sample_num, result_file=result_file, digest="abc",
+            on_success=lambda output, result_file=result_file: write_result(result_file, "abc", output),
+        ))
+    return jobs, scenarios
+
+
+@pytest.mark.test
+def test_adaptive_generation_skips_settled_samples(tmp_path, stub_claude):
+    """Once min_samples results agree, the remaining samples get skip markers."""
+    skill_dir = make_skill(tmp_path)
+    home = tmp_path / "home"
+    home.mkdir()
+    jobs, scenarios = adaptive_jobs(skill_dir, 5)
+
+    engine = GenerationEngine([home], claude_job_invoker)
+    results = run_adaptive(engine, jobs, scenarios, FakeConfig(adaptive_min=2))
+
+    assert [results[job.key].skipped for job in jobs] == \
+        [None, None] + ["adaptive sampling, 2 earlier samples all passed"] * 3
+    assert all(result.ok for result in results.values())
+    results_dir = skill_dir / "tests" / "results"
+    assert (results_dir / "scenario.3.txt").read_text() == \
+        "# skill_digest: abc\n" + skip_marker("adaptive sampling, 2 earlier samples all passed")
+
+    # Skipped samples validate as skipped, and are only current in adaptive runs
+    _, verdict = check_result_file(str(results_dir / "scenario.3.txt"), {"contains_keywords": ["x"]})
+    assert verdict == Verdict("abc", [], "adaptive sampling, 2 earlier samples all passed")
+    assert sorted(read_result_digests(results_dir)) == [f"scenario.{n}.txt" for n in range(1, 6)]
+    assert sorted(read_result_digests(results_dir, include_skipped=False)) == ["scenario.1.txt", "scenario.2.txt"]
+
+
+@pytest.mark.test
+def test_adaptive_generation_escalates_on_disagreement(tmp_path, stub_claude):
+    """A sample disagreeing with an earlier one makes every remaining sample run."""
+    skill_dir = make_skill(tmp_path)
+    home = tmp_path / "home"
+    home.mkdir()
+    write_result(skill_dir / "tests" / "results" / "scenario.1.txt", "abc", "no answer\n")
+    jobs, scenarios = adaptive_jobs(skill_dir, 4, first=2)
+    invoked = []
+
+    async def invoke(job, home):
+        invoked.append(job.sample_num)
+        return await claude_job_invoker(job, home)
+
+    results = run_adaptive(GenerationEngine([home], invoke), jobs, scenarios, FakeConfig(adaptive_min=2))
+
+    assert invoked == [2, 3, 4]
+    assert all(result.ok and result.skipped is None for result in results.values())
+
+
+
+class FakeNode:
+    """Minimal stand-in for an xdist WorkerController."""
+
+    def __init__(self, name):
+        self.gateway = type("Gateway", (), {"id": name})()
+        self.sent = []
+        self.shutting_down = False
+
+    def send_runtest_some(self, indices):
+        self.sent.extend(indices)
+
+    def shutdown(self):
+        self.shutting_down = True
+
+
+@pytest.mark.test
+def test_estimate_costs_prefers_scenario_history():
+    records = [
+        {"skill": "a", "scenario": "slow", "model": "haiku", "wall": wall} for wall in (100.0, 120.0, 140.0)
+    ] + [{"skill": "a", "scenario": "other", "model": "haiku", "wall": 10.0}]
+    models = {("a", "slow"): "haiku", ("a", "other"): "haiku", ("a", "new"): "haiku",
+              ("b", "slow"): "opus", ("b", "odd"): "unknown"}
+
+    costs = estimate_costs(models, records)
+
+    assert costs[("a", "slow")] == 120.0
+    assert costs[("a", "other")] == 10.0
+    # No history for the scenario: median of its model, then the model default
+    assert costs[("a", "new")] == 110.0
+    assert costs[("b", "slow")] == scheduling.DEFAULT_MODEL_COSTS["opus"]
+    assert costs[("b", "odd")] == scheduling.DEFAULT_COST
+
+
+@pytest.mark.test
+def test_item_scenario_key_parses_item_ids():
+    nodeid = "test/test_skills.py::test_generate_result[my-skill::basic[2]]"
+    assert item_scenario_key(nodeid) == ("my-skill", "basic")
+    assert item_scenario_key(nodeid + "@my-skill::basic") == ("my-skill", "basic")
+    assert item_scenario_key("test/test_skills.py::test_all_skills_in_readme") is None
+
+
+@pytest.mark.test
+def test_cost_scheduling_runs_longest_first_on_warm_skills():
+    """Expensive items start first on different workers; workers then stay on their skill."""
+    config = type("Config", (), {"getvalue": lambda self, name: ["2*popen"]})()
+    costs = {("a", "fast"): 30.0, ("b", "slow"): 180.0, ("b", "fast"): 30.0}
+    collection = [f"test_skills.py::test_generate_result[{skill}::{scenario}[{n}]]"
+                  for skill, scenario, samples in (("a", "fast", 3), ("b", "slow", 2), ("b", "fast", 1))
+                  for n in range(1, samples + 1)]
+    a_fast, b_slow, b_fast = [0, 1, 2], [3, 4], [5]
+    sched = CostScheduling(config, costs)
+    first, second = FakeNode("gw0"), FakeNode("gw1")
+    for node in (first, second):
+        sched.add_node(node)
+        sched.add_node_collection(node, collection)
+    assert sched.collection_is_completed
+
+    sched.schedule()
+
+    # The slow items on different workers, then b stays warm on the first
+    assert first.sent == [b_slow[0], b_fast[0]]
+    assert second.sent == [b_slow[1], a_fast[0]]
+
+    sched.mark_test_complete(first, b_slow[0])
+    sched.mark_test_complete(second, b_slow[1])
+    assert first.sent[-1] == a_fast[1] and second.sent[-1] == a_fast[2]
+    assert not sched.tests_finished
+
+    # Nothing left to hand out: workers are shut down to run their last item
+    sched.mark_test_complete(first, b_fast[0])
+    assert first.shutting_down and not second.shutting_down
+    sched.mark_test_complete(second, a_fast[0])
+    assert second.shutting_down
+    assert sched.tests_finished
+
+
+@pytest.mark.test
+def test_cost_scheduling_keeps_groups_together():
+    """Items of an xdist_group are sent to one worker in collection order."""
+    config = type("Config", (), {"getvalue": lambda self, name: ["2*popen"]})()
+    collection = [f"test_skills.py::test_generate_result[a::{scenario}[{n}]]@a::{scenario}"
+                  for scenario in ("fast", "slow") for n in (1, 2, 3)]
+    sched = CostScheduling(config, {("a", "fast"): 30.0, ("a", "slow"): 90.0})
+    first, second = FakeNode("gw0"), FakeNode("gw1")
+    for node in (first, second):
+        sched.add_node(node)
+        sched.add_node_collection(node, collection)
+
+    sched.schedule()
+
+    assert first.sent == [3, 4, 5]
+    assert second.sent == [0, 1, 2]
+    assert sched.queued == 0
+
+
+@pytest.mark.test
+def test_cost_scheduling_groups_scenarios_without_loadgroup():
+    """Under --scenario-batch, a scenario's samples go to one worker even without @group ids."""
+    config = type("Config", (), {"getvalue": lambda self, name: ["2*popen"]})()
+    scenarios = [("a", "fast"), ("a", "slow"), ("b", "slow"), ("b", "fast")]
+    # Item ids as xdist reports them without --dist loadgroup
+    collection = [f"test/test_skills.py::test_generate_result[{skill}::{scenario}[{n}]]"
+                  for skill, scenario in scenarios for n in (1, 2, 3)]
+    costs = {("a", "fast"): 30.0, ("a", "slow"): 90.0, ("b", "slow"): 180.0, ("b", "fast"): 30.0}
+
+    def run(**options):
+        sched = CostScheduling(config, costs, **options)
+        nodes = [FakeNode("gw0"), FakeNode("gw1")]
+        for node in nodes:
+            sched.add_node(node)
+            sched.add_node_collection(node, collection)
+        sched.schedule()
+        while not sched.tests_finished:
+            for node in nodes:
+                if sched.node2pending[node]:
+                    sched.mark_test_complete(node, sched.node2pending[node][0])
+        return {
+            key: {node.gateway.id for node in nodes for index in node.sent if item_scenario_key(collection[index]) == key}
+            for key in scenarios
+        }, nodes
+
+    placement, nodes = run(group_scenarios=True)
+    assert all(len(workers) == 1 for workers in placement.values()), placement
+    # Samples of a scenario are sent in collection order
+    for node in nodes:
+        for key in scenarios:
+            sent = [index for index in node.sent if item_scenario_key(collection[index]) == key]
+            assert sent == sorted(sent)
+
+    placement, _ = run()
+    assert any(len(workers) > 1 for workers in placement.values())
@@ -0,0 +1,1179 @@
+"""
+Tests for the helper scripts shipped with skills.
+
+The scripts run against fixtures and stand-ins for the CLIs and services
+they wrap (cosign, the GitHub API, kubectl, ...), so no cluster, registry or
+network access is needed. They run as
+part of the validation suite:
+  pytest -m test
+"""
+
+import base64
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+PROVENANCE = Path("skills/working-with-provenance")
+GITHUB_NAVIGATION = Path("skills/navigating-github-to-konflux-pipelines")
+COMPONENT_BUILD_STATUS = Path("skills/component-build-status")
+PIPELINE_DEBUGGING = Path("skills/debugging-pipeline-failures")
+TRIAGE_FIXTURES = PIPELINE_DEBUGGING / "tests" / "fixtures" / "triage"
+APPLICATION_FIXTURES = COMPONENT_BUILD_STATUS / "tests" / "fixtures" / "application-status"
+ATTESTATION = PROVENANCE / "tests" / "fixtures" / "attestation.json"
+
+IMAGE = "quay.io/redhat-user-workloads/konflux-ai-sig-tenant/llm-compressor-demo"
+SHA = "7f9a553dd100ba700fc8f9da942f8dfcecf6a1bd"
+DIGEST = "sha256:" + "3c7d2f1b" * 8
+
+# Stand-in for cosign: resolves every tag to $FAKE_COSIGN_DIGEST, prints
+# $FAKE_COSIGN_ATTESTATION for `download attestation` and logs every call
+# to $FAKE_COSIGN_LOG. Each call takes $FAKE_COSIGN_SLEEP seconds.
+FAKE_COSIGN = """#!/bin/bash
+echo "$*" >> "$FAKE_COSIGN_LOG"
+sleep "${FAKE_COSIGN_SLEEP:-0}"
+case "$1 $2" in
+    "triangulate --type")
+        echo "${4%:*}:${FAKE_COSIGN_DIGEST/:/-}.att" ;;
+    "download attestation")
+        cat "$FAKE_COSIGN_ATTESTATION" ;;
+    *)
+        echo "fake cosign: unsupported command: $*" >&2
+        exit 1 ;;
+esac
+"""
+
+# Stand-in for kubectl: answers `get KIND ...` with $FAKE_KUBECTL_FIXTURES/KIND.json,
+# `get --raw PATH` from the API server at $FAKE_KUBE_API, and the current
+# namespace with $FAKE_KUBECTL_NAMESPACE. `annotate` succeeds, and
+# `logs POD -c CONTAINER --tail N` tails $FAKE_KUBECTL_FIXTURES/logs/POD/CONTAINER.log.
+# Logs every call to $FAKE_KUBECTL_LOG.
+FAKE_KUBECTL = """#!/bin/bash
+echo "$*" >> "$FAKE_KUBECTL_LOG"
+if [ "$1" = annotate ]; then
+    exit 0
+elif [ "$1" = logs ] && [ -f "$FAKE_KUBECTL_FIXTURES/logs/$2/$4.log" ]; then
+    tail -n "$6" "$FAKE_KUBECTL_FIXTURES/logs/$2/$4.log"
+elif [ "$1 $2" = "get --raw" ]; then
+    exec curl -sSN --fail "$FAKE_KUBE_API$3"
+elif [ "$1 $2" = "config view" ]; then
+    echo "$FAKE_KUBECTL_NAMESPACE"
+elif [ "$1" = get ] && [ -f "$FAKE_KUBECTL_FIXTURES/$2.json" ]; then
+    cat "$FAKE_KUBECTL_FIXTURES/$2.json"
+else
+    echo "fake kubectl: unsupported command: $*" >&2
+    exit 1
+fi
+"""
+
+pytestmark = pytest.mark.skipif(shutil.which("jq") is None, reason="jq is not installed")
+
+
+@pytest.fixture
+def fake_cosign(tmp_path, monkeypatch):
+    """Put a fake cosign serving the fixture attestation first on PATH, with an empty cache."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "cosign"
+    stub.write_text(FAKE_COSIGN)
+    stub.chmod(0o755)
+    log = tmp_path / "cosign.log"
+    log.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_COSIGN_LOG", str(log))
+    monkeypatch.setenv("FAKE_COSIGN_ATTESTATION", str(ATTESTATION.resolve()))
+    monkeypatch.setenv("FAKE_COSIGN_DIGEST", DIGEST)
+    monkeypatch.setenv("PROVENANCE_CACHE_DIR", str(tmp_path / "cache"))
+    return log
+
+
+def cosign_calls(log: Path):
+    calls = log.read_text().splitlines()
+    log.write_text("")
+    return calls
+
+
+def cache_key(repository: str) -> str:
+    """File name prefix of a repository's provenance cache entries."""
+    return repository.replace("/", "%")
+
+
+def run_script(script: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([str(script), *args], capture_output=True, text=True, timeout=30)
+
+
+def write_attestation(path: Path, annotations: dict) -> Path:
+    """Write a one-envelope attestation with the given PaC annotations."""
+    statement = {
+        "subject": [{"name": IMAGE}],
+        "predicate": {
+            "buildConfig": {"tasks": [{"invocation": {"environment": {"annotations": annotations}}}]}
+        },
+    }
+    payload = base64.b64encode(json.dumps(statement).encode()).decode()
+    path.write_text(json.dumps({"payload": payload}) + "\n")
+    return path
+
+
+@pytest.mark.test
+def test_provenance_extracts_all_fields_from_fixture():
+    result = run_script(PROVENANCE / "scripts" / "provenance.sh", "--attestation", str(ATTESTATION), f"{IMAGE}:tag")
+
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == {
+        "image": f"{IMAGE}:tag",
+        "subject": IMAGE,
+        "digest": None,
+        "repo_url": "https://github.com/ralphbean/llm-compressor-hermetic-demo",
+        "sha": SHA,
+        "log_url": "https://konflux-ui.apps.kflux-prd-rh03.nnv1.p1.openshiftapps.com"
+                   "/ns/konflux-ai-sig-tenant/pipelinerun/llm-compressor-on-push-lvnc5",
+        "origin_pullspec": f"{IMAGE}:{SHA}",
+        "commit_link": f"https://github.com/ralphbean/llm-compressor-hermetic-demo/commit/{SHA}",
+    }
+
+
+@pytest.mark.test
+def test_provenance_gitlab_commit_link_and_console_log_url(tmp_path):
+    attestation = write_attestation(tmp_path / "attestation.json", {
+        "pipelinesascode.tekton.dev/repo-url": "https://gitlab.com/org/repo",
+        "pipelinesascode.tekton.dev/sha": "abc123",
+        "pipelinesascode.tekton.dev/log-url": "https://console.redhat.com/application-pipeline/ns/x/pipelinerun/y",
+    })
+
+    result = run_script(PROVENANCE / "scripts" / "provenance.sh", "--attestation", str(attestation))
+    fields = json.loads(result.stdout)
+
+    assert fields["commit_link"] == "https://gitlab.com/org/repo/-/commit/abc123"
+    assert fields["log_url"] == (
+        "https://konflux-ui.apps.stone-prd-rh01.pg1f.p1.openshiftapps.com/ns/x/pipelinerun/y"
+    )
+
+
+@pytest.mark.test
+def test_provenance_without_build_provenance_fails(tmp_path):
+    attestation = tmp_path / "attestation.json"
+    attestation.write_text("")
+
+    result = run_script(PROVENANCE / "scripts" / "provenance.sh", "--attestation", str(attestation))
+
+    assert result.returncode != 0
+    assert "no build provenance" in result.stderr
+
+
+@pytest.mark.parametrize("script, expected", [
+    ("build-git-repo.sh", "https://github.com/ralphbean/llm-compressor-hermetic-demo"),
+    ("build-commit-link.sh", f"🐙 https://github.com/ralphbean/llm-compressor-hermetic-demo/commit/{SHA}"),
+    ("build-origin-pullspec.sh", f"{IMAGE}:{SHA}"),
+    ("build-log-link.sh", "https://konflux-ui.apps.kflux-prd-rh03.nnv1.p1.openshiftapps.com"
+                          "/ns/konflux-ai-sig-tenant/pipelinerun/llm-compressor-on-push-lvnc5"),
+])
+@pytest.mark.test
+def test_provenance_views_download_once(fake_cosign, script, expected):
+    result = run_script(PROVENANCE / "scripts" / script, f"{IMAGE}:{SHA}")
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == f"{expected}\n"
+    assert cosign_calls(fake_cosign) == [
+        f"triangulate --type attestation {IMAGE}:{SHA}",
+        f"download attestation {IMAGE}@{DIGEST}",
+    ]
+
+
+@pytest.mark.test
+def test_provenance_cache_by_digest(fake_cosign):
+    script = PROVENANCE / "scripts" / "provenance.sh"
+    first = run_script(script, f"{IMAGE}:{SHA}")
+    assert json.loads(first.stdout)["digest"] == DIGEST
+    cosign_calls(fake_cosign)
+
+    # A tag is re-resolved, but its attestation comes from the cache
+    assert run_script(script, f"{IMAGE}:{SHA}").stdout == first.stdout
+    assert cosign_calls(fake_cosign) == [f"triangulate --type attestation {IMAGE}:{SHA}"]
+
+    # A digest pullspec needs no registry access at all
+    by_digest = run_script(script, f"{IMAGE}@{DIGEST}")
+    assert json.loads(by_digest.stdout)["repo_url"] == json.loads(first.stdout)["repo_url"]
+    assert cosign_calls(fake_cosign) == []
+
+
+@pytest.mark.test
+def test_provenance_offline_mode(fake_cosign):
+    script = PROVENANCE / "scripts" / "provenance.sh"
+
+    missing = run_script(script, "--offline", f"{IMAGE}:{SHA}")
+    assert missing.returncode != 0
+    assert "never resolved" in missing.stderr
+
+    online = run_script(script, f"{IMAGE}:{SHA}")
+    cosign_calls(fake_cosign)
+    offline = run_script(script, "--offline", f"{IMAGE}:{SHA}")
+
+    assert offline.returncode == 0, offline.stderr
+    assert offline.stdout == online.stdout
+    assert cosign_calls(fake_cosign) == []
+
+    other = run_script(script, "--offline", f"{IMAGE}@sha256:{'0' * 64}")
+    assert other.returncode != 0
+    assert "no cached attestation" in other.stderr
+
+
+@pytest.mark.test
+def test_provenance_cache_evicts_least_recently_used(fake_cosign, tmp_path, monkeypatch):
+    script = PROVENANCE / "scripts" / "provenance.sh"
+    cache_dir = tmp_path / "cache"
+    digests = [f"sha256:{c * 64}" for c in "abc"]
+
+    for digest in digests[:2]:
+        assert run_script(script, f"{IMAGE}@{digest}").returncode == 0
+        time.sleep(0.05)
+    # Allow exactly the two cached statements, then use the first one again
+    used = subprocess.run(["du", "-sk", str(cache_dir)], capture_output=True, text=True)
+    monkeypatch.setenv("PROVENANCE_CACHE_MAX_KB", used.stdout.split()[0])
+    assert run_script(script, f"{IMAGE}@{digests[0]}").returncode == 0
+    time.sleep(0.05)
+
+    assert run_script(script, f"{IMAGE}@{digests[2]}").returncode == 0
+
+    assert sorted(p.name for p in cache_dir.glob("*.json")) == [
+        f"{cache_key(IMAGE)}@sha256-{'a' * 64}.json",
+        f"{cache_key(IMAGE)}@sha256-{'c' * 64}.json",
+    ]
+
+
+@pytest.mark.test
+def test_provenance_cache_evicts_several_entries_at_once(fake_cosign, tmp_path, monkeypatch):
+    script = PROVENANCE / "scripts" / "provenance.sh"
+    # Entries are listed without parsing ls, so spaces in the path are fine
+    cache_dir = tmp_path / "provenance cache"
+    monkeypatch.setenv("PROVENANCE_CACHE_DIR", str(cache_dir))
+    digests = [f"sha256:{c * 64}" for c in "abcd"]
+
+    for n, digest in enumerate(digests[:3]):
+        assert run_script(script, f"{IMAGE}@{digest}").returncode == 0
+        if n == 0:
+            # Room for a single statement
+            used = subprocess.run(["du", "-sk", str(cache_dir)], capture_output=True, text=True)
+        time.sleep(0.05)
+    monkeypatch.setenv("PROVENANCE_CACHE_MAX_KB", used.stdout.split()[0])
+
+    assert run_script(script, f"{IMAGE}@{digests[3]}").returncode == 0
+
+    assert [p.name for p in cache_dir.glob("*.json")] == [f"{cache_key(IMAGE)}@sha256-{'d' * 64}.json"]
+
+
+@pytest.mark.test
+def test_trace_images_dedupes_by_digest(fake_cosign, tmp_path):
+    digest = f"sha256:{'a' * 64}"
+    result = run_script(
+        PROVENANCE / "scripts" / "trace-images.sh", "-j", "4",
+        f"quay.io/org/one@{digest}", f"quay.io/org/two@{digest}",
+        "quay.io/org/three:v1", "quay.io/org/three:v1", f"quay.io/org/three@{DIGEST}",
+    )
+
+    assert result.returncode == 0, result.stderr
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert sorted(line["image"] for line in lines) == [
+        f"quay.io/org/one@{digest}",
+        "quay.io/org/three:v1",
+        f"quay.io/org/three@{DIGEST}",
+        f"quay.io/org/two@{digest}",
+    ]
+    assert all(line["sha"] == SHA for line in lines)
+    # Repositories sharing a digest are traced and cached separately,
+    # pullspecs of one repository sharing a digest once
+    assert sorted(cosign_calls(fake_cosign)) == [
+        f"download attestation quay.io/org/one@{digest}",
+        f"download attestation quay.io/org/three@{DIGEST}",
+        f"download attestation quay.io/org/two@{digest}",
+        "triangulate --type attestation quay.io/org/three:v1",
+    ]
+    assert sorted(p.name for p in (tmp_path / "cache").glob("*.json")) == [
+        f"{cache_key('quay.io/org/one')}@{digest.replace(':', '-')}.json",
+        f"{cache_key('quay.io/org/three')}@{DIGEST.replace(':', '-')}.json",
+        f"{cache_key('quay.io/org/two')}@{digest.replace(':', '-')}.json",
+    ]
+
+
+@pytest.mark.test
+def test_trace_images_rejects_bad_jobs(fake_cosign):
+    script = PROVENANCE / "scripts" / "trace-images.sh"
+    for args in (["-j"], ["-j", "0", IMAGE], ["-j", "x", IMAGE], ["--snapshot"]):
+        result = run_script(script, *args)
+        assert result.returncode == 2, args
+        assert result.stderr.startswith("Usage:"), (args, result.stderr)
+
+
+@pytest.mark.test
+def test_trace_images_reads_snapshot(fake_cosign, tmp_path):
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text(json.dumps({
+        "kind": "Snapshot",
+        "spec": {"components": [
+            {"name": "api", "containerImage": f"quay.io/org/api@sha256:{'1' * 64}"},
+            {"name": "ui", "containerImage": f"quay.io/org/ui@sha256:{'2' * 64}"},
+        ]},
+    }))
+
+    result = run_script(PROVENANCE / "scripts" / "trace-images.sh", "--snapshot", str(snapshot))
+
+    assert result.returncode == 0, result.stderr
+    assert sorted(json.loads(line)["image"] for line in result.stdout.splitlines()) == [
+        f"quay.io/org/api@sha256:{'1' * 64}",
+        f"quay.io/org/ui@sha256:{'2' * 64}",
+    ]
+
+
+@pytest.mark.test
+def test_trace_images_reports_errors_inline(fake_cosign):
+    result = run_script(
+        PROVENANCE / "scripts" / "trace-images.sh", "--offline",
+        "quay.io/org/never-seen:v1", f"quay.io/org/uncached@sha256:{'3' * 64}",
+    )
+
+    assert result.returncode == 1
+    errors = {line["image"]: line["error"] for line in map(json.loads, result.stdout.splitlines())}
+    assert "never resolved" in errors["quay.io/org/never-seen:v1"]
+    assert "no cached attestation" in errors[f"quay.io/org/uncached@sha256:{'3' * 64}"]
+    assert cosign_calls(fake_cosign) == []
+
+
+class FakeGitHub:
+    """
+    Local stand-in for the GitHub check-runs and pulls API.
+
+    Serves check_runs[(owner, repo, ref)] with per_page/page pagination,
+    Link headers and ETags, answering matching If-None-Match requests with
+    304, and pulls[(owner, repo, number)] as the head SHA of a pull request.
+    Every request is recorded as (path, If-None-Match, Authorization) and
+    answered after `latency` seconds.
+    """
+
+    def __init__(self, latency: float = 0):
+        self.check_runs = {}
+        self.pulls = {}
+        self.requests = []
+        self.latency = latency
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, request):
+        parsed = urlparse(request.path)
+        query = parse_qs(parsed.query)
+        self.requests.append((
+            request.path, request.headers.get("If-None-Match"), request.headers.get("Authorization")
+        ))
+        time.sleep(self.latency)
+        parts = parsed.path.strip("/").split("/")
+        if parts[0] == "repos" and parts[3:4] == ["pulls"] and (parts[1], parts[2], parts[4]) in self.pulls:
+            body = json.dumps({"head": {"sha": self.pulls[parts[1], parts[2], parts[4]]}}).encode()
+            request.send_response(200)
+            request.send_header("Content-Type", "application/json")
+            request.end_headers()
+            request.wfile.write(body)
+            return
+
+        key = (parts[1], parts[2], "/".join(parts[4:-1]))
+        if parts[0] != "repos" or key not in self.check_runs:
+            request.send_response(404)
+            request.end_headers()
+            request.wfile.write(b'{"message": "Not Found"}')
+            return
+
+        runs = self.check_runs[key]
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        body = json.dumps({
+            "total_count": len(runs),
+            "check_runs": runs[(page - 1) * per_page:page * per_page],
+        }).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+        if request.headers.get("If-None-Match") == etag:
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.end_headers()
+            return
+
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("ETag", etag)
+        if page * per_page < len(runs):
+            next_url = f"{self.url}{parsed.path}?per_page={per_page}&page={page + 1}"
+            request.send_header("Link", f'<{next_url}>; rel="next", <{next_url}>; rel="last"')
+        request.end_headers()
+        request.wfile.write(body)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check_run(name: str, details_url: str = "", conclusion: str = "success", text: str = ""):
+    return {"name": name, "details_url": details_url, "conclusion": conclusion, "output": {"text": text}}
+
+
+@pytest.fixture
+def fake_github(tmp_path, monkeypatch):
+    """Point the GitHub scripts at a local FakeGitHub with an empty cache."""
+    github = FakeGitHub()
+    monkeypatch.setenv("GITHUB_API_URL", github.url)
+    monkeypatch.setenv("GH_TOKEN", "test-token")
+    monkeypatch.setenv("GH_CHECKS_CACHE_DIR", str(tmp_path / "gh-cache"))
+    yield github
+    github.close()
+
+
+@pytest.mark.test
+def test_branch_checks_follow_pagination(fake_github):
+    runs = [check_run(f"ci/prow/job-{n}") for n in range(120)]
+    runs.append(check_run("Red Hat Konflux / yq-on-push", "https://konflux-ui.example/ns/t/pipelinerun/yq-on-push-abc"))
+    fake_github.check_runs["konflux-ci", "yq-container", "main"] = runs
+
+    result = run_script(GITHUB_NAVIGATION / "scripts" / "get-branch-checks.sh", "konflux-ci", "yq-container", "main")
+
+    assert result.returncode == 0, result.stderr
+    output = json.loads(result.stdout)
+    assert output["total_count"] == 121
+    assert [run["name"] for run in output["check_runs"]] == [run["name"] for run in runs]
+    assert [path for path, _, _ in fake_github.requests] == [
+        "/repos/konflux-ci/yq-container/commits/main/check-runs?per_page=100",
+        "/repos/konflux-ci/yq-container/commits/main/check-runs?per_page=100&page=2",
+    ]
+    assert {auth for _, _, auth in fake_github.requests} == {"Bearer test-token"}
+
+
+@pytest.mark.parametrize("host, api_url", [
+    (None, "https://api.github.com"),
+    ("github.com", "https://api.github.com"),
+    ("ghe.example.com", "https://ghe.example.com/api/v3"),
+    ("acme.ghe.com", "https://api.acme.ghe.com"),
+])
+@pytest.mark.test
+def test_github_api_url_follows_gh_host(host, api_url, monkeypatch):
+    monkeypatch.delenv("GITHUB_API_URL", raising=False)
+    if host is None:
+        monkeypatch.delenv("GH_HOST", raising=False)
+    else:
+        monkeypatch.setenv("GH_HOST", host)
+    monkeypatch.setenv("GH_TOKEN", "com-token")
+    monkeypatch.setenv("GH_ENTERPRISE_TOKEN", "enterprise-token")
+    lib = GITHUB_NAVIGATION / "scripts" / "lib" / "github-api.sh"
+
+    result = subprocess.run(["bash", "-c", f'source "{lib}" && echo "$gh_api_url $gh_token"'],
+                            capture_output=True, text=True, timeout=30)
+
+    token = "com-token" if host in (None, "github.com") else "enterprise-token"
+    assert result.stdout.split() == [api_url, token]
+
+
+@pytest.mark.test
+def test_branch_checks_keep_token_off_disk(fake_github, tmp_path, monkeypatch):
+    """The token reaches the API, but none of the files curl reads hold it."""
+    fake_github.check_runs["o", "r", "main"] = [check_run("check")]
+    work = tmp_path / "tmp"
+    work.mkdir()
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    curl = bin_dir / "curl"
+    curl.write_text(f"""#!/bin/bash
+if grep -rq test-token "$TMPDIR"; then
+    echo "token written to disk" >&2
+    exit 1
+fi
+exec {shutil.which("curl")} "$@"
+""")
+    curl.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("TMPDIR", str(work))
+
+    result = run_script(GITHUB_NAVIGATION / "scripts" / "get-branch-checks.sh", "o", "r", "main")
+
+    assert result.returncode == 0, result.stderr
+    assert [auth for _, _, auth in fake_github.requests] == ["Bearer test-token"]
+
+
+@pytest.mark.test
+def test_branch_checks_conditional_requests(fake_github, tmp_path):
+    fake_github.check_runs["o", "r", "main"] = [check_run(f"check-{n}") for n in range(150)]
+    script = GITHUB_NAVIGATION / "scripts" / "get-branch-checks.sh"
+
+    first = run_script(script, "o", "r", "main")
+    fake_github.requests.clear()
+    second = run_script(script, "o", "r", "main")
+
+    assert second.returncode == 0, second.stderr
+    assert second.stdout == first.stdout
+    # Both pages were revalidated with their ETags and not re-downloaded
+    assert len(fake_github.requests) == 2
+    assert all(etag is not None for _, etag, _ in fake_github.requests)
+    # Each page's ETag, next link and body share one cache file
+    assert [p.suffix for p in (tmp_path / "gh-cache").iterdir()] == [".entry", ".entry"]
+
+    fake_github.check_runs["o", "r", "main"].append(check_run("check-new"))
+    third = run_script(script, "o", "r", "main")
+    assert json.loads(third.stdout)["total_count"] == 151
+
+
+@pytest.mark.test
+def test_branch_checks_konflux_filter(fake_github):
+    fake_github.check_runs["o", "r", "abc123"] = [
+        check_run("ci/prow/images"),
+        check_run("SonarCloud Code Analysis"),
+        check_run("Red Hat Konflux / r-on-pull-request", "https://konflux-ui.example/ns/t/pipelinerun/r-1"),
+        check_run("functional-test", "https://konflux-ui.example/ns/t/pipelinerun/r-test-1"),
+    ]
+    script = GITHUB_NAVIGATION / "scripts" / "get-branch-checks.sh"
+
+    result = run_script(script, "--konflux", "o", "r", "abc123", ".check_runs[].name")
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["Red Hat Konflux / r-on-pull-request", "functional-test"]
+
+
+@pytest.mark.test
+def test_branch_checks_reports_api_errors(fake_github):
+    result = run_script(GITHUB_NAVIGATION / "scripts" / "get-branch-checks.sh", "o", "missing", "main")
+
+    assert result.returncode != 0
+    assert "HTTP 404" in result.stderr
+
+
+@pytest.mark.test
+def test_pipelineruns_index_refs_and_pull_requests(fake_github):
+    console = "https://konflux-ui.apps.example.com/ns/yq-tenant"
+    fake_github.check_runs["konflux-ci", "yq-container", "main"] = [
+        check_run("ci/prow/images"),
+        check_run("Red Hat Konflux / yq-on-push", f"{console}/pipelinerun/yq-on-push-abc12"),
+        check_run(
+            "Red Hat Konflux / yq-enterprise-contract / yq", "https://konflux-ui.apps.example.com/", "failure",
+            text=f"<a href=\"{console}/applications/yq/pipelineruns/yq-ec-x9k2f\">logs</a>",
+        ),
+    ]
+    fake_github.pulls["konflux-ci", "oras-container", "249"] = SHA
+    fake_github.check_runs["konflux-ci", "oras-container", SHA] = [
+        check_run(f"Red Hat Konflux / oras-on-pull-request", f"{console}/pipelinerun/oras-on-pr-{n}")
+        for n in range(101)
+    ]
+
+    result = run_script(
+        GITHUB_NAVIGATION / "scripts" / "get-pipelineruns.sh",
+        "konflux-ci/yq-container@main", "konflux-ci/oras-container#249",
+    )
+
+    assert result.returncode == 0, result.stderr
+    index = json.loads(result.stdout)
+    main = index["konflux-ci/yq-container@main"]
+    assert (main["repo"], main["ref"], main["sha"]) == ("konflux-ci/yq-container", "main", None)
+    assert main["builds"] == [{
+        "check": "Red Hat Konflux / yq-on-push", "status": None, "conclusion": "success",
+        "url": f"{console}/pipelinerun/yq-on-push-abc12",
+        "cluster": "konflux-ui.apps.example.com", "namespace": "yq-tenant", "name": "yq-on-push-abc12",
+    }]
+    assert [(run["conclusion"], run["namespace"], run["name"]) for run in main["integration_tests"]] == [
+        ("failure", "yq-tenant", "yq-ec-x9k2f"),
+    ]
+    pull = index["konflux-ci/oras-container#249"]
+    assert (pull["ref"], pull["sha"]) == ("#249", SHA)
+    assert [run["name"] for run in pull["builds"]] == [f"oras-on-pr-{n}" for n in range(101)]
+    assert pull["integration_tests"] == []
+
+
+@pytest.mark.test
+def test_pipelineruns_reads_targets_from_stdin_and_reports_failures(fake_github):
+    fake_github.check_runs["o", "a", "main"] = [check_run("a-on-push", "https://konflux.example/ns/t/pipelinerun/a-1")]
+    fake_github.check_runs["o", "b", "main"] = [check_run("b-on-push", "https://konflux.example/ns/t/pipelinerun/b-1")]
+
+    result = subprocess.run(
+        [str(GITHUB_NAVIGATION / "scripts" / "get-pipelineruns.sh"), "-j", "4"],
+        input="# morning sweep\no/a@main\n\no/b@main\no/missing@main\no/a#7\n",
+        capture_output=True, text=True, timeout=60,
+    )
+
+    assert result.returncode == 1
+    index = json.loads(result.stdout)
+    assert index["o/a@main"]["builds"][0]["name"] == "a-1"
+    assert index["o/b@main"]["builds"][0]["name"] == "b-1"
+    assert "error" in index["o/missing@main"]
+    assert "error" in index["o/a#7"]
+    assert result.stderr.count("HTTP 404") == 2
+
+
+@pytest.mark.test
+def test_pipelineruns_rejects_bad_jobs(fake_github):
+    script = GITHUB_NAVIGATION / "scripts" / "get-pipelineruns.sh"
+    for args in (["-j"], ["-j", "0", "o/a@main"], ["-j", "four", "o/a@main"], ["-j", "-1", "o/a@main"]):
+        result = run_script(script, *args)
+        assert result.returncode == 1, args
+        assert result.stderr.startswith("Usage:"), (args, result.stderr)
+    assert fake_github.requests == []
+
+
+def install_fake_kubectl(tmp_path: Path, monkeypatch) -> Path:
+    stub = tmp_path / "kubectl"
+    stub.write_text(FAKE_KUBECTL)
+    stub.chmod(0o755)
+    log = tmp_path / "kubectl.log"
+    log.touch()
+    monkeypatch.setenv("KUBECTL", str(stub))
+    monkeypatch.setenv("FAKE_KUBECTL_LOG", str(log))
+    return log
+
+
+@pytest.fixture
+def fake_kubectl(tmp_path, monkeypatch):
+    """Point KUBECTL at a fake kubectl serving copies of the application fixtures."""
+    fixtures = tmp_path / "fixtures"
+    shutil.copytree(APPLICATION_FIXTURES, fixtures)
+    monkeypatch.setenv("FAKE_KUBECTL_FIXTURES", str(fixtures))
+    return fixtures, install_fake_kubectl(tmp_path, monkeypatch)
+
+
+def application_status(*args: str, cwd: Path) -> subprocess.CompletedProcess:
+    script = (COMPONENT_BUILD_STATUS / "scripts" / "application-status.sh").resolve()
+    return subprocess.run([str(script), *args], capture_output=True, text=True, timeout=30, cwd=cwd)
+
+
+@pytest.mark.test
+def test_application_status_joins_one_list_per_kind(fake_kubectl, tmp_path):
+    fixtures, log = fake_kubectl
+
+    result = application_status("-n", "rhosdt-tenant", "--json", "otel-main", cwd=tmp_path)
+
+    assert result.returncode == 0, result.stderr
+    assert sorted(log.read_text().splitlines()) == [
+        "get components -n rhosdt-tenant -o json",
+        "get releases -n rhosdt-tenant -l appstudio.openshift.io/application=otel-main -o json",
+        "get snapshots -n rhosdt-tenant -l appstudio.openshift.io/application=otel-main -o json",
+    ]
+    status = {component["name"]: component for component in json.loads(result.stdout)["components"]}
+    # tempo-main belongs to another application
+    assert list(status) == ["otel-bundle-main", "otel-collector-main", "otel-operator-main"]
+    # Only Snapshots of the last built commit, oldest first, each with its Releases
+    assert status["otel-collector-main"]["snapshots"] == [
+        {"name": "otel-main-2xpp5", "releases": [{"name": "otel-main-2xpp5-d1b3410-j6262", "status": "Succeeded"}]},
+        {"name": "otel-main-8s28p", "releases": [{"name": "otel-main-8s28p-d1b3410-p4kq2", "status": "Progressing"}]},
+    ]
+    assert status["otel-bundle-main"]["snapshots"][0]["releases"][0]["status"] == \
+        "Failed (ManagedPipelineProcessed failed)"
+    assert status["otel-operator-main"]["sha"] is None
+    assert status["otel-operator-main"]["snapshots"] == []
+
+
+@pytest.mark.test
+def test_application_status_renders_tables_with_git_details(fake_kubectl, tmp_path):
+    fixtures, _ = fake_kubectl
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run([*git, "init", "-q", "-b", "main"], cwd=repo, check=True)
+    subprocess.run([*git, "commit", "-q", "--allow-empty", "-m", "Fix service account (#693) | bundle"],
+                   cwd=repo, check=True)
+    sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True, text=True).stdout.strip()
+    for path in fixtures.iterdir():
+        path.write_text(path.read_text().replace("8ba2e60ab95f65af6a61f01dc255f9b05c8c7292", sha))
+
+    result = application_status("otel-main", cwd=repo)
+
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.splitlines()
+    assert lines[0] == "| Component | Built SHA | lastPromotedImage | Commit Message | Git Branch | Snapshots (oldest first) |"
+    bundle = next(line for line in lines if line.startswith("| otel-bundle-main |"))
+    assert f"| {sha[:7]} |" in bundle
+    assert r"| Fix service account (#693) \| bundle | main | otel-main-jnhfz |" in bundle
+    assert "Component: otel-collector-main" in lines
+    assert "| otel-main-jnhfz | otel-main-jnhfz-8ba2e60-nnwnp | Failed (ManagedPipelineProcessed failed) |" in lines
+    assert "Component: otel-operator-main" not in lines
+
+
+@pytest.mark.test
+def test_application_status_reports_cluster_errors(fake_kubectl, tmp_path):
+    fixtures, _ = fake_kubectl
+    (fixtures / "releases.json").unlink()
+
+    result = application_status("otel-main", cwd=tmp_path)
+
+    assert result.returncode == 1
+    assert "unsupported command: get releases" in result.stderr
+    assert "Failed to list Konflux resources of application 'otel-main'" in result.stderr
+
+
+@pytest.mark.test
+def test_application_status_rejects_missing_option_values(fake_kubectl, tmp_path):
+    for args in (["-n"], ["otel-main", "extra"], []):
+        result = application_status(*args, cwd=tmp_path)
+        assert result.returncode == 1, args
+        assert result.stderr.startswith("Usage:"), (args, result.stderr)
+
+
+class FakeKubeAPI:
+    """
+    Local stand-in for the Kubernetes API server replaying recorded watches.
+
+    For each resource (the last path segment, e.g. "pipelineruns"),
+    lists[resource] holds the list responses, served in turn (the last
+    one repeats), and watches[resource] the watch connections: each is a
+    list of events streamed one per line before the server closes the
+    connection, as it does when a watch times out. Once they run out, a
+    watch stays open without events. Every request is recorded as
+    (resource, query parameters).
+    """
+
+    def __init__(self):
+        self.lists = {}
+        self.watches = {}
+        self.requests = []
+        self.closed = threading.Event()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, request):
+        parsed = urlparse(request.path)
+        resource = parsed.path.rstrip("/").split("/")[-1]
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        self.requests.append((resource, query))
+
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        request.end_headers()
+        if query.get("watch") != "1":
+            lists = self.lists.get(resource, [{"metadata": {"resourceVersion": "1"}, "items": []}])
+            response = lists.pop(0) if len(lists) > 1 else lists[0]
+            request.wfile.write(json.dumps(response).encode())
+            return
+
+        connections = self.watches.get(resource, [])
+        if not connections:
+            self.closed.wait(30)
+            return
+        for event in connections.pop(0):
+            request.wfile.write(json.dumps(event).encode() + b"\n")
+            request.wfile.flush()
+
+    def watch_versions(self, resource: str):
+        return [query.get("resourceVersion") for name, query in self.requests
+                if name == resource and query.get("watch") == "1"]
+
+    def close(self):
+        self.closed.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_kube_api(tmp_path, monkeypatch):
+    """Point KUBECTL at a fake kubectl talking to a FakeKubeAPI."""
+    api = FakeKubeAPI()
+    api.kubectl_log = install_fake_kubectl(tmp_path, monkeypatch)
+    monkeypatch.setenv("FAKE_KUBE_API", api.url)
+    monkeypatch.setenv("FAKE_KUBECTL_NAMESPACE", "rhosdt-tenant")
+    yield api
+    api.close()
+
+
+def konflux_object(name: str, rv: str, created: str, labels: dict, condition: dict = None, **fields):
+    metadata = {"name": name, "resourceVersion": rv, "creationTimestamp": created, "labels": labels}
+    status = {"conditions": [condition]} if condition else {}
+    return {"metadata": metadata, "status": status, **fields}
+
+
+def build_pipelinerun(component: str, name: str, rv: str, created: str, succeeded: str = None, **condition):
+    labels = {
+        "appstudio.openshift.io/component": component,
+        "pipelines.appstudio.openshift.io/type": "build",
+        "pipelinesascode.tekton.dev/original-prname": f"{component}-on-push",
+    }
+    if succeeded:
+        condition = {"type": "Succeeded", "status": succeeded, **condition}
+    return konflux_object(name, rv, created, labels, condition or None)
+
+
+def built_by(component: str, pipelinerun: str) -> dict:
+    return {"appstudio.openshift.io/component": component, "appstudio.openshift.io/build-pipelinerun": pipelinerun}
+
+
+def wait_builds(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [str(COMPONENT_BUILD_STATUS / "scripts" / "wait-builds.sh"), *args],
+        capture_output=True, text=True, timeout=30,
+    )
+
+
+@pytest.mark.test
+def test_wait_builds_follows_watches_of_many_components(fake_kube_api):
+    since = "2025-11-13T11:00:00Z"
+    old_build = build_pipelinerun("collector", "collector-on-push-old", "90", "2025-11-13T10:00:00Z", "True")
+    fake_kube_api.lists["pipelineruns"] = [{"metadata": {"resourceVersion": "100"}, "items": [old_build]}]
+    fake_kube_api.watches["pipelineruns"] = [
+        [
+            {"type": "ADDED", "object": build_pipelinerun("collector", "collector-on-push-x1", "101", "2025-11-13T11:01:00Z")},
+            {"type": "ADDED", "object": build_pipelinerun("operator", "operator-on-push-y1", "102", "2025-11-13T11:01:05Z")},
+            {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "105"}}},
+        ],
+        [
+            {"type": "MODIFIED", "object": build_pipelinerun(
+                "collector", "collector-on-push-x1", "110", "2025-11-13T11:01:00Z", "True", reason="Succeeded")},
+            {"type": "MODIFIED", "object": build_pipelinerun(
+                "operator", "operator-on-push-y1", "111", "2025-11-13T11:01:05Z", "False",
+                reason="Failed", message="Tasks Completed: 3 (Failed: 1, Cancelled 0)")},
+        ],
+    ]
+    # The first snapshot watch is too old and has to list again
+    snapshot = konflux_object(
+        "otel-main-8s28p", "301", "2025-11-13T11:20:00Z", built_by("collector", "collector-on-push-x1"),
+        spec={"components": [{"name": "collector", "containerImage": f"quay.io/otel/collector@{DIGEST}"}]},
+    )
+    fake_kube_api.lists["snapshots"] = [
+        {"metadata": {"resourceVersion": "200"}, "items": []},
+        {"metadata": {"resourceVersion": "300"}, "items": [snapshot]},
+    ]
+    fake_kube_api.watches["snapshots"] = [
+        [{"type": "ERROR", "object": {"kind": "Status", "code": 410, "reason": "Expired"}}],
+    ]
+
+    result = wait_builds("--since", since, "collector", "operator")
+
+    assert result.returncode == 1, result.stderr
+    events = [json.loads(line) for line in result.stdout.splitlines()]
+    final = {event["component"]: event for event in events}
+    assert final["collector"]["phase"] == "snapshot-created"
+    assert (final["collector"]["pipelinerun"], final["collector"]["snapshot"], final["collector"]["image"]) == \
+        ("collector-on-push-x1", "otel-main-8s28p", f"quay.io/otel/collector@{DIGEST}")
+    assert final["operator"]["phase"] == "build-failed"
+    assert final["operator"]["message"] == "Tasks Completed: 3 (Failed: 1, Cancelled 0)"
+    assert [event["phase"] for event in events if event["component"] == "operator"] == \
+        ["waiting", "building", "build-failed"]
+    # Watches resume from the list and the last bookmark; 410 Gone lists again
+    assert fake_kube_api.watch_versions("pipelineruns")[:2] == ["100", "105"]
+    snapshot_requests = [query.get("resourceVersion", "list") for name, query in fake_kube_api.requests
+                         if name == "snapshots"]
+    assert snapshot_requests[:4] == ["list", "200", "list", "300"]
+    # One request stream per kind, for all components together
+    selectors = {query["labelSelector"] for _, query in fake_kube_api.requests}
+    assert selectors == {"appstudio.openshift.io/component in (collector,operator)"}
+
+
+@pytest.mark.test
+def test_wait_builds_waits_for_release(fake_kube_api):
+    since = "2025-11-13T11:00:00Z"
+    build = build_pipelinerun("bundle", "bundle-on-push-z1", "11", "2025-11-13T11:01:00Z", "True", reason="Succeeded")
+    fake_kube_api.lists["pipelineruns"] = [{"metadata": {"resourceVersion": "11"}, "items": [build]}]
+    snapshot = konflux_object(
+        "otel-main-jnhfz", "21", "2025-11-13T11:30:00Z", built_by("bundle", "bundle-on-push-z1"),
+        spec={"components": [{"name": "bundle", "containerImage": f"quay.io/otel/bundle@{DIGEST}"}]},
+    )
+    fake_kube_api.lists["snapshots"] = [{"metadata": {"resourceVersion": "21"}, "items": [snapshot]}]
+
+    def release(rv, status, reason):
+        return konflux_object(
+            "otel-main-jnhfz-8ba2e60-nnwnp", rv, "2025-11-13T11:31:00Z", built_by("bundle", "bundle-on-push-z1"),
+            {"type": "Released", "status": status, "reason": reason, "message": ""},
+        )
+
+    fake_kube_api.lists["releases"] = [{"metadata": {"resourceVersion": "30"}, "items": []}]
+    fake_kube_api.watches["releases"] = [[
+        {"type": "ADDED", "object": release("31", "False", "Progressing")},
+        {"type": "MODIFIED", "object": release("32", "True", "Succeeded")},
+    ]]
+
+    result = wait_builds("--since", since, "--wait-release", "bundle")
+
+    assert result.returncode == 0, result.stderr
+    events = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [event["phase"] for event in events][-2:] == ["releasing", "released"]
+    assert events[-1]["release"] == "otel-main-jnhfz-8ba2e60-nnwnp"
+    assert all(query.get("labelSelector") for _, query in fake_kube_api.requests)
+
+
+@pytest.mark.test
+def test_wait_builds_times_out(fake_kube_api):
+    result = wait_builds("--timeout", "1s", "collector")
+
+    assert result.returncode == 1
+    events = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [event["phase"] for event in events] == ["waiting", "timed-out"]
+    assert events[-1]["message"] == "still waiting after 1s"
+
+
+@pytest.mark.test
+def test_wait_builds_normalizes_since_to_utc(fake_kube_api):
+    build = build_pipelinerun("collector", "collector-on-push-x1", "11", "2025-11-13T10:30:00Z", "True", reason="Succeeded")
+    fake_kube_api.lists["pipelineruns"] = [{"metadata": {"resourceVersion": "11"}, "items": [build]}]
+
+    # 11:00+01:00 is 10:00Z, before the build; as a string it sorts after it
+    result = wait_builds("--since", "2025-11-13T11:00:00+01:00", "--timeout", "1s", "collector")
+
+    phases = [json.loads(line)["phase"] for line in result.stdout.splitlines()]
+    assert "build-succeeded" in phases, result.stderr
+
+
+@pytest.mark.test
+def test_wait_builds_rejects_missing_option_values(fake_kube_api):
+    for option in ("-n", "--since", "--timeout"):
+        result = wait_builds(option)
+        assert result.returncode == 1, option
+        assert result.stderr.startswith("Usage:"), (option, result.stderr)
+
+    result = wait_builds("--since", "next week-ish", "collector")
+    assert result.returncode == 1
+    assert "Invalid time 'next week-ish'" in result.stderr
+
+
+@pytest.mark.test
+def test_build_components_triggers_once_and_nudges_each_file_once(fake_kube_api, tmp_path, monkeypatch):
+    images = {}
+    builds, snapshots = [], []
+    for component in ("collector", "operator"):
+        images[component] = f"quay.io/otel/{component}@sha256:{component[0] * 64}"
+        name = f"{component}-on-push-1"
+        created = "2099-01-01T00:00:00Z"
+        builds.append(build_pipelinerun(component, name, "10", created, "True", reason="Succeeded"))
+        snapshots.append(konflux_object(
+            f"otel-main-{component}", "20", created, built_by(component, name),
+            spec={"components": [{"name": component, "containerImage": images[component]}]},
+        ))
+    fake_kube_api.lists["pipelineruns"] = [{"metadata": {"resourceVersion": "10"}, "items": builds}]
+    fake_kube_api.lists["snapshots"] = [{"metadata": {"resourceVersion": "20"}, "items": snapshots}]
+
+    # The collector nudges YAML only, the operator uses the default patterns
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    builds[0]["metadata"]["annotations"] = {"build.appstudio.openshift.io/build-nudge-files": r".*\.yaml, none"}
+    (fixtures / "pipelineruns.json").write_text(json.dumps({"kind": "List", "items": builds}))
+    monkeypatch.setenv("FAKE_KUBECTL_FIXTURES", str(fixtures))
+
+    old = "0" * 64
+    repo = tmp_path / "repo"
+    (repo / "bundle").mkdir(parents=True)
+    csv = repo / "bundle" / "csv.yaml"
+    csv.write_text(
+        f"collector: quay.io/otel/collector@sha256:{old}\n"
+        f"operator: quay.io/otel/operator:v1.2@sha256:{old}\n"
+        f"other: quay.io/otel/collector-contrib@sha256:{old}\n"
+    )
+    csv.chmod(0o640)
+    dockerfile = repo / "Dockerfile.bundle"
+    dockerfile.write_text(f"FROM quay.io/otel/collector@sha256:{old}\nCOPY quay.io/otel/operator@sha256:{old} /\n")
+    readme = repo / "README.md"
+    readme.write_text(f"quay.io/otel/operator@sha256:{old}\n")
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    subprocess.run(["git", "add", "."], cwd=repo, check=True)
+
+    result = subprocess.run(
+        [str((COMPONENT_BUILD_STATUS / "scripts" / "build-components.sh").resolve()),
+         "--wait", "1m", "--nudge", "collector", "operator"],
+        capture_output=True, text=True, timeout=30, cwd=repo,
+    )
+
+    assert result.returncode == 0, result.stderr
+    kubectl_calls = fake_kube_api.kubectl_log.read_text().splitlines()
+    assert [call for call in kubectl_calls if call.startswith("annotate")] == [
+        "annotate components collector operator --overwrite build.appstudio.openshift.io/request=trigger-pac-build",
+    ]
+    events = [json.loads(line) for line in result.stdout.splitlines()]
+    assert {event["component"] for event in events if event.get("phase") == "snapshot-created"} == \
+        {"collector", "operator"}
+    assert sorted((event["nudged"], event["components"]) for event in events if "nudged" in event) == [
+        ("Dockerfile.bundle", ["operator"]),
+        ("bundle/csv.yaml", ["collector", "operator"]),
+    ]
+    assert csv.read_text() == (
+        f"collector: {images['collector']}\n"
+        f"operator: {images['operator']}\n"
+        f"other: quay.io/otel/collector-contrib@sha256:{old}\n"
+    )
+    assert csv.stat().st_mode & 0o777 == 0o640
+    assert dockerfile.read_text() == \
+        f"FROM quay.io/otel/collector@sha256:{old}\nCOPY {images['operator']} /\n"
+    assert readme.read_text() == f"quay.io/otel/operator@sha256:{old}\n"
+    assert sorted(path.name for path in repo.rglob("*.nudge.*")) == []
+
+
+@pytest.mark.test
+def test_build_components_requires_wait_for_nudge(fake_kube_api, tmp_path):
+    result = run_script(COMPONENT_BUILD_STATUS / "scripts" / "build-components.sh", "--nudge", "collector")
+
+    assert result.returncode == 1
+    assert "--wait-release and --nudge require --wait" in result.stderr
+    assert fake_kube_api.kubectl_log.read_text() == ""
+
+
+@pytest.fixture
+def triage_kubectl(tmp_path, monkeypatch):
+    """Point KUBECTL at a fake kubectl serving the failure triage fixtures."""
+    monkeypatch.setenv("FAKE_KUBECTL_FIXTURES", str(TRIAGE_FIXTURES.resolve()))
+    return install_fake_kubectl(tmp_path, monkeypatch)
+
+
+def triage(*args: str) -> subprocess.CompletedProcess:
+    return run_script(
+        PIPELINE_DEBUGGING / "scripts" / "triage-failures.sh",
+        "-n", "build-tenant", "--since", "2025-11-13T00:00:00Z", *args,
+    )
+
+
+@pytest.mark.test
+def test_triage_groups_failures_by_reason(triage_kubectl):
+    result = triage("--json", "--tail", "2")
+
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report["failed"] == 7
+    groups = {group["reason"]: group for group in report["groups"]}
+    assert {reason: group["count"] for reason, group in groups.items()} == {
+        "OOMKilled": 2,
+        "StepFailed (exit code 127)": 2,
+        "FailedScheduling": 1,
+        "ImagePullBackOff": 1,
+        "Timeout": 1,
+    }
+    assert [group["reason"] for group in report["groups"]][:2] == ["OOMKilled", "StepFailed (exit code 127)"]
+
+    oom = {run["pipelinerun"]: run for run in groups["OOMKilled"]["runs"]}
+    assert oom["app-a-on-push-k2x9p"]["taskruns"][0]["steps"] == [
+        {"name": "build", "container": "step-build", "exit_code": 137,
+         "log_tail": ["[build] compiling module 39", "Killed"]},
+    ]
+    # The pod is gone: reported from the TaskRun status alone
+    assert oom["app-b-on-push-7hd2q"]["taskruns"][0]["pod"] is None
+    assert oom["app-b-on-push-7hd2q"]["taskruns"][0]["steps"][0]["log_tail"] is None
+
+    # The build step failure is the cause, not the cancelled sibling TaskRun
+    [script_failure, _] = groups["StepFailed (exit code 127)"]["runs"]
+    assert [taskrun["reason"] for taskrun in script_failure["taskruns"]] == ["StepFailed (exit code 127)", "Cancelled"]
+    # Scheduling events win over the TaskRun timeout they caused
+    assert groups["FailedScheduling"]["runs"][0]["taskruns"][0]["message"].startswith("TaskRun")
+    assert "app-a-on-push-old01" not in result.stdout
+
+
+@pytest.mark.test
+def test_triage_lists_once_and_fetches_only_failed_step_logs(triage_kubectl):
+    result = triage()
+
+    assert result.returncode == 0, result.stderr
+    calls = triage_kubectl.read_text().splitlines()
+    assert sorted(call.split()[1] for call in calls if call.startswith("get ")) == \
+        ["events", "pipelineruns", "pods", "taskruns"]
+    assert sorted(call.split()[1] for call in calls if call.startswith("logs ")) == [
+        "app-a-on-pull-request-z1y2x-build-container-pod",
+        "app-a-on-push-k2x9p-build-container-pod",
+        "app-e-on-push-c5v1b-build-container-pod",
+    ]
+    lines = result.stdout.splitlines()
+    assert lines[0] == "# Failed PipelineRuns since 2025-11-13T00:00:00Z in build-tenant: 7"
+    assert "| OOMKilled | 2 | app-a-on-push-k2x9p, app-b-on-push-7hd2q |" in lines
+    assert "      /bin/sh: line 1: make: command not found" in lines
+    assert "      (logs unavailable)" in lines
+
+
+@pytest.mark.test
+def test_triage_normalizes_since_times(triage_kubectl):
+    for since in ("2025-11-13T00:00:00Z", "2025-11-13T01:00:00+01:00", "2025-11-13"):
+        result = triage("--since", since)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.splitlines()[0] == "# Failed PipelineRuns since 2025-11-13T00:00:00Z in build-tenant: 7"
+
+    result = triage("--since", "last tuesday-ish")
+    assert result.returncode == 1
+    assert "Invalid window 'last tuesday-ish'" in result.stderr
+
+
+@pytest.mark.test
+def test_triage_validates_options(triage_kubectl):
+    for option in ("-n", "--since", "--tail", "-j"):
+        result = triage(option)
+        assert result.returncode == 1, option
+        assert result.stderr.startswith("Usage:"), (option, result.stderr)
+
+    for args, error in (
+        (["--tail", "-5"], "Invalid --tail '-5'"),
+        (["--tail", "20; rm"], "Invalid --tail '20; rm'"),
+        (["-j", "0"], "Invalid -j '0'"),
+        (["-j", "x"], "Invalid -j 'x'"),
+    ):
+        result = triage(*args)
+        assert result.returncode == 1, args
+        assert error in result.stderr, (args, result.stderr)
+
+    result = triage("--json", "--tail", "0")
+    assert result.returncode == 0, result.stderr
+
+
+CLASSIFY_LOG = PIPELINE_DEBUGGING / "tests" / "fixtures" / "classify" / "build-container.log"
+
+
+def classify_log(*args: str, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [PIPELINE_DEBUGGING / "scripts" / "classify-log.sh", *args],
+        capture_output=True, text=True, timeout=30, **kwargs,
+    )
+
+
+@pytest.mark.test
+def test_classify_log_separates_root_cause_from_symptoms():
+    result = classify_log("--json", "-C", "1", str(CLASSIFY_LOG))
+
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    log = CLASSIFY_LOG.read_bytes()
+    assert report["lines"] == 10
+    assert report["bytes"] == len(log)
+
+    cause = report["root_cause"]
+    assert (cause["id"], cause["kind"], cause["count"], cause["line"], cause["last_line"]) == \
+        ("network", "cause", 2, 6, 8)
+    # The offset points at the start of the matched line
+    assert log[cause["offset"]:].decode().startswith(cause["text"] + "\n")
+    assert cause["before"] == ["[build] go: downloading github.com/spf13/cobra v1.8.0"]
+    assert cause["after"] == ["[build] go: downloading github.com/spf13/pflag v1.0.5"]
+    assert report["causes"] == []
+
+    # Exit codes come after the cause; each line counts for one signature only
+    assert [(symptom["id"], symptom["line"], symptom["count"]) for symptom in report["symptoms"]] == \
+        [("step-failed", 9, 2)]
+
+
+@pytest.mark.test
+def test_classify_log_reads_stdin_and_falls_back_to_symptoms():
+    log = "\n".join(f"[test] case {n} ok" for n in range(1000)) + "\n[test] exited with code 2\n"
+    result = classify_log(input=log)
+
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.splitlines()
+    assert lines[0] == f"# Log classification: 1001 lines, {len(log)} bytes"
+    assert "## Root cause: not found" in lines
+    assert "First symptom (line 1001, byte 18890):" in lines
+    assert "> [test] exited with code 2" in lines
+    assert "  [test] case 997 ok" in lines
+    assert "  [test] case 996 ok" not in lines
+
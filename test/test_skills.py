@@ -14,110 +14,142 @@ Use pytest's -m flag to select which mode to run:
   pytest -m test      # Validate results
 """
 
+import asyncio
 import json
 from pathlib import Path
 
 import pytest
 import yaml
 
-from conftest import check_expectations, invoke_claude
+from conftest import (
+    adaptive_min_samples,
+    invoke_claude,
+    invoke_claude_streaming,
+    read_result_digest,
+    result_file_for,
+    result_is_current,
+    sample_outcomes,
+    scenario_key,
+    write_result,
+)
+from sampling import decide, skip_marker
 
 
 @pytest.mark.generate
-def test_generate_result(skill_scenario, worker_home):
+def test_generate_result(skill_scenario, worker_home, generation_batch, request):
     """
     Generate test results by invoking Claude.
 
-    Skips if result file already exists with matching digest.
+    Skips if result file already exists with matching digest. With
+    --concurrency, results were already generated by the generation_batch
+    fixture and this only reports the outcome for this sample. With
+    --stream-output, output is streamed straight into the result file.
+    With --adaptive, the sample is skipped (and recorded as such) once the
+    scenario's earlier samples agree on the expectations.
     """
     skill_dir = skill_scenario["skill_dir"]
-    digest = skill_scenario["digest"]
+    digest = skill_scenario["header"]
     scenario_name = skill_scenario["scenario_name"]
     prompt = skill_scenario["prompt"]
     model = skill_scenario["model"]
     sample_num = skill_scenario["sample_num"]
 
-    results_dir = skill_dir / "tests" / "results"
-    result_file = results_dir / f"{scenario_name}.{sample_num}.txt"
+    result_file = result_file_for(skill_scenario)
+
+    # Report results produced by the concurrent generation engine
+    if generation_batch is not None and scenario_key(skill_scenario) in generation_batch:
+        result = generation_batch[scenario_key(skill_scenario)]
+        if result.skipped is not None:
+            pytest.skip(result.skipped)
+        if not result.ok:
+            pytest.fail(f"Failed to generate result after {result.attempts} attempt(s): {result.error}")
+        return
+
+    config = request.config
+    adaptive = config.getoption("--adaptive")
 
     # Check if we can skip generation (file exists with matching digest)
-    should_skip = False
-    if result_file.exists():
-        try:
-            with open(result_file) as f:
-                first_line = f.readline()
-            if first_line.startswith("# skill_digest:"):
-                file_digest = first_line.split(":", 1)[1].strip()
-                if file_digest == digest:
-                    should_skip = True
-        except Exception:
-            pass  # If we can't read it, we'll regenerate the result
-
-    # Skip OUTSIDE the try/except so it's not suppressed
-    if should_skip:
+    if result_is_current(read_result_digest(result_file, include_skipped=adaptive), skill_scenario):
         pytest.skip("already up-to-date")
 
-    # Generate new result
-    results_dir.mkdir(parents=True, exist_ok=True)
+    # Skip once the earlier samples settle the scenario's outcome
+    if adaptive:
+        decision = decide(
+            sample_outcomes(skill_scenario, range(1, sample_num)),
+            skill_scenario["total_samples"] - sample_num + 1,
+            adaptive_min_samples(config, skill_scenario),
+        )
+        if decision.settled:
+            write_result(result_file, digest, skip_marker(decision.skip_reason))
+            pytest.skip(decision.skip_reason)
 
+    # Generate new result
     try:
+        if config.getoption("--stream-output"):
+            asyncio.run(invoke_claude_streaming(
+                prompt, skill_dir, model, worker_home, scenario_name, sample_num,
+                result_file, digest,
+                output_limit=config.getoption("--output-limit"),
+                debug_limit=config.getoption("--debug-limit"),
+                timeout=config.getoption("--invocation-timeout"),
+            ))
+            return
+
         output = invoke_claude(prompt, skill_dir, model, worker_home, scenario_name, sample_num)
 
         # Write result with digest comment
-        with open(result_file, "w") as f:
-            f.write(f"# skill_digest: {digest}\n")
-            f.write(output)
+        write_result(result_file, digest, output)
 
     except Exception as e:
         pytest.fail(f"Failed to generate result: {e}")
 
 
 @pytest.mark.test
-def test_validate_result(skill_scenario):
+def test_validate_result(skill_scenario, result_verdicts):
     """
     Validate existing result file against expectations.
 
-    Checks digest matches and content meets expected criteria.
+    Checks digest matches the files the scenario depends on and content
+    meets expected criteria. The results
+    of a skill are checked in bulk and verdicts of unchanged results are
+    cached (see validation.py). Samples skipped by adaptive sampling are
+    reported as skipped.
     """
-    skill_dir = skill_scenario["skill_dir"]
     digest = skill_scenario["digest"]
-    scenario_name = skill_scenario["scenario_name"]
-    sample_num = skill_scenario["sample_num"]
-    expected = skill_scenario["expected"]
-
-    result_file = skill_dir / "tests" / "results" / f"{scenario_name}.{sample_num}.txt"
+    result_file = result_file_for(skill_scenario)
 
     # Check file exists
-    if not result_file.exists():
+    verdict = result_verdicts(skill_scenario)
+    if verdict is None:
         pytest.fail(
             f"Result file not found: {result_file}\n"
             "Run 'make generate' to create it"
         )
 
-    # Read result file
-    with open(result_file) as f:
-        lines = f.readlines()
+    if verdict.error is not None:
+        pytest.fail(f"Result file could not be read\nFile: {result_file}\n{verdict.error}")
 
     # Check digest header
-    if not lines or not lines[0].startswith("# skill_digest:"):
+    if verdict.digest is None:
         pytest.fail(f"Result file missing digest header\nFile: {result_file}")
 
-    file_digest = lines[0].split(":", 1)[1].strip()
-    if file_digest != digest:
+    if not result_is_current(verdict.digest, skill_scenario):
         pytest.fail(
             f"Skill content changed - digest mismatch\n"
             f"File: {result_file}\n"
             f"Expected: {digest}\n"
-            f"Found:    {file_digest}\n"
+            f"Found:    {verdict.digest}\n"
+            f"Scenario depends on: {', '.join(skill_scenario['scope'])}\n"
             "Run 'make generate' to regenerate results"
         )
 
-    # Check expectations
-    content = "".join(lines[1:])  # Skip digest line
-    failures = check_expectations(content, expected)
+    # Samples skipped by adaptive sampling have no output to check
+    if verdict.skipped is not None:
+        pytest.skip(f"Sample not generated: {verdict.skipped}")
 
-    if failures:
-        failure_msg = "\n".join(f"  - {f}" for f in failures)
+    # Check expectations
+    if verdict.failures:
+        failure_msg = "\n".join(f"  - {f}" for f in verdict.failures)
         pytest.fail(f"Expectation failures:\nFile: {result_file}\n{failure_msg}")
 
 
@@ -304,9 +336,11 @@ def test_scenarios_yaml_schema():
                 errors.append(f"{scenarios_file}: Invalid YAML - {e}")
                 continue
 
-        # Validate against schema
+        # Validate against schema (the format checker rejects invalid regexes)
         try:
-            jsonschema.validate(instance=scenarios_data, schema=schema)
+            jsonschema.validate(
+                instance=scenarios_data, schema=schema, format_checker=jsonschema.FormatChecker()
+            )
         except jsonschema.ValidationError as e:
             # Build a helpful error message with the path to the error
             path = ".".join(str(p) for p in e.absolute_path) if e.absolute_path else "root"
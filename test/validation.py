@@ -0,0 +1,237 @@
+"""
+Bulk, cached validation of skill test results.
+
+The test_validate_result items of a skill are validated together: the
+first item of a skill checks every result file of that skill at once, and
+the other items only look up their verdict. Checking one result file
+memory-maps it, splits off the digest header and evaluates the scenario's
+compiled expectations (see expectations.py) on the rest.
+
+Verdicts are memoised on disk by (result file SHA256, expected block
+SHA256), so an unchanged result checked against unchanged expectations is
+never read again. Cache misses are spread over a process pool when there
+are enough of them to pay for starting it.
+"""
+
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from debuglog import atomic_write
+from expectations import compile_expectations
+from sampling import skipped_reason
+
+
+DIGEST_HEADER = "# skill_digest:"
+
+# Separates the digest from the list of files it covers in scoped headers:
+#   # skill_digest: <digest> scope: SKILL.md scripts/foo.sh
+# Headers without it hold a digest of the whole skill (the original format)
+SCOPE_MARKER = " scope:"
+
+# Bump when expectation semantics or failure messages change, so cached
+# verdicts computed by an older engine are not reused
+VERDICT_VERSION = 2
+
+# Fewer cache misses than this are checked in-process
+POOL_MIN_BATCH = 16
+
+
+@dataclass
+class Verdict:
+    """Outcome of checking one result file."""
+
+    # Digest from the header line, or None if the header is missing
+    digest: Optional[str]
+    failures: List[str]
+    # Reason the sample was not generated (see sampling.py), if it was skipped
+    skipped: Optional[str] = None
+    # Why the file could not be read, if it could not (never cached)
+    error: Optional[str] = None
+
+
+def expected_hash(expected: Dict) -> str:
+    """Stable hash of an expected block (and of the engine checking it)."""
+    canonical = json.dumps([VERDICT_VERSION, expected], sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def parse_digest_header(line: str) -> Optional[str]:
+    """Return the digest of a result header line, or None if it is not one."""
+    if not line.startswith(DIGEST_HEADER):
+        return None
+    return line[len(DIGEST_HEADER):].split(SCOPE_MARKER, 1)[0].strip()
+
+
+def split_result(data: bytes) -> Tuple[Optional[str], str]:
+    """Split raw result bytes into (header digest or None, content)."""
+    newline = data.find(b"\n")
+    if newline < 0:
+        newline = len(data)
+    header = bytes(data[:newline]).decode(errors="replace").rstrip("\r")
+    content = bytes(data[newline + 1:]).decode(errors="replace")
+    if "\r" in content:
+        # Match the universal newline handling of text-mode reads
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+
+    return parse_digest_header(header), content
+
+
+def unreadable(error: Exception) -> Verdict:
+    """Verdict of a result file that could not be read."""
+    return Verdict(None, [], error=f"{type(error).__name__}: {error}")
+
+
+def check_result_file(path: str, expected: Dict) -> Tuple[Optional[str], Verdict]:
+    """
+    Check one result file against an expected block.
+
+    Returns the SHA256 of the content that was actually checked, with the
+    verdict, so the verdict is cached under the right key even if the file
+    changed after it was looked up. Files that cannot be read (e.g. a
+    directory, no permission, or truncated while mapped) get an error
+    verdict and no hash. Runs in pool worker processes.
+    """
+    try:
+        with open(path, "rb") as f:
+            # mmap cannot map empty files
+            if os.fstat(f.fileno()).st_size:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                view = contextlib.nullcontext(b"")
+            with view as data:
+                file_hash = hashlib.sha256(data).hexdigest()
+                digest, content = split_result(data)
+    except (OSError, ValueError) as e:
+        return None, unreadable(e)
+    skipped = skipped_reason(content)
+    if skipped is not None:
+        return file_hash, Verdict(digest, [], skipped)
+    return file_hash, Verdict(digest, compile_expectations(expected).check(content))
+
+
+class VerdictCache:
+    """
+    On-disk cache of verdicts keyed by "{result hash}:{expected hash}".
+
+    Several xdist workers may save the same cache; each save merges the
+    entries on disk with its own, keeping at most MAX_ENTRIES of the most
+    recently stored ones.
+    """
+
+    MAX_ENTRIES = 100_000
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.entries: Dict[str, List] = self.load()
+        self.updates: Dict[str, List] = {}
+
+    def load(self) -> Dict[str, List]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Optional[Verdict]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return Verdict(*entry)
+
+    def put(self, key: str, verdict: Verdict):
+        self.entries[key] = self.updates[key] = [verdict.digest, verdict.failures, verdict.skipped]
+
+    def save(self):
+        """Merge this session's verdicts into the cache file, atomically."""
+        if self.path is None or not self.updates:
+            return
+        entries = self.load()
+        for key in self.updates:
+            entries.pop(key, None)
+        entries.update(self.updates)
+        if len(entries) > self.MAX_ENTRIES:
+            entries = dict(list(entries.items())[-self.MAX_ENTRIES:])
+        try:
+            atomic_write(self.path, json.dumps(entries).encode())
+        except OSError:
+            return  # Losing a save only costs re-checking next time
+        self.updates = {}
+
+
+class BulkValidator:
+    """
+    Validate many result files, reusing cached verdicts.
+
+    Args:
+        file_digest: Returns the SHA256 of a file (normally the session's
+            stat-validated DigestCache.file_digest)
+        cache: Verdict cache
+        processes: Maximum pool processes for cache misses; 1 checks them
+            in-process
+    """
+
+    def __init__(
+        self,
+        file_digest: Callable[[str], str],
+        cache: VerdictCache,
+        processes: int = 1,
+    ):
+        self.file_digest = file_digest
+        self.cache = cache
+        self.processes = processes
+        # Number of files actually read and checked, for reporting and tests
+        self.checked = 0
+
+    def validate(self, tasks: Dict[str, Dict]) -> Dict[str, Optional[Verdict]]:
+        """
+        Validate result files given as {path: expected block}.
+
+        Returns a verdict per path, or None for files that do not exist.
+        Files that cannot be read get a verdict with an error instead of
+        failing the whole batch.
+        """
+        verdicts: Dict[str, Optional[Verdict]] = {}
+        misses = []
+        for path, expected in tasks.items():
+            try:
+                file_hash = self.file_digest(path)
+            except FileNotFoundError:
+                verdicts[path] = None
+                continue
+            except (OSError, ValueError) as e:
+                verdicts[path] = unreadable(e)
+                continue
+            verdict = self.cache.get(f"{file_hash}:{expected_hash(expected)}")
+            if verdict is None:
+                misses.append((path, expected))
+            else:
+                verdicts[path] = verdict
+
+        if not misses:
+            return verdicts
+        self.checked += len(misses)
+
+        paths = [path for path, _ in misses]
+        expecteds = [expected for _, expected in misses]
+        workers = min(self.processes, len(misses))
+        if workers > 1 and len(misses) >= POOL_MIN_BATCH:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(misses) // (workers * 4))
+                results = list(pool.map(check_result_file, paths, expecteds, chunksize=chunksize))
+        else:
+            results = list(map(check_result_file, paths, expecteds))
+
+        for (path, expected), (file_hash, verdict) in zip(misses, results):
+            if file_hash is not None:
+                self.cache.put(f"{file_hash}:{expected_hash(expected)}", verdict)
+            verdicts[path] = verdict
+        return verdicts